@@ -1,17 +1,35 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+from utils.action_tracker import ActionTracker
+from utils.audit_log import AuditLogService
+from utils.danger_index import DangerousRoleIndex
+from utils.dispatch import EventContext, EventDispatcher
 from utils.config_manager import ConfigManager
 from utils.formatting import create_log_embed
-from utils.checks import is_owner
-from datetime import datetime, timedelta
-from collections import defaultdict
+from utils.log_sink import LogSink
+from utils.members import get_or_fetch_member
+from utils.punishment import PunishmentExecutor, PRIORITY_PUNISH, PRIORITY_RECORD, PRIORITY_ROLLBACK
+from utils.rollback import RollbackEngine
+from utils.checks import is_bot_owner, is_owner
+import config
+from datetime import datetime
 import asyncio
+import functools
+
+INTENTS = discord.Intents(guilds=True, members=True, moderation=True, emojis_and_stickers=True)
 
 class AntiNuke(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config_manager = ConfigManager()
-        self.action_tracker = defaultdict(lambda: defaultdict(list))
+        self.audit_logs = AuditLogService()
+        self.log_sink = LogSink()
+        self.events = EventDispatcher()
+        self.events.register('member_remove', self.on_member_remove)
+        self.events.register('guild_role_create', self.on_guild_role_create)
+        self.events.register('guild_role_update', self.on_guild_role_update)
+        self.events.register('guild_channel_delete', self.on_guild_channel_delete)
+        self.action_tracker = ActionTracker(config.ACTION_TRACKER_MAX_KEYS)
         
         self.default_thresholds = {
             'ban': {'count': 3, 'hours': 1},
@@ -27,67 +45,53 @@ class AntiNuke(commands.Cog):
             'sticker_create': {'count': 10, 'hours': 1},
             'sticker_delete': {'count': 5, 'hours': 1}
         }
-    
-    async def is_whitelisted(self, guild_id: int, user_id: int, user_roles: list) -> bool:
-        whitelist = await self.config_manager.get_antinuke_whitelist(guild_id)
-        
-        if user_id in whitelist.get('users', []):
-            return True
         
-        for role in user_roles:
-            if role.id in whitelist.get('roles', []):
-                return True
+        self.action_labels = {
+            'ban': ('Mass ban', 'bans'),
+            'kick': ('Mass kick', 'kicks'),
+            'role_create': ('Mass role creation', 'roles'),
+            'role_delete': ('Mass role deletion', 'roles'),
+            'channel_create': ('Mass channel creation', 'channels'),
+            'channel_delete': ('Mass channel deletion', 'channels'),
+            'webhook_create': ('Mass webhook creation', 'webhooks'),
+            'webhook_delete': ('Mass webhook deletion', 'webhooks'),
+            'emoji_create': ('Mass emoji creation', 'emojis'),
+            'emoji_delete': ('Mass emoji deletion', 'emojis'),
+            'sticker_create': ('Mass sticker creation', 'stickers'),
+            'sticker_delete': ('Mass sticker deletion', 'stickers')
+        }
         
-        return False
+        self.event_queues = {}
+        self.queue_workers = {}
+        self.punisher = PunishmentExecutor(config.PUNISHMENT_CONCURRENCY, config.PUNISHMENT_RESERVED)
+        self.punishing = set()
+        self.stripping = set()
+        self.danger_index = DangerousRoleIndex(config.DANGEROUS_PERMISSIONS)
+        self.rollback = RollbackEngine(config.ROLLBACK_CONCURRENCY, config.ROLLBACK_RETENTION, config.ROLLBACK_MAX_OBJECTS)
+        self.rollback_actions = {'role_delete', 'channel_delete', 'emoji_delete', 'webhook_delete'}
     
-    async def check_threshold(self, guild_id: int, user_id: int, action: str) -> bool:
-        thresholds = await self.config_manager.get_antinuke_thresholds(guild_id)
-        
-        if action not in thresholds:
-            if action in self.default_thresholds:
-                threshold_config = self.default_thresholds[action]
-            else:
-                return False
-        else:
-            threshold_config = thresholds[action]
-        
-        count_limit = threshold_config['count']
-        time_window = timedelta(hours=threshold_config['hours'])
-        
-        now = datetime.utcnow()
-        self.action_tracker[guild_id][f"{user_id}_{action}"] = [
-            t for t in self.action_tracker[guild_id][f"{user_id}_{action}"]
-            if now - t < time_window
-        ]
-        
-        self.action_tracker[guild_id][f"{user_id}_{action}"].append(now)
-        
-        action_count = len(self.action_tracker[guild_id][f"{user_id}_{action}"])
-        
-        return action_count >= count_limit
+        self.sweep_action_tracker.start()
+    
+    def cog_unload(self):
+        self.events.unregister(self)
+        self.sweep_action_tracker.cancel()
+        for worker in self.queue_workers.values():
+            worker.cancel()
+        self.punisher.close()
+    
+    @tasks.loop(seconds=config.ACTION_TRACKER_SWEEP_INTERVAL)
+    async def sweep_action_tracker(self):
+        self.action_tracker.sweep()
+    
+    async def is_whitelisted(self, guild_id: int, user_id: int, user_roles: list) -> bool:
+        users, roles = await self.config_manager.get_compiled_whitelist(guild_id)
+        return user_id in users or not roles.isdisjoint(role.id for role in user_roles)
     
-    async def get_action_count(self, guild_id: int, user_id: int, action: str) -> int:
+    async def get_threshold_config(self, guild_id: int, action: str) -> dict:
         thresholds = await self.config_manager.get_antinuke_thresholds(guild_id)
-        
-        if action not in thresholds:
-            if action in self.default_thresholds:
-                threshold_config = self.default_thresholds[action]
-            else:
-                return 0
-        else:
-            threshold_config = thresholds[action]
-        
-        time_window = timedelta(hours=threshold_config['hours'])
-        now = datetime.utcnow()
-        
-        self.action_tracker[guild_id][f"{user_id}_{action}"] = [
-            t for t in self.action_tracker[guild_id][f"{user_id}_{action}"]
-            if now - t < time_window
-        ]
-        
-        return len(self.action_tracker[guild_id][f"{user_id}_{action}"])
+        return thresholds.get(action, self.default_thresholds.get(action))
     
-    async def execute_punishment(self, guild: discord.Guild, member: discord.Member, action: str, reason: str, details: dict = None):
+    async def execute_punishment(self, guild: discord.Guild, member: discord.Member, reason: str):
         punishment_action = await self.config_manager.get_antinuke_action(guild.id)
         
         success = False
@@ -103,6 +107,9 @@ class AntiNuke(commands.Cog):
                 punishment_msg = "Banned"
             except Exception as e:
                 print(f"Error banning user: {e}")
+        elif punishment_action == 'strip':
+            success = await self.strip_user(guild, member, reason)
+            punishment_msg = "Stripped"
         elif punishment_action == 'kick':
             try:
                 await guild.kick(member, reason=f"Anti-nuke: {reason}")
@@ -111,20 +118,6 @@ class AntiNuke(commands.Cog):
             except Exception as e:
                 print(f"Error kicking user: {e}")
         
-        if success:
-            history_data = {
-                'timestamp': datetime.utcnow().isoformat(),
-                'action_type': action,
-                'user_id': member.id,
-                'user_name': str(member),
-                'punishment': punishment_msg,
-                'reason': reason
-            }
-            if details:
-                history_data['details'] = details
-            
-            await self.config_manager.add_antinuke_history(guild.id, history_data)
-        
         return success, punishment_msg
     
     async def jail_user(self, guild: discord.Guild, member: discord.Member, reason: str):
@@ -139,21 +132,112 @@ class AntiNuke(commands.Cog):
             return False
         
         try:
-            roles_to_remove = [r for r in member.roles if r != guild.default_role and r != jail_role]
-            await member.remove_roles(*roles_to_remove, reason=f"Anti-nuke jail: {reason}")
-            await member.add_roles(jail_role, reason=f"Anti-nuke jail: {reason}")
+            kept_roles = [r for r in member.roles if r.managed and r != jail_role]
+            await member.edit(roles=kept_roles + [jail_role], reason=f"Anti-nuke jail: {reason}")
             return True
         except Exception as e:
             print(f"Error jailing user: {e}")
             return False
     
-    async def log_antinuke_action(self, guild: discord.Guild, title: str, description: str, 
-                                   actor: discord.Member, action_type: str, threshold_info: dict = None):
-        channel_id = await self.config_manager.get_log_channel(guild.id, 'antinuke')
-        if not channel_id:
+    async def strip_user(self, guild: discord.Guild, member: discord.Member, reason: str):
+        dangerous = [r for r in self.danger_index.roles_for(member) if not r.managed and r < guild.me.top_role]
+        if not dangerous:
+            return False
+        
+        try:
+            kept_roles = [r for r in member.roles if not r.is_default() and r not in dangerous]
+            await member.edit(roles=kept_roles, reason=f"Anti-nuke strip: {reason}")
+            return True
+        except Exception as e:
+            print(f"Error stripping user: {e}")
+            return False
+    
+    async def preempt(self, guild: discord.Guild, member: discord.Member, action: str, reason: str,
+                      description: str, threshold_info: dict):
+        try:
+            stripped = await self.strip_user(guild, member, reason)
+        finally:
+            self.stripping.discard((guild.id, member.id))
+        
+        if stripped:
+            label, _ = self.action_labels[action]
+            self.punisher.submit(guild.id, PRIORITY_RECORD, functools.partial(
+                self.log_antinuke_action, guild,
+                f"{label.title()} Suspected - Permissions Stripped",
+                f"{description}\n**Punishment:** Dangerous roles removed",
+                member,
+                action,
+                threshold_info
+            ))
+    
+    async def punish(self, guild: discord.Guild, member: discord.Member, action: str, entry: discord.AuditLogEntry,
+                     reason: str, description: str, details: dict, threshold_info: dict):
+        try:
+            success, punishment = await self.execute_punishment(guild, member, reason)
+        finally:
+            self.punishing.discard((guild.id, member.id))
+        
+        if await self.config_manager.get_antinuke_rollback(guild.id):
+            self.punisher.submit(guild.id, PRIORITY_ROLLBACK, functools.partial(
+                self.restore_deleted, guild, member, reason
+            ))
+        
+        if not success:
             return
         
-        log_channel = guild.get_channel(channel_id)
+        neutralized_in = (discord.utils.utcnow() - entry.created_at).total_seconds()
+        self.punisher.submit(guild.id, PRIORITY_RECORD, functools.partial(
+            self.record_punishment, guild, member, action, reason, punishment,
+            description, details, threshold_info, neutralized_in
+        ))
+    
+    async def restore_deleted(self, guild: discord.Guild, member: discord.Member, reason: str):
+        started = asyncio.get_running_loop().time()
+        counts = await self.rollback.restore(guild, member.id, f"Anti-nuke rollback: {reason}")
+        if not any(counts.values()):
+            return
+        
+        elapsed = asyncio.get_running_loop().time() - started
+        await self.log_antinuke_action(
+            guild,
+            "Rollback Complete",
+            f"**Restored:** {counts['channel']} channel(s), {counts['role']} role(s), "
+            f"{counts['emoji']} emoji(s), {counts['webhook']} webhook(s)\n"
+            f"**Restore time:** {elapsed:.2f}s",
+            member,
+            'rollback'
+        )
+    
+    async def record_punishment(self, guild: discord.Guild, member: discord.Member, action: str, reason: str,
+                                punishment: str, description: str, details: dict, threshold_info: dict,
+                                neutralized_in: float):
+        history_data = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'action_type': action,
+            'user_id': member.id,
+            'user_name': str(member),
+            'punishment': punishment,
+            'reason': reason,
+            'neutralized_in': round(neutralized_in, 3)
+        }
+        if details:
+            history_data['details'] = details
+        
+        await self.config_manager.add_antinuke_history(guild.id, history_data)
+        
+        label, _ = self.action_labels[action]
+        await self.log_antinuke_action(
+            guild,
+            f"{label.title()} Detected - Action Taken",
+            f"{description}\n**Punishment:** {punishment}\n**Neutralized in:** {neutralized_in:.2f}s",
+            member,
+            action,
+            threshold_info
+        )
+    
+    async def log_antinuke_action(self, guild: discord.Guild, title: str, description: str, 
+                                   actor: discord.Member, action_type: str, threshold_info: dict = None):
+        log_channel = await self.log_sink.resolve(guild, 'antinuke')
         if not log_channel:
             return
         
@@ -182,577 +266,232 @@ class AntiNuke(commands.Cog):
                 inline=False
             )
         
+        self.log_sink.submit(log_channel, embed)
+    
+    def enqueue(self, guild: discord.Guild, action: str, entry: discord.AuditLogEntry, description: str, details: dict):
+        queue = self.event_queues.get(guild.id)
+        if queue is None:
+            queue = self.event_queues[guild.id] = asyncio.Queue()
+            self.queue_workers[guild.id] = asyncio.create_task(self.process_queue(guild.id, queue))
+        queue.put_nowait((guild, action, entry, description, details))
+    
+    async def process_queue(self, guild_id: int, queue: asyncio.Queue):
+        # Exits as soon as the queue is drained; enqueue starts a new worker
+        # for the next event, so idle guilds hold no task or queue.
+        while not queue.empty():
+            guild, action, entry, description, details = queue.get_nowait()
+            try:
+                await self.handle_action(guild, action, entry, description, details)
+            except Exception as e:
+                print(f"Error handling anti-nuke {action}: {e}")
+            finally:
+                queue.task_done()
+        
+        if self.event_queues.get(guild_id) is queue:
+            del self.event_queues[guild_id]
+            del self.queue_workers[guild_id]
+    
+    async def correlate(self, guild: discord.Guild, action: str, target_id: int, description: str, details: dict,
+                        event: EventContext = None):
         try:
-            await log_channel.send(embed=embed)
+            audit_action = getattr(discord.AuditLogAction, action)
+            if event:
+                entry = await event.audit_entry(audit_action, target_id)
+            else:
+                entry = await self.audit_logs.find(guild, audit_action, target_id)
+            if entry:
+                self.enqueue(guild, action, entry, description, details)
         except Exception as e:
-            print(f"Error sending antinuke log: {e}")
+            print(f"Error correlating anti-nuke {action}: {e}")
+    
+    async def handle_action(self, guild: discord.Guild, action: str, entry: discord.AuditLogEntry, description: str, details: dict):
+        executor = entry.user
+        if executor is None or executor.bot:
+            return
+        
+        executor_member = await get_or_fetch_member(guild, executor.id)
+        if not executor_member:
+            return
+        
+        if await self.is_whitelisted(guild.id, executor.id, executor_member.roles):
+            return
+        
+        if action in self.rollback_actions and entry.target is not None:
+            self.rollback.attribute(guild.id, entry.target.id, executor.id)
+        
+        threshold_config = await self.get_threshold_config(guild.id, action)
+        action_count = self.action_tracker.hit((guild.id, executor.id, action), threshold_config['hours'] * 3600)
+        if action_count < threshold_config['count']:
+            if action_count == threshold_config['count'] - 1:
+                await self.preempt_strip(guild, executor_member, action, action_count, threshold_config, description)
+            return
+        
+        if action in ('ban', 'kick'):
+            details['reason'] = entry.reason
+            description += f"\n**Audit reason:** {entry.reason or 'No reason'}"
+        
+        key = (guild.id, executor.id)
+        if key in self.punishing:
+            return
+        self.punishing.add(key)
+        
+        label, unit = self.action_labels[action]
+        self.punisher.submit(guild.id, PRIORITY_PUNISH, functools.partial(
+            self.punish, guild, executor_member, action, entry,
+            f"{label} detected - {action_count} {unit} in {threshold_config['hours']} hour(s)",
+            description,
+            details,
+            {
+                'count': action_count,
+                'limit': threshold_config['count'],
+                'hours': threshold_config['hours']
+            }
+        ))
+    
+    async def preempt_strip(self, guild: discord.Guild, member: discord.Member, action: str, action_count: int,
+                            threshold_config: dict, description: str):
+        key = (guild.id, member.id)
+        if key in self.stripping or key in self.punishing:
+            return
+        if not await self.config_manager.get_antinuke_preempt(guild.id):
+            return
+        self.stripping.add(key)
+        
+        label, unit = self.action_labels[action]
+        self.punisher.submit(guild.id, PRIORITY_PUNISH, functools.partial(
+            self.preempt, guild, member, action,
+            f"{label} suspected - {action_count} {unit} in {threshold_config['hours']} hour(s)",
+            description,
+            {
+                'count': action_count,
+                'limit': threshold_config['count'],
+                'hours': threshold_config['hours']
+            }
+        ))
     
     @commands.Cog.listener()
     async def on_member_ban(self, guild, user):
-        try:
-            await asyncio.sleep(1)
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.ban):
-                if entry.target.id == user.id:
-                    executor = entry.user
-                    
-                    if executor.bot:
-                        return
-                    
-                    member = guild.get_member(executor.id)
-                    if not member:
-                        return
-                    
-                    if await self.is_whitelisted(guild.id, executor.id, member.roles):
-                        return
-                    
-                    thresholds = await self.config_manager.get_antinuke_thresholds(guild.id)
-                    threshold_config = thresholds.get('ban', self.default_thresholds['ban'])
-                    
-                    if await self.check_threshold(guild.id, executor.id, 'ban'):
-                        action_count = await self.get_action_count(guild.id, executor.id, 'ban')
-                        success, punishment = await self.execute_punishment(
-                            guild, member, 'ban',
-                            f"Mass ban detected - {action_count} bans in {threshold_config['hours']} hour(s)",
-                            {'target': str(user), 'reason': entry.reason}
-                        )
-                        
-                        if success:
-                            await self.log_antinuke_action(
-                                guild,
-                                "Mass Ban Detected - Action Taken",
-                                f"**Target banned:** {user.name}#{user.discriminator} ({user.id})\n"
-                                f"**Audit reason:** {entry.reason or 'No reason'}\n"
-                                f"**Punishment:** {punishment}",
-                                member,
-                                'ban',
-                                {
-                                    'count': action_count,
-                                    'limit': threshold_config['count'],
-                                    'hours': threshold_config['hours']
-                                }
-                            )
-                    break
-        except Exception as e:
-            print(f"Error in on_member_ban: {e}")
+        await self.correlate(
+            guild, 'ban', user.id,
+            f"**Target banned:** {user.name}#{user.discriminator} ({user.id})",
+            {'target': str(user)}
+        )
     
-    @commands.Cog.listener()
-    async def on_member_remove(self, member):
-        try:
-            await asyncio.sleep(1)
-            async for entry in member.guild.audit_logs(limit=1, action=discord.AuditLogAction.kick):
-                if entry.target.id == member.id:
-                    executor = entry.user
-                    
-                    if executor.bot:
-                        return
-                    
-                    executor_member = member.guild.get_member(executor.id)
-                    if not executor_member:
-                        return
-                    
-                    if await self.is_whitelisted(member.guild.id, executor.id, executor_member.roles):
-                        return
-                    
-                    thresholds = await self.config_manager.get_antinuke_thresholds(member.guild.id)
-                    threshold_config = thresholds.get('kick', self.default_thresholds['kick'])
-                    
-                    if await self.check_threshold(member.guild.id, executor.id, 'kick'):
-                        action_count = await self.get_action_count(member.guild.id, executor.id, 'kick')
-                        success, punishment = await self.execute_punishment(
-                            member.guild, executor_member, 'kick',
-                            f"Mass kick detected - {action_count} kicks in {threshold_config['hours']} hour(s)",
-                            {'target': str(member), 'reason': entry.reason}
-                        )
-                        
-                        if success:
-                            await self.log_antinuke_action(
-                                member.guild,
-                                "Mass Kick Detected - Action Taken",
-                                f"**Target kicked:** {member.name}#{member.discriminator} ({member.id})\n"
-                                f"**Audit reason:** {entry.reason or 'No reason'}\n"
-                                f"**Punishment:** {punishment}",
-                                executor_member,
-                                'kick',
-                                {
-                                    'count': action_count,
-                                    'limit': threshold_config['count'],
-                                    'hours': threshold_config['hours']
-                                }
-                            )
-                    break
-        except Exception as e:
-            print(f"Error in on_member_remove: {e}")
+    async def on_member_remove(self, event: EventContext, user):
+        await self.correlate(
+            event.guild, 'kick', user.id,
+            f"**Target kicked:** {user.name}#{user.discriminator} ({user.id})",
+            {'target': str(user)},
+            event
+        )
     
-    @commands.Cog.listener()
-    async def on_guild_role_create(self, role):
-        try:
-            await asyncio.sleep(1)
-            async for entry in role.guild.audit_logs(limit=1, action=discord.AuditLogAction.role_create):
-                if entry.target.id == role.id:
-                    executor = entry.user
-                    
-                    if executor.bot:
-                        return
-                    
-                    executor_member = role.guild.get_member(executor.id)
-                    if not executor_member:
-                        return
-                    
-                    if await self.is_whitelisted(role.guild.id, executor.id, executor_member.roles):
-                        return
-                    
-                    thresholds = await self.config_manager.get_antinuke_thresholds(role.guild.id)
-                    threshold_config = thresholds.get('role_create', self.default_thresholds['role_create'])
-                    
-                    if await self.check_threshold(role.guild.id, executor.id, 'role_create'):
-                        action_count = await self.get_action_count(role.guild.id, executor.id, 'role_create')
-                        success, punishment = await self.execute_punishment(
-                            role.guild, executor_member, 'role_create',
-                            f"Mass role creation detected - {action_count} roles in {threshold_config['hours']} hour(s)",
-                            {'role_name': role.name, 'role_id': role.id}
-                        )
-                        
-                        if success:
-                            await self.log_antinuke_action(
-                                role.guild,
-                                "Mass Role Creation Detected - Action Taken",
-                                f"**Role created:** {role.name} ({role.id})\n"
-                                f"**Punishment:** {punishment}",
-                                executor_member,
-                                'role_create',
-                                {
-                                    'count': action_count,
-                                    'limit': threshold_config['count'],
-                                    'hours': threshold_config['hours']
-                                }
-                            )
-                    break
-        except Exception as e:
-            print(f"Error in on_guild_role_create: {e}")
+    async def on_guild_role_create(self, event: EventContext, role):
+        self.danger_index.update(role)
+        await self.correlate(
+            role.guild, 'role_create', role.id,
+            f"**Role created:** {role.name} ({role.id})",
+            {'role_name': role.name, 'role_id': role.id},
+            event
+        )
     
     @commands.Cog.listener()
     async def on_guild_role_delete(self, role):
-        try:
-            await asyncio.sleep(1)
-            async for entry in role.guild.audit_logs(limit=1, action=discord.AuditLogAction.role_delete):
-                if entry.target.id == role.id:
-                    executor = entry.user
-                    
-                    if executor.bot:
-                        return
-                    
-                    executor_member = role.guild.get_member(executor.id)
-                    if not executor_member:
-                        return
-                    
-                    if await self.is_whitelisted(role.guild.id, executor.id, executor_member.roles):
-                        return
-                    
-                    thresholds = await self.config_manager.get_antinuke_thresholds(role.guild.id)
-                    threshold_config = thresholds.get('role_delete', self.default_thresholds['role_delete'])
-                    
-                    if await self.check_threshold(role.guild.id, executor.id, 'role_delete'):
-                        action_count = await self.get_action_count(role.guild.id, executor.id, 'role_delete')
-                        success, punishment = await self.execute_punishment(
-                            role.guild, executor_member, 'role_delete',
-                            f"Mass role deletion detected - {action_count} roles in {threshold_config['hours']} hour(s)",
-                            {'role_name': role.name, 'role_id': role.id}
-                        )
-                        
-                        if success:
-                            await self.log_antinuke_action(
-                                role.guild,
-                                "Mass Role Deletion Detected - Action Taken",
-                                f"**Role deleted:** {role.name} ({role.id})\n"
-                                f"**Punishment:** {punishment}",
-                                executor_member,
-                                'role_delete',
-                                {
-                                    'count': action_count,
-                                    'limit': threshold_config['count'],
-                                    'hours': threshold_config['hours']
-                                }
-                            )
-                    break
-        except Exception as e:
-            print(f"Error in on_guild_role_delete: {e}")
+        self.danger_index.remove(role)
+        self.rollback.capture_role(role)
+        await self.correlate(
+            role.guild, 'role_delete', role.id,
+            f"**Role deleted:** {role.name} ({role.id})",
+            {'role_name': role.name, 'role_id': role.id}
+        )
+    
+    async def on_guild_role_update(self, event: EventContext, before, after):
+        if before.permissions != after.permissions:
+            self.danger_index.update(after)
     
     @commands.Cog.listener()
-    async def on_guild_channel_create(self, channel):
-        try:
-            await asyncio.sleep(1)
-            async for entry in channel.guild.audit_logs(limit=1, action=discord.AuditLogAction.channel_create):
-                if entry.target.id == channel.id:
-                    executor = entry.user
-                    
-                    if executor.bot:
-                        return
-                    
-                    executor_member = channel.guild.get_member(executor.id)
-                    if not executor_member:
-                        return
-                    
-                    if await self.is_whitelisted(channel.guild.id, executor.id, executor_member.roles):
-                        return
-                    
-                    thresholds = await self.config_manager.get_antinuke_thresholds(channel.guild.id)
-                    threshold_config = thresholds.get('channel_create', self.default_thresholds['channel_create'])
-                    
-                    if await self.check_threshold(channel.guild.id, executor.id, 'channel_create'):
-                        action_count = await self.get_action_count(channel.guild.id, executor.id, 'channel_create')
-                        success, punishment = await self.execute_punishment(
-                            channel.guild, executor_member, 'channel_create',
-                            f"Mass channel creation detected - {action_count} channels in {threshold_config['hours']} hour(s)",
-                            {'channel_name': channel.name, 'channel_id': channel.id, 'channel_type': str(channel.type)}
-                        )
-                        
-                        if success:
-                            await self.log_antinuke_action(
-                                channel.guild,
-                                "Mass Channel Creation Detected - Action Taken",
-                                f"**Channel created:** {channel.name} ({channel.id})\n"
-                                f"**Channel type:** {channel.type}\n"
-                                f"**Punishment:** {punishment}",
-                                executor_member,
-                                'channel_create',
-                                {
-                                    'count': action_count,
-                                    'limit': threshold_config['count'],
-                                    'hours': threshold_config['hours']
-                                }
-                            )
-                    break
-        except Exception as e:
-            print(f"Error in on_guild_channel_create: {e}")
+    async def on_guild_remove(self, guild):
+        self.danger_index.forget(guild.id)
     
     @commands.Cog.listener()
-    async def on_guild_channel_delete(self, channel):
-        try:
-            await asyncio.sleep(1)
-            async for entry in channel.guild.audit_logs(limit=1, action=discord.AuditLogAction.channel_delete):
-                if entry.target.id == channel.id:
-                    executor = entry.user
-                    
-                    if executor.bot:
-                        return
-                    
-                    executor_member = channel.guild.get_member(executor.id)
-                    if not executor_member:
-                        return
-                    
-                    if await self.is_whitelisted(channel.guild.id, executor.id, executor_member.roles):
-                        return
-                    
-                    thresholds = await self.config_manager.get_antinuke_thresholds(channel.guild.id)
-                    threshold_config = thresholds.get('channel_delete', self.default_thresholds['channel_delete'])
-                    
-                    if await self.check_threshold(channel.guild.id, executor.id, 'channel_delete'):
-                        action_count = await self.get_action_count(channel.guild.id, executor.id, 'channel_delete')
-                        success, punishment = await self.execute_punishment(
-                            channel.guild, executor_member, 'channel_delete',
-                            f"Mass channel deletion detected - {action_count} channels in {threshold_config['hours']} hour(s)",
-                            {'channel_name': channel.name, 'channel_id': channel.id, 'channel_type': str(channel.type)}
-                        )
-                        
-                        if success:
-                            await self.log_antinuke_action(
-                                channel.guild,
-                                "Mass Channel Deletion Detected - Action Taken",
-                                f"**Channel deleted:** {channel.name} ({channel.id})\n"
-                                f"**Channel type:** {channel.type}\n"
-                                f"**Punishment:** {punishment}",
-                                executor_member,
-                                'channel_delete',
-                                {
-                                    'count': action_count,
-                                    'limit': threshold_config['count'],
-                                    'hours': threshold_config['hours']
-                                }
-                            )
-                    break
-        except Exception as e:
-            print(f"Error in on_guild_channel_delete: {e}")
+    async def on_guild_channel_create(self, channel):
+        await self.correlate(
+            channel.guild, 'channel_create', channel.id,
+            f"**Channel created:** {channel.name} ({channel.id})\n**Channel type:** {channel.type}",
+            {'channel_name': channel.name, 'channel_id': channel.id, 'channel_type': str(channel.type)}
+        )
+    
+    async def on_guild_channel_delete(self, event: EventContext, channel):
+        self.rollback.capture_channel(channel)
+        await self.correlate(
+            channel.guild, 'channel_delete', channel.id,
+            f"**Channel deleted:** {channel.name} ({channel.id})\n**Channel type:** {channel.type}",
+            {'channel_name': channel.name, 'channel_id': channel.id, 'channel_type': str(channel.type)},
+            event
+        )
     
     @commands.Cog.listener()
-    async def on_webhooks_update(self, channel):
-        try:
-            await asyncio.sleep(1)
-            
-            async for entry in channel.guild.audit_logs(limit=5, action=discord.AuditLogAction.webhook_create):
-                executor = entry.user
-                
-                if executor.bot:
-                    continue
-                
-                executor_member = channel.guild.get_member(executor.id)
-                if not executor_member:
-                    continue
-                
-                if await self.is_whitelisted(channel.guild.id, executor.id, executor_member.roles):
-                    continue
-                
-                thresholds = await self.config_manager.get_antinuke_thresholds(channel.guild.id)
-                threshold_config = thresholds.get('webhook_create', self.default_thresholds['webhook_create'])
-                
-                if await self.check_threshold(channel.guild.id, executor.id, 'webhook_create'):
-                    action_count = await self.get_action_count(channel.guild.id, executor.id, 'webhook_create')
-                    success, punishment = await self.execute_punishment(
-                        channel.guild, executor_member, 'webhook_create',
-                        f"Mass webhook creation detected - {action_count} webhooks in {threshold_config['hours']} hour(s)",
-                        {'channel_name': channel.name, 'channel_id': channel.id}
-                    )
-                    
-                    if success:
-                        await self.log_antinuke_action(
-                            channel.guild,
-                            "Mass Webhook Creation Detected - Action Taken",
-                            f"**Channel:** {channel.mention} ({channel.id})\n"
-                            f"**Punishment:** {punishment}",
-                            executor_member,
-                            'webhook_create',
-                            {
-                                'count': action_count,
-                                'limit': threshold_config['count'],
-                                'hours': threshold_config['hours']
-                            }
-                        )
-                break
-            
-            async for entry in channel.guild.audit_logs(limit=5, action=discord.AuditLogAction.webhook_delete):
-                executor = entry.user
-                
-                if executor.bot:
-                    continue
-                
-                executor_member = channel.guild.get_member(executor.id)
-                if not executor_member:
-                    continue
-                
-                if await self.is_whitelisted(channel.guild.id, executor.id, executor_member.roles):
-                    continue
-                
-                thresholds = await self.config_manager.get_antinuke_thresholds(channel.guild.id)
-                threshold_config = thresholds.get('webhook_delete', self.default_thresholds['webhook_delete'])
-                
-                if await self.check_threshold(channel.guild.id, executor.id, 'webhook_delete'):
-                    action_count = await self.get_action_count(channel.guild.id, executor.id, 'webhook_delete')
-                    success, punishment = await self.execute_punishment(
-                        channel.guild, executor_member, 'webhook_delete',
-                        f"Mass webhook deletion detected - {action_count} webhooks in {threshold_config['hours']} hour(s)",
-                        {'channel_name': channel.name, 'channel_id': channel.id}
-                    )
-                    
-                    if success:
-                        await self.log_antinuke_action(
-                            channel.guild,
-                            "Mass Webhook Deletion Detected - Action Taken",
-                            f"**Channel:** {channel.mention} ({channel.id})\n"
-                            f"**Punishment:** {punishment}",
-                            executor_member,
-                            'webhook_delete',
-                            {
-                                'count': action_count,
-                                'limit': threshold_config['count'],
-                                'hours': threshold_config['hours']
-                            }
-                        )
-                break
-        except Exception as e:
-            print(f"Error in on_webhooks_update: {e}")
+    async def on_audit_log_entry_create(self, entry):
+        # on_webhooks_update does not say which webhook changed, so there is
+        # nothing to correlate; webhook actions are taken from the audit push.
+        if entry.action == discord.AuditLogAction.webhook_create:
+            action, channel = 'webhook_create', getattr(entry.after, 'channel', None)
+        elif entry.action == discord.AuditLogAction.webhook_delete:
+            action, channel = 'webhook_delete', getattr(entry.before, 'channel', None)
+            self.rollback.capture_webhook(entry)
+        else:
+            return
+        
+        channel_id = channel.id if channel else None
+        self.enqueue(
+            entry.guild, action, entry,
+            f"**Channel:** <#{channel_id}> ({channel_id})",
+            {'channel_name': getattr(channel, 'name', None), 'channel_id': channel_id}
+        )
     
     @commands.Cog.listener()
     async def on_guild_emojis_update(self, guild, before, after):
-        try:
-            await asyncio.sleep(1)
-            
-            before_ids = {emoji.id for emoji in before}
-            after_ids = {emoji.id for emoji in after}
-            
-            created = after_ids - before_ids
-            deleted = before_ids - after_ids
-            
-            if created:
-                async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.emoji_create):
-                    if entry.target.id in created:
-                        executor = entry.user
-                        
-                        if executor.bot:
-                            return
-                        
-                        executor_member = guild.get_member(executor.id)
-                        if not executor_member:
-                            return
-                        
-                        if await self.is_whitelisted(guild.id, executor.id, executor_member.roles):
-                            return
-                        
-                        thresholds = await self.config_manager.get_antinuke_thresholds(guild.id)
-                        threshold_config = thresholds.get('emoji_create', self.default_thresholds['emoji_create'])
-                        
-                        if await self.check_threshold(guild.id, executor.id, 'emoji_create'):
-                            action_count = await self.get_action_count(guild.id, executor.id, 'emoji_create')
-                            success, punishment = await self.execute_punishment(
-                                guild, executor_member, 'emoji_create',
-                                f"Mass emoji creation detected - {action_count} emojis in {threshold_config['hours']} hour(s)",
-                                {'emoji_name': entry.target.name, 'emoji_id': entry.target.id}
-                            )
-                            
-                            if success:
-                                await self.log_antinuke_action(
-                                    guild,
-                                    "Mass Emoji Creation Detected - Action Taken",
-                                    f"**Emoji created:** {entry.target.name} ({entry.target.id})\n"
-                                    f"**Punishment:** {punishment}",
-                                    executor_member,
-                                    'emoji_create',
-                                    {
-                                        'count': action_count,
-                                        'limit': threshold_config['count'],
-                                        'hours': threshold_config['hours']
-                                    }
-                                )
-                        break
-            
-            if deleted:
-                async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.emoji_delete):
-                    if entry.target.id in deleted:
-                        executor = entry.user
-                        
-                        if executor.bot:
-                            return
-                        
-                        executor_member = guild.get_member(executor.id)
-                        if not executor_member:
-                            return
-                        
-                        if await self.is_whitelisted(guild.id, executor.id, executor_member.roles):
-                            return
-                        
-                        thresholds = await self.config_manager.get_antinuke_thresholds(guild.id)
-                        threshold_config = thresholds.get('emoji_delete', self.default_thresholds['emoji_delete'])
-                        
-                        if await self.check_threshold(guild.id, executor.id, 'emoji_delete'):
-                            action_count = await self.get_action_count(guild.id, executor.id, 'emoji_delete')
-                            success, punishment = await self.execute_punishment(
-                                guild, executor_member, 'emoji_delete',
-                                f"Mass emoji deletion detected - {action_count} emojis in {threshold_config['hours']} hour(s)",
-                                {'emoji_name': entry.target.name, 'emoji_id': entry.target.id}
-                            )
-                            
-                            if success:
-                                await self.log_antinuke_action(
-                                    guild,
-                                    "Mass Emoji Deletion Detected - Action Taken",
-                                    f"**Emoji deleted:** {entry.target.name} ({entry.target.id})\n"
-                                    f"**Punishment:** {punishment}",
-                                    executor_member,
-                                    'emoji_delete',
-                                    {
-                                        'count': action_count,
-                                        'limit': threshold_config['count'],
-                                        'hours': threshold_config['hours']
-                                    }
-                                )
-                        break
-        except Exception as e:
-            print(f"Error in on_guild_emojis_update: {e}")
+        before_emojis = {emoji.id: emoji for emoji in before}
+        after_emojis = {emoji.id: emoji for emoji in after}
+        
+        tasks = []
+        for emoji_id in after_emojis.keys() - before_emojis.keys():
+            emoji = after_emojis[emoji_id]
+            tasks.append(self.correlate(
+                guild, 'emoji_create', emoji_id,
+                f"**Emoji created:** {emoji.name} ({emoji_id})",
+                {'emoji_name': emoji.name, 'emoji_id': emoji_id}
+            ))
+        for emoji_id in before_emojis.keys() - after_emojis.keys():
+            emoji = before_emojis[emoji_id]
+            self.rollback.capture_emoji(emoji)
+            tasks.append(self.correlate(
+                guild, 'emoji_delete', emoji_id,
+                f"**Emoji deleted:** {emoji.name} ({emoji_id})",
+                {'emoji_name': emoji.name, 'emoji_id': emoji_id}
+            ))
+        await asyncio.gather(*tasks)
     
     @commands.Cog.listener()
     async def on_guild_stickers_update(self, guild, before, after):
-        try:
-            await asyncio.sleep(1)
-            
-            before_ids = {sticker.id for sticker in before}
-            after_ids = {sticker.id for sticker in after}
-            
-            created = after_ids - before_ids
-            deleted = before_ids - after_ids
-            
-            if created:
-                async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.sticker_create):
-                    if entry.target.id in created:
-                        executor = entry.user
-                        
-                        if executor.bot:
-                            return
-                        
-                        executor_member = guild.get_member(executor.id)
-                        if not executor_member:
-                            return
-                        
-                        if await self.is_whitelisted(guild.id, executor.id, executor_member.roles):
-                            return
-                        
-                        thresholds = await self.config_manager.get_antinuke_thresholds(guild.id)
-                        threshold_config = thresholds.get('sticker_create', self.default_thresholds['sticker_create'])
-                        
-                        if await self.check_threshold(guild.id, executor.id, 'sticker_create'):
-                            action_count = await self.get_action_count(guild.id, executor.id, 'sticker_create')
-                            success, punishment = await self.execute_punishment(
-                                guild, executor_member, 'sticker_create',
-                                f"Mass sticker creation detected - {action_count} stickers in {threshold_config['hours']} hour(s)",
-                                {'sticker_name': entry.target.name, 'sticker_id': entry.target.id}
-                            )
-                            
-                            if success:
-                                await self.log_antinuke_action(
-                                    guild,
-                                    "Mass Sticker Creation Detected - Action Taken",
-                                    f"**Sticker created:** {entry.target.name} ({entry.target.id})\n"
-                                    f"**Punishment:** {punishment}",
-                                    executor_member,
-                                    'sticker_create',
-                                    {
-                                        'count': action_count,
-                                        'limit': threshold_config['count'],
-                                        'hours': threshold_config['hours']
-                                    }
-                                )
-                        break
-            
-            if deleted:
-                async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.sticker_delete):
-                    if entry.target.id in deleted:
-                        executor = entry.user
-                        
-                        if executor.bot:
-                            return
-                        
-                        executor_member = guild.get_member(executor.id)
-                        if not executor_member:
-                            return
-                        
-                        if await self.is_whitelisted(guild.id, executor.id, executor_member.roles):
-                            return
-                        
-                        thresholds = await self.config_manager.get_antinuke_thresholds(guild.id)
-                        threshold_config = thresholds.get('sticker_delete', self.default_thresholds['sticker_delete'])
-                        
-                        if await self.check_threshold(guild.id, executor.id, 'sticker_delete'):
-                            action_count = await self.get_action_count(guild.id, executor.id, 'sticker_delete')
-                            success, punishment = await self.execute_punishment(
-                                guild, executor_member, 'sticker_delete',
-                                f"Mass sticker deletion detected - {action_count} stickers in {threshold_config['hours']} hour(s)",
-                                {'sticker_name': entry.target.name, 'sticker_id': entry.target.id}
-                            )
-                            
-                            if success:
-                                await self.log_antinuke_action(
-                                    guild,
-                                    "Mass Sticker Deletion Detected - Action Taken",
-                                    f"**Sticker deleted:** {entry.target.name} ({entry.target.id})\n"
-                                    f"**Punishment:** {punishment}",
-                                    executor_member,
-                                    'sticker_delete',
-                                    {
-                                        'count': action_count,
-                                        'limit': threshold_config['count'],
-                                        'hours': threshold_config['hours']
-                                    }
-                                )
-                        break
-        except Exception as e:
-            print(f"Error in on_guild_stickers_update: {e}")
+        before_stickers = {sticker.id: sticker for sticker in before}
+        after_stickers = {sticker.id: sticker for sticker in after}
+        
+        tasks = []
+        for sticker_id in after_stickers.keys() - before_stickers.keys():
+            sticker = after_stickers[sticker_id]
+            tasks.append(self.correlate(
+                guild, 'sticker_create', sticker_id,
+                f"**Sticker created:** {sticker.name} ({sticker_id})",
+                {'sticker_name': sticker.name, 'sticker_id': sticker_id}
+            ))
+        for sticker_id in before_stickers.keys() - after_stickers.keys():
+            sticker = before_stickers[sticker_id]
+            tasks.append(self.correlate(
+                guild, 'sticker_delete', sticker_id,
+                f"**Sticker deleted:** {sticker.name} ({sticker_id})",
+                {'sticker_name': sticker.name, 'sticker_id': sticker_id}
+            ))
+        await asyncio.gather(*tasks)
     
     @commands.group(name='antinuke', invoke_without_command=True)
     @is_owner()
@@ -770,7 +509,9 @@ class AntiNuke(commands.Cog):
                   "`.antinuke whitelist add <@user/@role>` - Whitelist\n"
                   "`.antinuke whitelist remove <@user/@role>` - Remove whitelist\n"
                   "`.antinuke whitelist view` - View whitelist\n"
-                  "`.antinuke action <ban|kick|jail>` - Set punishment\n"
+                  "`.antinuke action <ban|kick|jail|strip>` - Set punishment\n"
+                  "`.antinuke preempt <on|off>` - Strip dangerous roles one action before the threshold\n"
+                  "`.antinuke rollback <on|off>` - Restore deleted channels, roles, emojis and webhooks\n"
                   "`.antinuke history` - View action history",
             inline=False
         )
@@ -856,8 +597,8 @@ class AntiNuke(commands.Cog):
     @is_owner()
     async def set_action(self, ctx, action: str):
         action = action.lower()
-        if action not in ['ban', 'kick', 'jail']:
-            await ctx.send("❌ Invalid action. Valid options: `ban`, `kick`, `jail`")
+        if action not in ['ban', 'kick', 'jail', 'strip']:
+            await ctx.send("❌ Invalid action. Valid options: `ban`, `kick`, `jail`, `strip`")
             return
         
         await self.config_manager.set_antinuke_action(ctx.guild.id, action)
@@ -869,6 +610,40 @@ class AntiNuke(commands.Cog):
         )
         await ctx.send(embed=embed)
     
+    @antinuke.command(name='preempt')
+    @is_owner()
+    async def set_preempt(self, ctx, state: str):
+        state = state.lower()
+        if state not in ['on', 'off']:
+            await ctx.send("❌ Invalid state. Valid options: `on`, `off`")
+            return
+        
+        await self.config_manager.set_antinuke_preempt(ctx.guild.id, state == 'on')
+        
+        embed = discord.Embed(
+            title="✅ Pre-emptive Strip Updated",
+            description=f"Anti-nuke will {'now' if state == 'on' else 'no longer'} strip dangerous roles one action before a threshold is reached",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+    
+    @antinuke.command(name='rollback')
+    @is_owner()
+    async def set_rollback(self, ctx, state: str):
+        state = state.lower()
+        if state not in ['on', 'off']:
+            await ctx.send("❌ Invalid state. Valid options: `on`, `off`")
+            return
+        
+        await self.config_manager.set_antinuke_rollback(ctx.guild.id, state == 'on')
+        
+        embed = discord.Embed(
+            title="✅ Rollback Updated",
+            description=f"Anti-nuke will {'now' if state == 'on' else 'no longer'} restore objects deleted by punished offenders",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+    
     @antinuke.command(name='history')
     @is_owner()
     async def view_history(self, ctx):
@@ -903,6 +678,26 @@ class AntiNuke(commands.Cog):
         
         await ctx.send(embed=embed)
     
+    @antinuke.command(name='memory')
+    @is_bot_owner()
+    async def tracker_memory(self, ctx):
+        stats = self.action_tracker.stats()
+        
+        embed = discord.Embed(
+            title="Anti-Nuke Tracker Memory",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Tracked Keys", value=f"`{stats['keys']:,}` / `{stats['max_keys']:,}`", inline=True)
+        embed.add_field(name="Timestamps Held", value=f"`{stats['timestamps']:,}`", inline=True)
+        embed.add_field(name="Longest Window", value=f"`{stats['longest_window'] / 3600:g}h`", inline=True)
+        embed.add_field(name="Swept (expired)", value=f"`{stats['swept']:,}`", inline=True)
+        embed.add_field(name="Evicted (cap)", value=f"`{stats['evicted']:,}`", inline=True)
+        embed.add_field(name="Guild Queues", value=f"`{len(self.event_queues)}`", inline=True)
+        embed.add_field(name="Pending Punishment Jobs", value=f"`{self.punisher.pending():,}` (`{self.punisher.running():,}` running)", inline=True)
+        embed.add_field(name="Deleted Objects Held", value=f"`{self.rollback.pending():,}`", inline=True)
+        
+        await ctx.send(embed=embed)
+    
     @commands.group(name='whitelist', invoke_without_command=True)
     @is_owner()
     async def whitelist(self, ctx):
@@ -1,29 +1,30 @@
 import discord
 from discord.ext import commands
 from utils.config_manager import ConfigManager
+from utils.dispatch import EventContext, EventDispatcher
 from utils.formatting import create_log_embed, paginate_list
 from utils.checks import is_admin
 import config
 from datetime import datetime
 
+INTENTS = discord.Intents(guilds=True, members=True)
+
 
 class Boosters(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config_manager = ConfigManager()
+        self.events = EventDispatcher()
+        self.events.register('member_update', self.on_member_update)
+    
+    def cog_unload(self):
+        self.events.unregister(self)
     
     async def get_booster_data(self, guild_id: int) -> dict:
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.BOOSTERS_DATA_FILE)
-            if str(guild_id) not in data:
-                data[str(guild_id)] = {'config': {}, 'boosters': {}}
-            return data.get(str(guild_id), {'config': {}, 'boosters': {}})
+        return await self.config_manager.get_guild_data(config.BOOSTERS_DATA_FILE, guild_id, {'config': {}, 'boosters': {}})
     
     async def save_booster_data(self, guild_id: int, guild_data: dict):
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.BOOSTERS_DATA_FILE)
-            data[str(guild_id)] = guild_data
-            await self.config_manager._write_json(config.BOOSTERS_DATA_FILE, data)
+        await self.config_manager.save_guild_data(config.BOOSTERS_DATA_FILE, guild_id, guild_data)
     
     async def get_booster_config(self, guild_id: int) -> dict:
         guild_data = await self.get_booster_data(guild_id)
@@ -65,8 +66,7 @@ class Boosters(commands.Cog):
             level=guild.premium_tier
         )
     
-    @commands.Cog.listener()
-    async def on_member_update(self, before: discord.Member, after: discord.Member):
+    async def on_member_update(self, event: EventContext, before: discord.Member, after: discord.Member):
         if before.premium_since is None and after.premium_since is not None:
             await self.track_booster(after.guild.id, after.id, True)
             
@@ -0,0 +1,98 @@
+import asyncio
+import discord
+from discord.ext import commands
+import os
+import time
+from utils.checks import is_bot_owner
+from utils.cluster import ClusterClient
+
+INTENTS = discord.Intents(guilds=True)
+
+
+class Cluster(commands.Cog):
+    # Owner commands that span every cluster process. Each command is a
+    # ClusterClient request; the handlers below answer it for this process.
+    def __init__(self, bot):
+        self.bot = bot
+        self.started = time.monotonic()
+        self.cluster = ClusterClient()
+        self.cluster.register('stats', self.cluster_stats)
+        self.cluster.register('reload', self.cluster_reload)
+    
+    def cog_unload(self):
+        self.cluster.unregister('stats')
+        self.cluster.unregister('reload')
+    
+    async def cluster_stats(self):
+        return {
+            'pid': os.getpid(),
+            'shards': sorted(self.bot.shards),
+            'guilds': len(self.bot.guilds),
+            'members': sum(guild.member_count or 0 for guild in self.bot.guilds),
+            'latency': self.bot.latency,
+            'uptime': time.monotonic() - self.started
+        }
+    
+    async def cluster_reload(self, extension: str):
+        await self.bot.reload_extension(extension)
+        return {'reloaded': extension}
+    
+    @commands.group(name='cluster', invoke_without_command=True)
+    @is_bot_owner()
+    async def cluster_group(self, ctx):
+        try:
+            replies = await self.cluster.request('stats')
+        except ConnectionError as e:
+            await ctx.send(f"❌ Cluster IPC unavailable: {e}")
+            return
+        except asyncio.TimeoutError:
+            await ctx.send("❌ No cluster answered in time (the launcher did not reply)")
+            return
+        
+        embed = discord.Embed(title="Clusters", color=discord.Color.blue())
+        totals = {'guilds': 0, 'members': 0}
+        for cluster_id, stats in sorted(replies.items()):
+            if 'error' in stats:
+                embed.add_field(name=f"Cluster {cluster_id}", value=f"❌ {stats['error']}", inline=True)
+                continue
+            totals['guilds'] += stats['guilds']
+            totals['members'] += stats['members']
+            shards = stats['shards']
+            embed.add_field(
+                name=f"Cluster {cluster_id}" + (" (this)" if cluster_id == self.cluster.cluster_id else ""),
+                value=f"**Shards:** {shards[0]}-{shards[-1]}\n"
+                      f"**Guilds:** {stats['guilds']:,}\n"
+                      f"**Members:** {stats['members']:,}\n"
+                      f"**Latency:** {stats['latency'] * 1000:.0f}ms\n"
+                      f"**Uptime:** {stats['uptime'] / 3600:.1f}h\n"
+                      f"**PID:** {stats['pid']}",
+                inline=True
+            )
+        
+        embed.description = f"**{len(replies)}** cluster(s) answered · **{totals['guilds']:,}** guilds · **{totals['members']:,}** members"
+        await ctx.send(embed=embed)
+    
+    @cluster_group.command(name='reload')
+    @is_bot_owner()
+    async def reload_everywhere(self, ctx, extension: str):
+        if not extension.startswith('cogs.'):
+            extension = f'cogs.{extension}'
+        
+        try:
+            replies = await self.cluster.request('reload', extension=extension)
+        except ConnectionError as e:
+            await ctx.send(f"❌ Cluster IPC unavailable: {e}")
+            return
+        except asyncio.TimeoutError:
+            await ctx.send(f"❌ No cluster confirmed reloading `{extension}` in time (the launcher did not reply)")
+            return
+        
+        lines = [
+            f"{'❌' if 'error' in reply else '✅'} Cluster {cluster_id}: {reply.get('error', 'reloaded')}"
+            for cluster_id, reply in sorted(replies.items())
+        ]
+        await ctx.send(f"**Reload `{extension}`**\n" + "\n".join(lines))
+
+
+async def setup(bot):
+    await bot.add_cog(Cluster(bot))
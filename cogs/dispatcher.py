@@ -0,0 +1,72 @@
+import discord
+from discord.ext import commands
+from utils.dispatch import EventDispatcher
+from utils.checks import is_bot_owner
+
+INTENTS = discord.Intents(guilds=True, members=True, voice_states=True)
+
+
+class Dispatcher(commands.Cog):
+    # Owns the gateway listeners that several cogs care about, so each event
+    # is received once and fanned out through EventDispatcher.
+    def __init__(self, bot):
+        self.bot = bot
+        self.events = EventDispatcher()
+    
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        await self.events.dispatch('guild_role_create', role.guild, role)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        await self.events.dispatch('guild_role_update', after.guild, before, after)
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        await self.events.dispatch('guild_channel_delete', channel.guild, channel)
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        await self.events.dispatch('member_update', after.guild, before, after)
+    
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        # on_member_remove only fires for cached members, which under the lean
+        # cache profile is a small fraction of them.
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is not None:
+            await self.events.dispatch('member_remove', guild, payload.user)
+    
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        await self.events.dispatch('voice_state_update', member.guild, member, before, after)
+    
+    @commands.command(name='dispatch')
+    @is_bot_owner()
+    async def dispatch_stats(self, ctx):
+        embed = discord.Embed(
+            title="Event Dispatch",
+            description="Per-event cost; config reads and audit lookups are shared by all handlers",
+            color=discord.Color.blue()
+        )
+        
+        for event, stats in sorted(self.events.stats.items()):
+            count = stats['events'] or 1
+            embed.add_field(
+                name=event,
+                value=f"**Events:** {stats['events']:,}\n"
+                      f"**Handlers:** {self.events.handler_count(event)}\n"
+                      f"**Avg time:** {stats['seconds'] / count * 1000:.2f}ms\n"
+                      f"**Config reads/event:** {stats['config_reads'] / count:.2f}\n"
+                      f"**Audit lookups/event:** {stats['audit_lookups'] / count:.2f}",
+                inline=True
+            )
+        
+        if not self.events.stats:
+            embed.description = "No events dispatched yet"
+        
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Dispatcher(bot))
@@ -7,6 +7,8 @@ import config
 from datetime import datetime, timedelta
 import asyncio
 
+INTENTS = discord.Intents(guilds=True)
+
 
 class Economy(commands.Cog):
     def __init__(self, bot):
@@ -50,17 +52,10 @@ class Economy(commands.Cog):
         self.cleanup_expired_boosters.cancel()
     
     async def get_economy_data(self, guild_id: int) -> dict:
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.ECONOMY_DATA_FILE)
-            if str(guild_id) not in data:
-                data[str(guild_id)] = {'users': {}}
-            return data.get(str(guild_id), {'users': {}})
+        return await self.config_manager.get_guild_data(config.ECONOMY_DATA_FILE, guild_id, {'users': {}})
     
-    async def save_economy_data(self, guild_id: int, guild_data: dict):
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.ECONOMY_DATA_FILE)
-            data[str(guild_id)] = guild_data
-            await self.config_manager._write_json(config.ECONOMY_DATA_FILE, data)
+    async def save_economy_data(self, guild_id: int, guild_data: dict, rows: list = None):
+        await self.config_manager.save_guild_data(config.ECONOMY_DATA_FILE, guild_id, guild_data, rows)
     
     async def get_user_economy(self, guild_id: int, user_id: int) -> dict:
         guild_data = await self.get_economy_data(guild_id)
@@ -75,7 +70,7 @@ class Economy(commands.Cog):
     async def set_user_economy(self, guild_id: int, user_id: int, user_data: dict):
         guild_data = await self.get_economy_data(guild_id)
         guild_data['users'][str(user_id)] = user_data
-        await self.save_economy_data(guild_id, guild_data)
+        await self.save_economy_data(guild_id, guild_data, [user_id])
     
     async def get_user_xp(self, guild_id: int, user_id: int) -> int:
         leveling_cog = self.bot.get_cog('Leveling')
@@ -113,6 +108,14 @@ class Economy(commands.Cog):
     
     async def get_active_multipliers(self, guild_id: int, user_id: int) -> dict:
         user_data = await self.get_user_economy(guild_id, user_id)
+        return self.calculate_multipliers(user_data, datetime.utcnow().timestamp())
+    
+    async def get_bulk_multipliers(self, guild_id: int, user_ids) -> dict:
+        users = (await self.get_economy_data(guild_id)).get('users', {})
+        current_time = datetime.utcnow().timestamp()
+        return {user_id: self.calculate_multipliers(users.get(str(user_id), {}), current_time) for user_id in user_ids}
+    
+    def calculate_multipliers(self, user_data: dict, current_time: float) -> dict:
         multipliers = {'msg': 1.0, 'voice': 1.0}
         
         for upgrade_id in user_data.get('permanent_upgrades', []):
@@ -121,7 +124,6 @@ class Economy(commands.Cog):
                 multipliers['msg'] += effect.get('msg', 0)
                 multipliers['voice'] += effect.get('voice', 0)
         
-        current_time = datetime.utcnow().timestamp()
         for booster in user_data.get('active_boosters', []):
             if booster['expires'] > current_time:
                 effect = booster.get('effect', {})
@@ -132,18 +134,17 @@ class Economy(commands.Cog):
     
     @tasks.loop(minutes=5)
     async def cleanup_expired_boosters(self):
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.ECONOMY_DATA_FILE)
-            current_time = datetime.utcnow().timestamp()
-            
-            for guild_id, guild_data in data.items():
-                for user_id, user_data in guild_data.get('users', {}).items():
-                    active_boosters = user_data.get('active_boosters', [])
-                    user_data['active_boosters'] = [
-                        b for b in active_boosters if b['expires'] > current_time
-                    ]
-            
-            await self.config_manager._write_json(config.ECONOMY_DATA_FILE, data)
+        current_time = datetime.utcnow().timestamp()
+        
+        def expire(guild_id, user_id, user_data):
+            active_boosters = user_data.get('active_boosters', [])
+            remaining = [b for b in active_boosters if b['expires'] > current_time]
+            if len(remaining) == len(active_boosters):
+                return False
+            user_data['active_boosters'] = remaining
+            return True
+        
+        await self.config_manager.update_rows(config.ECONOMY_DATA_FILE, expire)
     
     @cleanup_expired_boosters.before_loop
     async def before_cleanup(self):
@@ -3,9 +3,65 @@ from discord.ext import commands, tasks
 from utils.config_manager import ConfigManager
 from utils.formatting import create_log_embed, paginate_list
 from utils.checks import is_admin
+from utils.rank_index import RankIndex
 import config
 from datetime import datetime
 import asyncio
+import time
+
+INTENTS = discord.Intents(guilds=True, members=True, guild_messages=True, message_content=True, voice_states=True)
+
+
+class LeaderboardView(discord.ui.View):
+    # Pages through the entries snapshotted when .leaderboard ran, so ranks
+    # don't shift between clicks while XP keeps changing. The snapshot covers
+    # LEADERBOARD_SNAPSHOT_PAGES pages around the requested one.
+    def __init__(self, cog, guild: discord.Guild, author_id: int, entries: list, first_page: int, total_pages: int,
+                 level_up_xp: int, page: int):
+        super().__init__(timeout=120)
+        self.cog = cog
+        self.guild = guild
+        self.author_id = author_id
+        self.entries = entries
+        self.first_page = first_page
+        self.last_page = first_page + max(0, (len(entries) - 1) // 10)
+        self.total_pages = total_pages
+        self.level_up_xp = level_up_xp
+        self.page = page
+        self.message = None
+        self.update_buttons()
+    
+    def page_entries(self, page: int) -> list:
+        start = (page - self.first_page) * 10
+        return self.entries[start:start + 10]
+    
+    def update_buttons(self):
+        self.previous_page.disabled = self.page <= self.first_page
+        self.next_page.disabled = self.page >= self.last_page
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+    
+    async def show(self, interaction: discord.Interaction, page: int):
+        self.page = max(self.first_page, min(page, self.last_page))
+        self.update_buttons()
+        embed = self.cog.build_leaderboard_embed(self.guild, self.page_entries(self.page), self.level_up_xp, self.page, self.total_pages)
+        await interaction.response.edit_message(embed=embed, view=self)
+    
+    @discord.ui.button(label='◀', style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+    
+    @discord.ui.button(label='▶', style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+    
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except:
+                pass
 
 
 class Leveling(commands.Cog):
@@ -13,34 +69,41 @@ class Leveling(commands.Cog):
         self.bot = bot
         self.config_manager = ConfigManager()
         self.voice_tracking = {}
+        self.pending_xp = {}
+        self.last_voice_tick = 0.0
+        self.rank_indexes = {}
+        self.rank_builds = {}
+        self.rank_backlog = {}
         self.voice_xp_task.start()
+        self.flush_xp_task.start()
     
-    def cog_unload(self):
+    async def cog_unload(self):
         self.voice_xp_task.cancel()
+        self.flush_xp_task.cancel()
+        await self.flush_xp()
     
     async def get_leveling_data(self, guild_id: int) -> dict:
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.LEVELING_DATA_FILE)
-            if str(guild_id) not in data:
-                data[str(guild_id)] = {'users': {}, 'config': {}}
-            return data.get(str(guild_id), {'users': {}, 'config': {}})
-    
-    async def save_leveling_data(self, guild_id: int, guild_data: dict):
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.LEVELING_DATA_FILE)
-            data[str(guild_id)] = guild_data
-            await self.config_manager._write_json(config.LEVELING_DATA_FILE, data)
+        return await self.config_manager.get_guild_data(config.LEVELING_DATA_FILE, guild_id, {'users': {}, 'config': {}})
+    
+    async def save_leveling_data(self, guild_id: int, guild_data: dict, rows: list = None):
+        await self.config_manager.save_guild_data(config.LEVELING_DATA_FILE, guild_id, guild_data, rows)
     
     async def get_user_data(self, guild_id: int, user_id: int) -> dict:
+        pending = self.pending_xp.get((guild_id, user_id))
+        if pending is not None:
+            return pending
+        
         guild_data = await self.get_leveling_data(guild_id)
         if str(user_id) not in guild_data['users']:
             guild_data['users'][str(user_id)] = {'xp': 0, 'level': 0}
         return guild_data['users'][str(user_id)]
     
     async def set_user_data(self, guild_id: int, user_id: int, xp: int, level: int):
+        self.pending_xp.pop((guild_id, user_id), None)
         guild_data = await self.get_leveling_data(guild_id)
         guild_data['users'][str(user_id)] = {'xp': xp, 'level': level}
-        await self.save_leveling_data(guild_id, guild_data)
+        await self.save_leveling_data(guild_id, guild_data, [user_id])
+        self.update_rank(guild_id, user_id, level, xp)
     
     async def get_level_config(self, guild_id: int) -> dict:
         guild_data = await self.get_leveling_data(guild_id)
@@ -56,7 +119,7 @@ class Leveling(commands.Cog):
         if 'config' not in guild_data:
             guild_data['config'] = {}
         guild_data['config'][key] = value
-        await self.save_leveling_data(guild_id, guild_data)
+        await self.save_leveling_data(guild_id, guild_data, rows=[])
     
     async def get_user_multiplier(self, guild_id: int, user_id: int) -> dict:
         from cogs.economy import Economy
@@ -65,11 +128,22 @@ class Leveling(commands.Cog):
             return await economy_cog.get_active_multipliers(guild_id, user_id)
         return {'msg': 1.0, 'voice': 1.0}
     
+    async def get_bulk_multipliers(self, guild_id: int, user_ids) -> dict:
+        economy_cog = self.bot.get_cog('Economy')
+        if economy_cog:
+            return await economy_cog.get_bulk_multipliers(guild_id, user_ids)
+        return {user_id: {'msg': 1.0, 'voice': 1.0} for user_id in user_ids}
+    
     async def add_xp(self, guild_id: int, user_id: int, xp_amount: int, xp_type: str = 'msg') -> tuple:
-        user_data = await self.get_user_data(guild_id, user_id)
         level_config = await self.get_level_config(guild_id)
         multipliers = await self.get_user_multiplier(guild_id, user_id)
         
+        key = (guild_id, user_id)
+        if key not in self.pending_xp:
+            stored = await self.get_user_data(guild_id, user_id)
+            self.pending_xp.setdefault(key, {'xp': stored['xp'], 'level': stored['level']})
+        user_data = self.pending_xp[key]
+        
         multiplier = multipliers.get(xp_type, 1.0)
         xp_gained = int(xp_amount * multiplier)
         
@@ -82,31 +156,161 @@ class Leveling(commands.Cog):
             user_data['level'] += 1
             leveled_up = True
         
-        await self.set_user_data(guild_id, user_id, user_data['xp'], user_data['level'])
+        self.update_rank(guild_id, user_id, user_data['level'], user_data['xp'])
         return leveled_up, user_data['level']
     
+    async def add_xp_bulk(self, guild_id: int, user_ids: list, xp_amount: int, xp_type: str = 'msg') -> dict:
+        level_config = await self.get_level_config(guild_id)
+        multipliers = await self.get_bulk_multipliers(guild_id, user_ids)
+        
+        if any((guild_id, user_id) not in self.pending_xp for user_id in user_ids):
+            stored = (await self.get_leveling_data(guild_id)).get('users', {})
+            for user_id in user_ids:
+                user_data = stored.get(str(user_id), {'xp': 0, 'level': 0})
+                self.pending_xp.setdefault((guild_id, user_id), {'xp': user_data['xp'], 'level': user_data['level']})
+        
+        level_up_xp = level_config['level_up_xp']
+        levels = {}
+        for user_id in user_ids:
+            user_data = self.pending_xp[(guild_id, user_id)]
+            user_data['xp'] += int(xp_amount * multipliers[user_id].get(xp_type, 1.0))
+            if user_data['xp'] >= level_up_xp:
+                user_data['level'] += user_data['xp'] // level_up_xp
+                user_data['xp'] %= level_up_xp
+                levels[user_id] = user_data['level']
+            self.update_rank(guild_id, user_id, user_data['level'], user_data['xp'])
+        return levels
+    
+    def update_rank(self, guild_id: int, user_id: int, level: int, xp: int):
+        self.apply_to_rank_index(guild_id, 'update', str(user_id), level, xp)
+    
+    def apply_to_rank_index(self, guild_id: int, method: str, *args):
+        index = self.rank_indexes.get(guild_id)
+        if index is not None:
+            getattr(index, method)(*args)
+        elif guild_id in self.rank_backlog:
+            self.rank_backlog[guild_id].append((method, args))
+    
+    async def get_rank_index(self, guild_id: int) -> RankIndex:
+        index = self.rank_indexes.get(guild_id)
+        if index is not None:
+            return index
+        
+        build = self.rank_builds.get(guild_id)
+        if build is None:
+            build = asyncio.ensure_future(self.build_rank_index(guild_id))
+            self.rank_builds[guild_id] = build
+        return await asyncio.shield(build)
+    
+    async def present_members(self, guild_id: int):
+        # Under the lean cache profile guilds are never chunked, so the member
+        # list is requested once per index build without caching it; joins and
+        # leaves after that are applied to the index incrementally.
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return None
+        if guild.chunked:
+            return {str(member.id) for member in guild.members}
+        try:
+            return {str(member.id) for member in await guild.chunk(cache=False)}
+        except Exception as e:
+            print(f"Error requesting members for rank index in {guild_id}: {e}")
+            return None
+    
+    async def build_rank_index(self, guild_id: int) -> RankIndex:
+        # Sorting a large guild takes seconds, so the index is built in a thread
+        # from a snapshot; XP and membership changes made meanwhile are replayed
+        # from the backlog.
+        try:
+            users = dict((await self.get_leveling_data(guild_id)).get('users', {}))
+            for (pending_guild, user_id), user_data in self.pending_xp.items():
+                if pending_guild == guild_id:
+                    users[str(user_id)] = user_data
+            snapshot = [(user_id, data.get('level', 0), data.get('xp', 0)) for user_id, data in users.items()]
+            self.rank_backlog[guild_id] = []
+            present = await self.present_members(guild_id)
+            
+            index = await asyncio.to_thread(RankIndex, snapshot, present)
+            for method, args in self.rank_backlog[guild_id]:
+                getattr(index, method)(*args)
+            self.rank_indexes[guild_id] = index
+            return index
+        finally:
+            self.rank_builds.pop(guild_id, None)
+            self.rank_backlog.pop(guild_id, None)
+    
+    async def flush_xp(self):
+        if not self.pending_xp:
+            return
+        
+        batches = {}
+        for (guild_id, user_id), user_data in list(self.pending_xp.items()):
+            batches.setdefault(guild_id, {})[user_id] = dict(user_data)
+        
+        for guild_id, users in batches.items():
+            guild_data = await self.get_leveling_data(guild_id)
+            users = {user_id: data for user_id, data in users.items() if (guild_id, user_id) in self.pending_xp}
+            guild_data.setdefault('users', {}).update({str(user_id): data for user_id, data in users.items()})
+            await self.save_leveling_data(guild_id, guild_data, list(users))
+            
+            for user_id, data in users.items():
+                if self.pending_xp.get((guild_id, user_id)) == data:
+                    del self.pending_xp[(guild_id, user_id)]
+    
+    @tasks.loop(seconds=config.XP_FLUSH_INTERVAL)
+    async def flush_xp_task(self):
+        try:
+            await self.flush_xp()
+        except Exception as e:
+            print(f"Error flushing XP: {e}")
+    
+    @flush_xp_task.before_loop
+    async def before_flush_xp_task(self):
+        await self.bot.wait_until_ready()
+    
     def create_progress_bar(self, current: int, maximum: int, length: int = 20) -> str:
         filled = int(length * current / maximum)
         empty = length - filled
         return f"[{'█' * filled}{'░' * empty}]"
     
-    @tasks.loop(minutes=1)
+    @tasks.loop(seconds=config.VOICE_XP_INTERVAL)
     async def voice_xp_task(self):
+        start = time.perf_counter()
+        
+        eligible = {}
         for guild in self.bot.guilds:
-            level_config = await self.get_level_config(guild.id)
-            voice_xp = level_config['voice_xp']
-            
-            for channel in guild.voice_channels:
-                for member in channel.members:
-                    if member.bot:
-                        continue
-                    if member.voice and not member.voice.self_deaf and not member.voice.deaf:
-                        leveled_up, new_level = await self.add_xp(guild.id, member.id, voice_xp, 'voice')
+            members = [
+                member.id
+                for channel in guild.voice_channels
+                for member in channel.members
+                if not member.bot and member.voice and not member.voice.self_deaf and not member.voice.deaf
+            ]
+            if members:
+                eligible[guild.id] = members
+        
+        for guild_id, members in eligible.items():
+            level_config = await self.get_level_config(guild_id)
+            await self.add_xp_bulk(guild_id, members, level_config['voice_xp'], 'voice')
+        
+        await self.flush_xp()
+        
+        self.last_voice_tick = time.perf_counter() - start
+        if self.last_voice_tick > config.VOICE_XP_INTERVAL * 0.8:
+            print(f"⚠️ Voice XP tick took {self.last_voice_tick:.1f}s ({sum(map(len, eligible.values()))} members, interval {config.VOICE_XP_INTERVAL}s)")
     
     @voice_xp_task.before_loop
     async def before_voice_xp_task(self):
         await self.bot.wait_until_ready()
     
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.apply_to_rank_index(member.guild.id, 'set_present', str(member.id), True)
+    
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        # The raw event also fires for members that are not cached (lean profile)
+        self.apply_to_rank_index(payload.guild_id, 'set_present', str(payload.user.id), False)
+    
     @commands.Cog.listener()
     async def on_message(self, message):
         if message.author.bot or not message.guild:
@@ -229,20 +433,8 @@ class Leveling(commands.Cog):
         user_data = await self.get_user_data(ctx.guild.id, member.id)
         level_config = await self.get_level_config(ctx.guild.id)
         
-        guild_data = await self.get_leveling_data(ctx.guild.id)
-        users = guild_data.get('users', {})
-        
-        sorted_users = sorted(
-            users.items(),
-            key=lambda x: (x[1].get('level', 0), x[1].get('xp', 0)),
-            reverse=True
-        )
-        
-        rank = 1
-        for i, (user_id, data) in enumerate(sorted_users, 1):
-            if str(member.id) == user_id:
-                rank = i
-                break
+        index = await self.get_rank_index(ctx.guild.id)
+        rank = index.rank(str(member.id)) or len(index) + 1
         
         xp = user_data['xp']
         level = user_data['level']
@@ -263,62 +455,57 @@ class Leveling(commands.Cog):
         
         await ctx.send(embed=embed)
     
+    def build_leaderboard_embed(self, guild: discord.Guild, page_entries: list, level_up_xp: int, page: int, total_pages: int) -> discord.Embed:
+        entries = []
+        for i, user_id, level, xp in page_entries:
+            member = guild.get_member(int(user_id))
+            mention = member.mention if member else f"<@{user_id}>"
+            
+            total_xp = (level * level_up_xp) + xp
+            
+            medal = ""
+            if i == 1:
+                medal = "🥇 "
+            elif i == 2:
+                medal = "🥈 "
+            elif i == 3:
+                medal = "🥉 "
+            
+            entries.append(f"{medal}**#{i}** {mention}\nLevel: `{level}` | XP: `{total_xp:,}`\n")
+        
+        embed = discord.Embed(
+            title=f"🏆 XP Leaderboard (Page {page}/{total_pages})",
+            description=''.join(entries) or "No members on this page",
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text=f"Use .leaderboard <page> or the buttons to view more")
+        return embed
+    
     @commands.command(name='leaderboard', aliases=['lb', 'top'])
     async def leaderboard(self, ctx, page: int = 1):
-        guild_data = await self.get_leveling_data(ctx.guild.id)
+        index = await self.get_rank_index(ctx.guild.id)
         level_config = await self.get_level_config(ctx.guild.id)
-        users = guild_data.get('users', {})
         
-        if not users:
+        if not len(index):
             await ctx.send("❌ No leveling data yet!")
             return
         
-        sorted_users = sorted(
-            users.items(),
-            key=lambda x: (x[1].get('level', 0), x[1].get('xp', 0)),
-            reverse=True
-        )
-        
-        entries = []
-        for i, (user_id, data) in enumerate(sorted_users, 1):
-            try:
-                member = ctx.guild.get_member(int(user_id))
-                if member:
-                    level = data.get('level', 0)
-                    xp = data.get('xp', 0)
-                    total_xp = (level * level_config['level_up_xp']) + xp
-                    
-                    medal = ""
-                    if i == 1:
-                        medal = "🥇 "
-                    elif i == 2:
-                        medal = "🥈 "
-                    elif i == 3:
-                        medal = "🥉 "
-                    
-                    entries.append(f"{medal}**#{i}** {member.mention}\nLevel: `{level}` | XP: `{total_xp:,}`\n")
-            except:
-                continue
-        
-        if not entries:
+        if not index.present_count:
             await ctx.send("❌ No valid users in leaderboard!")
             return
         
-        paginated, total_pages = paginate_list(entries, page, 10)
-        
-        if not paginated:
+        total_pages = (index.present_count + 9) // 10
+        if page < 1 or page > total_pages:
             await ctx.send(f"❌ Page {page} doesn't exist. Total pages: {total_pages}")
             return
         
-        embed = discord.Embed(
-            title=f"🏆 XP Leaderboard (Page {page}/{total_pages})",
-            description=''.join(paginated),
-            color=discord.Color.gold()
-        )
-        embed.set_footer(text=f"Use .leaderboard <page> to view more")
+        first_page = max(1, page - config.LEADERBOARD_SNAPSHOT_PAGES // 2)
+        last_page = min(total_pages, first_page + config.LEADERBOARD_SNAPSHOT_PAGES - 1)
+        entries = index.present_page((first_page - 1) * 10, (last_page - first_page + 1) * 10)
         
-        await ctx.send(embed=embed)
-
+        view = LeaderboardView(self, ctx.guild, ctx.author.id, entries, first_page, total_pages, level_config['level_up_xp'], page)
+        embed = self.build_leaderboard_embed(ctx.guild, view.page_entries(page), level_config['level_up_xp'], page, total_pages)
+        view.message = await ctx.send(embed=embed, view=view)
 
 async def setup(bot):
     await bot.add_cog(Leveling(bot))
@@ -1,17 +1,29 @@
 import discord
 from discord.ext import commands
 from utils.config_manager import ConfigManager
+from utils.dispatch import EventContext, EventDispatcher
 from utils.formatting import create_log_embed
-from utils.checks import is_admin
+from utils.log_sink import LogSink
+from utils.checks import is_admin, is_bot_owner
 from datetime import datetime
 from typing import Optional
 
+INTENTS = discord.Intents(guilds=True, members=True, guild_messages=True, guild_reactions=True, message_content=True, voice_states=True)
+
 class Logging(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config_manager = ConfigManager()
+        self.log_sink = LogSink()
+        self.events = EventDispatcher()
+        self.events.register('guild_role_create', self.on_guild_role_create)
+        self.events.register('guild_role_update', self.on_guild_role_update)
+        self.events.register('voice_state_update', self.on_voice_state_update)
         self.voice_sessions = {}
     
+    def cog_unload(self):
+        self.events.unregister(self)
+    
     @commands.command(name='setuplog')
     @is_admin()
     async def setup_log(self, ctx, log_type: str):
@@ -39,7 +51,8 @@ class Logging(commands.Cog):
                 }
                 channel = await ctx.guild.create_text_channel(name=channel_name, overwrites=overwrites)
                 await self.config_manager.set_log_channel(ctx.guild.id, log_type, channel.id)
-                await ctx.send(f"✅ Created {channel.mention} for {log_type} logging!")
+                transport = " via webhook" if await self.provision_webhook(channel, log_type) else ""
+                await ctx.send(f"✅ Created {channel.mention} for {log_type} logging{transport}!")
             
             elif str(reaction.emoji) == '2️⃣':
                 await ctx.send("Please mention the channel you want to use for logging.")
@@ -52,7 +65,8 @@ class Logging(commands.Cog):
                     if msg.channel_mentions:
                         channel = msg.channel_mentions[0]
                         await self.config_manager.set_log_channel(ctx.guild.id, log_type, channel.id)
-                        await ctx.send(f"✅ Set {channel.mention} for {log_type} logging!")
+                        transport = " via webhook" if await self.provision_webhook(channel, log_type) else ""
+                        await ctx.send(f"✅ Set {channel.mention} for {log_type} logging{transport}!")
                     else:
                         await ctx.send("❌ No channel mentioned. Setup cancelled.")
                 except:
@@ -61,16 +75,93 @@ class Logging(commands.Cog):
         except:
             await ctx.send("❌ Timed out. Setup cancelled.")
     
+    async def provision_webhook(self, channel: discord.TextChannel, log_type: str) -> bool:
+        # Reuses a webhook the bot already owns in the channel, since Discord
+        # allows only 15 per channel, and deletes the one the log type used
+        # before if nothing else delivers through it.
+        guild_config = await self.config_manager.get_guild_config(channel.guild.id)
+        previous = guild_config.get('log_webhooks', {}).get(log_type)
+        name = f"{log_type.replace('_', ' ').title()} Logs"
+        try:
+            owned = [w for w in await channel.webhooks() if w.token and w.user and w.user.id == self.bot.user.id]
+            webhook = next((w for w in owned if w.name == name), owned[0] if owned else None)
+            if webhook is None:
+                webhook = await channel.create_webhook(name=name, reason=f"Log delivery for {log_type}")
+        except Exception as e:
+            print(f"Error creating log webhook: {e}")
+            await self.config_manager.set_log_webhook(channel.guild.id, log_type, None)
+            await self.retire_webhook(channel.guild.id, previous)
+            return False
+        
+        await self.config_manager.set_log_webhook(channel.guild.id, log_type, webhook.url)
+        if previous != webhook.url:
+            await self.retire_webhook(channel.guild.id, previous)
+        return True
+    
+    async def retire_webhook(self, guild_id: int, url: Optional[str]):
+        if not url:
+            return
+        guild_config = await self.config_manager.get_guild_config(guild_id)
+        if url in guild_config.get('log_webhooks', {}).values():
+            return
+        try:
+            await discord.Webhook.from_url(url, client=self.bot).delete(reason="Log webhook no longer used")
+        except discord.NotFound:
+            pass
+        except Exception as e:
+            print(f"Error deleting log webhook: {e}")
+    
+    @commands.command(name='logwebhook')
+    @is_admin()
+    async def log_webhook(self, ctx, log_type: str, state: str):
+        state = state.lower()
+        if state not in ['on', 'off']:
+            await ctx.send("❌ Invalid state. Valid options: `on`, `off`")
+            return
+        
+        if state == 'off':
+            guild_config = await self.config_manager.get_guild_config(ctx.guild.id)
+            previous = guild_config.get('log_webhooks', {}).get(log_type)
+            await self.config_manager.set_log_webhook(ctx.guild.id, log_type, None)
+            await self.retire_webhook(ctx.guild.id, previous)
+            await ctx.send(f"✅ {log_type} logs will be sent by the bot")
+            return
+        
+        channel_id = await self.config_manager.get_log_channel(ctx.guild.id, log_type)
+        channel = ctx.guild.get_channel(channel_id) if channel_id else None
+        if not channel:
+            await ctx.send(f"❌ No {log_type} log channel set. Use `.setuplog {log_type}` first")
+            return
+        
+        if await self.provision_webhook(channel, log_type):
+            await ctx.send(f"✅ {log_type} logs will be delivered to {channel.mention} via webhook")
+        else:
+            await ctx.send("❌ Couldn't create a webhook. Check that I have Manage Webhooks")
+    
+    @commands.command(name='logstats')
+    @is_bot_owner()
+    async def log_stats(self, ctx):
+        stats = self.log_sink.stats()
+        
+        embed = discord.Embed(
+            title="Log Delivery",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Queue Depth", value=f"`{stats['depth']:,}` (max `{stats['max_depth']:,}`)", inline=True)
+        embed.add_field(name="Destinations", value=f"`{stats['destinations']:,}` (`{stats['webhooks']:,}` webhooks)", inline=True)
+        embed.add_field(name="Latency", value=f"avg `{stats['avg_latency']:.2f}s` / max `{stats['max_latency']:.2f}s`", inline=True)
+        embed.add_field(name="Delivered", value=f"`{stats['sent_embeds']:,}` embeds in `{stats['sent_messages']:,}` messages", inline=True)
+        embed.add_field(name="Collapsed / Dropped", value=f"`{stats['collapsed']:,}` / `{stats['dropped']:,}`", inline=True)
+        embed.add_field(name="Retries / Failed", value=f"`{stats['retries']:,}` / `{stats['failed']:,}`", inline=True)
+        
+        await ctx.send(embed=embed)
+    
     @commands.Cog.listener()
     async def on_message_delete(self, message):
         if message.author.bot:
             return
         
-        channel_id = await self.config_manager.get_log_channel(message.guild.id, 'messages')
-        if not channel_id:
-            return
-        
-        log_channel = message.guild.get_channel(channel_id)
+        log_channel = await self.log_sink.resolve(message.guild, 'messages')
         if not log_channel:
             return
         
@@ -86,10 +177,7 @@ class Logging(commands.Cog):
         if message.attachments:
             embed.add_field(name="Attachments", value='\n'.join([a.filename for a in message.attachments]))
         
-        try:
-            await log_channel.send(embed=embed)
-        except:
-            pass
+        self.log_sink.submit(log_channel, embed)
     
     @commands.Cog.listener()
     async def on_message_edit(self, before, after):
@@ -102,14 +190,9 @@ class Logging(commands.Cog):
         if before.content == after.content:
             return
         
-        channel_id = await self.config_manager.get_log_channel(before.guild.id, 'message_edit')
-        if not channel_id:
-            channel_id = await self.config_manager.get_log_channel(before.guild.id, 'messages')
-        
-        if not channel_id:
-            return
-        
-        log_channel = before.guild.get_channel(channel_id)
+        guild_config = await self.config_manager.get_guild_config(before.guild.id)
+        log_type = 'message_edit' if guild_config.get('log_channels', {}).get('message_edit') else 'messages'
+        log_channel = self.log_sink.destination(before.guild, guild_config, log_type)
         if not log_channel:
             return
         
@@ -126,18 +209,10 @@ class Logging(commands.Cog):
         embed.add_field(name="Original Content", value=original_content, inline=False)
         embed.add_field(name="New Content", value=new_content, inline=False)
         
-        try:
-            await log_channel.send(embed=embed)
-        except:
-            pass
+        self.log_sink.submit(log_channel, embed)
     
-    @commands.Cog.listener()
-    async def on_voice_state_update(self, member, before, after):
-        channel_id = await self.config_manager.get_log_channel(member.guild.id, 'voice')
-        if not channel_id:
-            return
-        
-        log_channel = member.guild.get_channel(channel_id)
+    async def on_voice_state_update(self, event: EventContext, member, before, after):
+        log_channel = await event.log_destination('voice')
         if not log_channel:
             return
         
@@ -153,10 +228,7 @@ class Logging(commands.Cog):
                     f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
                     discord.Color.green()
                 )
-                try:
-                    await log_channel.send(embed=embed)
-                except:
-                    pass
+                self.log_sink.submit(log_channel, embed, low_priority=True)
             
             elif after.channel is None:
                 session_key = f"{member.guild.id}_{member.id}_{before.channel.id}"
@@ -177,10 +249,7 @@ class Logging(commands.Cog):
                     f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
                     discord.Color.red()
                 )
-                try:
-                    await log_channel.send(embed=embed)
-                except:
-                    pass
+                self.log_sink.submit(log_channel, embed, low_priority=True)
             
             else:
                 embed = create_log_embed(
@@ -191,10 +260,7 @@ class Logging(commands.Cog):
                     f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
                     discord.Color.blue()
                 )
-                try:
-                    await log_channel.send(embed=embed)
-                except:
-                    pass
+                self.log_sink.submit(log_channel, embed, low_priority=True)
         
         if before.self_stream != after.self_stream:
             action = "Started Streaming" if after.self_stream else "Stopped Streaming"
@@ -205,114 +271,100 @@ class Logging(commands.Cog):
                 f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
                 discord.Color.purple()
             )
-            try:
-                await log_channel.send(embed=embed)
-            except:
-                pass
+            self.log_sink.submit(log_channel, embed, low_priority=True)
     
-    @commands.Cog.listener()
-    async def on_guild_role_create(self, role):
+    async def on_guild_role_create(self, event: EventContext, role):
         try:
-            channel_id = await self.config_manager.get_log_channel(role.guild.id, 'roles')
-            if not channel_id:
-                return
-            
-            log_channel = role.guild.get_channel(channel_id)
+            log_channel = await event.log_destination('roles')
             if not log_channel:
                 return
             
-            async for entry in role.guild.audit_logs(limit=1, action=discord.AuditLogAction.role_create):
-                if entry.target.id == role.id:
-                    executor = entry.user
-                    
-                    embed = create_log_embed(
-                        "Role Created",
-                        f"**Creator:** {executor.mention} ({executor.name}#{executor.discriminator} - {executor.id})\n"
-                        f"**Role:** {role.mention}\n"
-                        f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
-                        discord.Color.green()
-                    )
-                    
-                    await log_channel.send(embed=embed)
-                    break
+            entry = await event.audit_entry(discord.AuditLogAction.role_create, role.id)
+            if entry:
+                executor = entry.user
+                
+                embed = create_log_embed(
+                    "Role Created",
+                    f"**Creator:** {executor.mention} ({executor.name}#{executor.discriminator} - {executor.id})\n"
+                    f"**Role:** {role.mention}\n"
+                    f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                    discord.Color.green()
+                )
+                
+                self.log_sink.submit(log_channel, embed)
         except Exception as e:
             print(f"Error in on_guild_role_create: {e}")
     
-    @commands.Cog.listener()
-    async def on_guild_role_update(self, before, after):
+    async def on_guild_role_update(self, event: EventContext, before, after):
         try:
-            channel_id = await self.config_manager.get_log_channel(before.guild.id, 'roles')
-            if not channel_id:
-                return
-            
-            log_channel = before.guild.get_channel(channel_id)
+            log_channel = await event.log_destination('roles')
             if not log_channel:
                 return
             
-            async for entry in before.guild.audit_logs(limit=1, action=discord.AuditLogAction.role_update):
-                if entry.target.id == before.id:
-                    executor = entry.user
-                    
-                    added_perms = []
-                    removed_perms = []
-                    
-                    for perm, value in before.permissions:
-                        if perm in after.permissions:
-                            if after.permissions[perm] != value:
-                                if after.permissions[perm]:
-                                    added_perms.append(perm)
-                                else:
-                                    removed_perms.append(perm)
-                    
-                    embed = create_log_embed(
-                        "Role Updated",
-                        f"**Actor:** {executor.mention} ({executor.name}#{executor.discriminator} - {executor.id})\n"
-                        f"**Role:** {before.mention}\n"
-                        f"**Added Permissions:** {', '.join([str(p) for p in added_perms]) if added_perms else 'None'}\n"
-                        f"**Removed Permissions:** {', '.join([str(p) for p in removed_perms]) if removed_perms else 'None'}\n"
-                        f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
-                        discord.Color.blue()
-                    )
-                    
-                    await log_channel.send(embed=embed)
-                    break
+            entry = await event.audit_entry(discord.AuditLogAction.role_update, before.id)
+            if entry:
+                executor = entry.user
+                
+                added_perms = []
+                removed_perms = []
+                
+                for perm, value in before.permissions:
+                    if perm in after.permissions:
+                        if after.permissions[perm] != value:
+                            if after.permissions[perm]:
+                                added_perms.append(perm)
+                            else:
+                                removed_perms.append(perm)
+                
+                embed = create_log_embed(
+                    "Role Updated",
+                    f"**Actor:** {executor.mention} ({executor.name}#{executor.discriminator} - {executor.id})\n"
+                    f"**Role:** {before.mention}\n"
+                    f"**Added Permissions:** {', '.join([str(p) for p in added_perms]) if added_perms else 'None'}\n"
+                    f"**Removed Permissions:** {', '.join([str(p) for p in removed_perms]) if removed_perms else 'None'}\n"
+                    f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                    discord.Color.blue()
+                )
+                
+                self.log_sink.submit(log_channel, embed)
         except Exception as e:
             print(f"Error in on_guild_role_update: {e}")
     
     @commands.Cog.listener()
-    async def on_member_update(self, before, after):
+    async def on_audit_log_entry_create(self, entry):
+        # Role changes are logged from the audit-log push: member_update is
+        # dropped for members missing from the cache (most of them under the
+        # lean cache profile), and the entry already names the actor.
+        if entry.action != discord.AuditLogAction.member_role_update:
+            return
         try:
-            channel_id = await self.config_manager.get_log_channel(before.guild.id, 'roles')
-            if not channel_id:
+            added_roles = getattr(entry.after, 'roles', None) or []
+            removed_roles = getattr(entry.before, 'roles', None) or []
+            if not added_roles and not removed_roles:
                 return
             
-            log_channel = before.guild.get_channel(channel_id)
+            log_channel = await self.log_sink.resolve(entry.guild, 'roles')
             if not log_channel:
                 return
             
-            if before.roles != after.roles:
-                added_roles = [role for role in after.roles if role not in before.roles]
-                removed_roles = [role for role in before.roles if role not in after.roles]
-                
-                if added_roles or removed_roles:
-                    async for entry in before.guild.audit_logs(limit=1, action=discord.AuditLogAction.member_role_update):
-                        if entry.target.id == before.id:
-                            executor = entry.user
-                            
-                            embed = create_log_embed(
-                                "Member Role Updated",
-                                f"**Actor:** {executor.mention} ({executor.name}#{executor.discriminator} - {executor.id})\n"
-                                f"**Member:** {before.mention} ({before.name}#{before.discriminator} - {before.id})\n"
-                                f"**Added Roles:** {', '.join([r.mention for r in added_roles]) if added_roles else 'None'}\n"
-                                f"**Removed Roles:** {', '.join([r.mention for r in removed_roles]) if removed_roles else 'None'}\n"
-                                f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
-                                discord.Color.blue()
-                            )
-                            
-                            await log_channel.send(embed=embed)
-                            break
+            executor = entry.user
+            member = entry.target
+            actor = f"{executor.mention} ({executor.name}#{executor.discriminator} - {executor.id})" if executor else f"<@{entry.user_id}>"
+            target = f"{member.mention} ({member.name}#{member.discriminator} - {member.id})" if isinstance(member, (discord.Member, discord.User)) else f"<@{member.id}>"
+            
+            embed = create_log_embed(
+                "Member Role Updated",
+                f"**Actor:** {actor}\n"
+                f"**Member:** {target}\n"
+                f"**Added Roles:** {', '.join(f'<@&{r.id}>' for r in added_roles) if added_roles else 'None'}\n"
+                f"**Removed Roles:** {', '.join(f'<@&{r.id}>' for r in removed_roles) if removed_roles else 'None'}\n"
+                f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                discord.Color.blue()
+            )
+            
+            self.log_sink.submit(log_channel, embed)
         except Exception as e:
-            print(f"Error in on_member_update: {e}")
+            print(f"Error logging member role update: {e}")
 
 async def setup(bot):
     await bot.add_cog(Logging(bot))
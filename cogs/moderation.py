@@ -1,17 +1,24 @@
 import discord
 from discord.ext import commands, tasks
+from utils.audit_log import AuditLogService
 from utils.config_manager import ConfigManager
 from utils.formatting import create_log_embed, paginate_list
+from utils.log_sink import LogSink
+from utils.members import get_or_fetch_member
 from utils.checks import is_owner, is_admin, has_fake_permission, hardban_permission
 import config
 from datetime import datetime, timedelta
 import asyncio
 import re
 
+INTENTS = discord.Intents(guilds=True, members=True, moderation=True)
+
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config_manager = ConfigManager()
+        self.audit_logs = AuditLogService()
+        self.log_sink = LogSink()
         self.unban_warnings = {}
         self.unmute_task.start()
     
@@ -43,17 +50,10 @@ class Moderation(commands.Cog):
             return f"{seconds // 86400}d"
     
     async def get_mutes_data(self, guild_id: int) -> dict:
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.MUTES_DATA_FILE)
-            if str(guild_id) not in data:
-                data[str(guild_id)] = {'mutes': {}, 'config': {}}
-            return data.get(str(guild_id), {'mutes': {}, 'config': {}})
-    
-    async def save_mutes_data(self, guild_id: int, guild_data: dict):
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.MUTES_DATA_FILE)
-            data[str(guild_id)] = guild_data
-            await self.config_manager._write_json(config.MUTES_DATA_FILE, data)
+        return await self.config_manager.get_guild_data(config.MUTES_DATA_FILE, guild_id, {'mutes': {}, 'config': {}})
+    
+    async def save_mutes_data(self, guild_id: int, guild_data: dict, rows: list = None):
+        await self.config_manager.save_guild_data(config.MUTES_DATA_FILE, guild_id, guild_data, rows)
     
     async def get_mute_role(self, guild: discord.Guild) -> discord.Role:
         guild_data = await self.get_mutes_data(guild.id)
@@ -105,14 +105,14 @@ class Moderation(commands.Cog):
             'expires': expires
         }
         
-        await self.save_mutes_data(guild_id, guild_data)
+        await self.save_mutes_data(guild_id, guild_data, [user_id])
     
     async def remove_mute(self, guild_id: int, user_id: int) -> bool:
         guild_data = await self.get_mutes_data(guild_id)
         
         if str(user_id) in guild_data.get('mutes', {}):
             del guild_data['mutes'][str(user_id)]
-            await self.save_mutes_data(guild_id, guild_data)
+            await self.save_mutes_data(guild_id, guild_data, [user_id])
             return True
         return False
     
@@ -124,33 +124,19 @@ class Moderation(commands.Cog):
     async def unmute_task(self):
         current_time = datetime.utcnow().timestamp()
         
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.MUTES_DATA_FILE)
-            
-            for guild_id, guild_data in list(data.items()):
-                mutes = guild_data.get('mutes', {})
-                expired = []
-                
-                for user_id, mute_data in list(mutes.items()):
-                    expires = mute_data.get('expires')
-                    if expires and expires <= current_time:
-                        expired.append(user_id)
-                
-                for user_id in expired:
-                    guild = self.bot.get_guild(int(guild_id))
-                    if guild:
-                        member = guild.get_member(int(user_id))
-                        if member:
-                            mute_role = await self.get_mute_role(guild)
-                            if mute_role and mute_role in member.roles:
-                                try:
-                                    await member.remove_roles(mute_role, reason="Mute duration expired")
-                                except:
-                                    pass
-                    
-                    del mutes[user_id]
-                
-            await self.config_manager._write_json(config.MUTES_DATA_FILE, data)
+        expired = await self.config_manager.expire_mutes(current_time)
+        
+        for guild_id, user_id in expired:
+            guild = self.bot.get_guild(int(guild_id))
+            if guild:
+                member = await get_or_fetch_member(guild, int(user_id))
+                if member:
+                    mute_role = await self.get_mute_role(guild)
+                    if mute_role and mute_role in member.roles:
+                        try:
+                            await member.remove_roles(mute_role, reason="Mute duration expired")
+                        except:
+                            pass
     
     @unmute_task.before_loop
     async def before_unmute_task(self):
@@ -171,18 +157,16 @@ class Moderation(commands.Cog):
             await member.ban(reason=f"Banned by {ctx.author}: {reason}")
             await ctx.send(f"✅ Banned {member.mention} | Reason: {reason}")
             
-            channel_id = await self.config_manager.get_log_channel(ctx.guild.id, 'antinuke')
-            if channel_id:
-                log_channel = ctx.guild.get_channel(channel_id)
-                if log_channel:
-                    embed = create_log_embed(
-                        "Member Banned",
-                        f"**Moderator:** {ctx.author.mention}\n"
-                        f"**User:** {member.mention} ({member.name}#{member.discriminator} - {member.id})\n"
-                        f"**Reason:** {reason}",
-                        discord.Color.red()
-                    )
-                    await log_channel.send(embed=embed)
+            log_channel = await self.log_sink.resolve(ctx.guild, 'antinuke')
+            if log_channel:
+                embed = create_log_embed(
+                    "Member Banned",
+                    f"**Moderator:** {ctx.author.mention}\n"
+                    f"**User:** {member.mention} ({member.name}#{member.discriminator} - {member.id})\n"
+                    f"**Reason:** {reason}",
+                    discord.Color.red()
+                )
+                self.log_sink.submit(log_channel, embed)
         except discord.Forbidden:
             await ctx.send("❌ I don't have permission to ban that user")
         except Exception as e:
@@ -203,18 +187,16 @@ class Moderation(commands.Cog):
             await member.kick(reason=f"Kicked by {ctx.author}: {reason}")
             await ctx.send(f"✅ Kicked {member.mention} | Reason: {reason}")
             
-            channel_id = await self.config_manager.get_log_channel(ctx.guild.id, 'antinuke')
-            if channel_id:
-                log_channel = ctx.guild.get_channel(channel_id)
-                if log_channel:
-                    embed = create_log_embed(
-                        "Member Kicked",
-                        f"**Moderator:** {ctx.author.mention}\n"
-                        f"**User:** {member.mention} ({member.name}#{member.discriminator} - {member.id})\n"
-                        f"**Reason:** {reason}",
-                        discord.Color.orange()
-                    )
-                    await log_channel.send(embed=embed)
+            log_channel = await self.log_sink.resolve(ctx.guild, 'antinuke')
+            if log_channel:
+                embed = create_log_embed(
+                    "Member Kicked",
+                    f"**Moderator:** {ctx.author.mention}\n"
+                    f"**User:** {member.mention} ({member.name}#{member.discriminator} - {member.id})\n"
+                    f"**Reason:** {reason}",
+                    discord.Color.orange()
+                )
+                self.log_sink.submit(log_channel, embed)
         except discord.Forbidden:
             await ctx.send("❌ I don't have permission to kick that user")
         except Exception as e:
@@ -281,19 +263,17 @@ class Moderation(commands.Cog):
             
             await ctx.send(embed=embed)
             
-            channel_id = await self.config_manager.get_log_channel(ctx.guild.id, 'antinuke')
-            if channel_id:
-                log_channel = ctx.guild.get_channel(channel_id)
-                if log_channel:
-                    log_embed = create_log_embed(
-                        "🔇 Member Muted",
-                        f"**Moderator:** {ctx.author.mention}\n"
-                        f"**User:** {member.mention} ({member.name}#{member.discriminator} - {member.id})\n"
-                        f"**Duration:** {duration_str}\n"
-                        f"**Reason:** {reason}",
-                        discord.Color.dark_grey()
-                    )
-                    await log_channel.send(embed=log_embed)
+            log_channel = await self.log_sink.resolve(ctx.guild, 'antinuke')
+            if log_channel:
+                log_embed = create_log_embed(
+                    "🔇 Member Muted",
+                    f"**Moderator:** {ctx.author.mention}\n"
+                    f"**User:** {member.mention} ({member.name}#{member.discriminator} - {member.id})\n"
+                    f"**Duration:** {duration_str}\n"
+                    f"**Reason:** {reason}",
+                    discord.Color.dark_grey()
+                )
+                self.log_sink.submit(log_channel, log_embed)
         except discord.Forbidden:
             await ctx.send("❌ I don't have permission to mute that user")
         except Exception as e:
@@ -330,17 +310,15 @@ class Moderation(commands.Cog):
             
             await ctx.send(f"✅ Unmuted {member.mention}")
             
-            channel_id = await self.config_manager.get_log_channel(ctx.guild.id, 'antinuke')
-            if channel_id:
-                log_channel = ctx.guild.get_channel(channel_id)
-                if log_channel:
-                    embed = create_log_embed(
-                        "🔊 Member Unmuted",
-                        f"**Moderator:** {ctx.author.mention}\n"
-                        f"**User:** {member.mention} ({member.name}#{member.discriminator} - {member.id})",
-                        discord.Color.green()
-                    )
-                    await log_channel.send(embed=embed)
+            log_channel = await self.log_sink.resolve(ctx.guild, 'antinuke')
+            if log_channel:
+                embed = create_log_embed(
+                    "🔊 Member Unmuted",
+                    f"**Moderator:** {ctx.author.mention}\n"
+                    f"**User:** {member.mention} ({member.name}#{member.discriminator} - {member.id})",
+                    discord.Color.green()
+                )
+                self.log_sink.submit(log_channel, embed)
         except discord.Forbidden:
             await ctx.send("❌ I don't have permission to unmute that user")
         except Exception as e:
@@ -366,7 +344,7 @@ class Moderation(commands.Cog):
         if 'config' not in guild_data:
             guild_data['config'] = {}
         guild_data['config']['mute_role'] = role.id
-        await self.save_mutes_data(ctx.guild.id, guild_data)
+        await self.save_mutes_data(ctx.guild.id, guild_data, rows=[])
         
         await ctx.send(f"✅ Set mute role to {role.mention}")
     
@@ -387,18 +365,16 @@ class Moderation(commands.Cog):
             await self.config_manager.add_hardban(ctx.guild.id, user.id, reason, ctx.author.id)
             await ctx.send(f"✅ Hardbanned {user.mention} | Reason: {reason}")
             
-            channel_id = await self.config_manager.get_log_channel(ctx.guild.id, 'antinuke')
-            if channel_id:
-                log_channel = ctx.guild.get_channel(channel_id)
-                if log_channel:
-                    embed = create_log_embed(
-                        "🔨 Member Hardbanned",
-                        f"**Moderator:** {ctx.author.mention}\n"
-                        f"**User:** {user.mention} ({user.name}#{user.discriminator} - {user.id})\n"
-                        f"**Reason:** {reason}",
-                        discord.Color.dark_red()
-                    )
-                    await log_channel.send(embed=embed)
+            log_channel = await self.log_sink.resolve(ctx.guild, 'antinuke')
+            if log_channel:
+                embed = create_log_embed(
+                    "🔨 Member Hardbanned",
+                    f"**Moderator:** {ctx.author.mention}\n"
+                    f"**User:** {user.mention} ({user.name}#{user.discriminator} - {user.id})\n"
+                    f"**Reason:** {reason}",
+                    discord.Color.dark_red()
+                )
+                self.log_sink.submit(log_channel, embed)
         except discord.Forbidden:
             await ctx.send("❌ I don't have permission to ban that user")
         except Exception as e:
@@ -469,33 +445,30 @@ class Moderation(commands.Cog):
             hardbans = await self.config_manager.get_hardbans(guild.id)
             
             if str(user.id) in hardbans:
-                await asyncio.sleep(1)
-                
-                async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.unban):
-                    if entry.target.id == user.id:
-                        executor = entry.user
-                        
-                        if executor.bot:
-                            return
-                        
-                        warning_key = f"{guild.id}_{executor.id}_{user.id}"
-                        warning_count = self.unban_warnings.get(warning_key, 0)
-                        
-                        if warning_count == 0:
-                            try:
-                                await executor.send(f"⚠️ Hey buddy, the guy you just unbanned ({user.name}#{user.discriminator}) is hard banned... don't try to unban them!")
-                            except:
-                                pass
-                            self.unban_warnings[warning_key] = 1
-                        elif warning_count == 1:
-                            try:
-                                await executor.send(f"⚠️⚠️ If you do it again you'll get the wrath of god! Seriously, stop trying to unban {user.name}#{user.discriminator}!")
-                            except:
-                                pass
-                            self.unban_warnings[warning_key] = 2
-                        
-                        await guild.ban(user, reason=f"Hardban re-applied (was unbanned by {executor})")
-                        break
+                entry = await self.audit_logs.find(guild, discord.AuditLogAction.unban, user.id)
+                if entry:
+                    executor = entry.user
+                    
+                    if executor.bot:
+                        return
+                    
+                    warning_key = f"{guild.id}_{executor.id}_{user.id}"
+                    warning_count = self.unban_warnings.get(warning_key, 0)
+                    
+                    if warning_count == 0:
+                        try:
+                            await executor.send(f"⚠️ Hey buddy, the guy you just unbanned ({user.name}#{user.discriminator}) is hard banned... don't try to unban them!")
+                        except:
+                            pass
+                        self.unban_warnings[warning_key] = 1
+                    elif warning_count == 1:
+                        try:
+                            await executor.send(f"⚠️⚠️ If you do it again you'll get the wrath of god! Seriously, stop trying to unban {user.name}#{user.discriminator}!")
+                        except:
+                            pass
+                        self.unban_warnings[warning_key] = 2
+                    
+                    await guild.ban(user, reason=f"Hardban re-applied (was unbanned by {executor})")
         except Exception as e:
             print(f"Error in on_member_unban: {e}")
     
@@ -0,0 +1,154 @@
+import discord
+from discord.ext import commands, tasks
+import asyncio
+import os
+from datetime import datetime
+import config
+from utils.checks import is_bot_owner
+from utils.loop_monitor import LoopMonitor
+from utils.metrics import Metrics
+from utils.storage import get_storage
+
+INTENTS = discord.Intents(guilds=True)
+
+CATEGORIES = ('listener', 'event', 'command', 'lock', 'storage', 'loop')
+
+
+class Perf(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.metrics = Metrics()
+        self.dump_metrics.start()
+    
+    def cog_unload(self):
+        self.dump_metrics.cancel()
+    
+    async def dump(self):
+        snapshot = self.metrics.snapshot()
+        await asyncio.get_running_loop().run_in_executor(None, self.metrics.dump, config.PERF_DUMP_FILE, snapshot)
+    
+    @tasks.loop(seconds=config.PERF_DUMP_INTERVAL)
+    async def dump_metrics(self):
+        try:
+            await self.dump()
+        except Exception as e:
+            print(f"Error dumping metrics: {e}")
+    
+    @dump_metrics.before_loop
+    async def before_dump_metrics(self):
+        await self.bot.wait_until_ready()
+    
+    def format_rows(self, rows) -> str:
+        lines = [f"{'handler':<34} {'count':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+        for (category, owner, name), stats in rows:
+            label = f"{owner}.{name}"[:34]
+            lines.append(
+                f"{label:<34} {stats['count']:>7} "
+                + " ".join(f"{stats[p] * 1000:>6.1f}ms" for p in ('p50', 'p95', 'p99', 'max'))
+            )
+        return "```\n" + "\n".join(lines) + "\n```"
+    
+    @commands.group(name='perf', invoke_without_command=True)
+    @is_bot_owner()
+    async def perf(self, ctx, category: str = None):
+        if category is not None and category not in CATEGORIES:
+            await ctx.send(f"❌ Category must be one of: {', '.join(CATEGORIES)}")
+            return
+        
+        rows = self.metrics.top(category, limit=15)
+        if not rows:
+            await ctx.send("No timings recorded yet")
+            return
+        
+        since = datetime.utcfromtimestamp(self.metrics.since).strftime('%Y-%m-%d %H:%M:%S UTC')
+        title = f"**Slowest {category or 'handlers'} by p99** (since {since})"
+        message = f"{title}\n{self.format_rows(rows)}"
+        
+        errors = sorted(self.metrics.errors.items(), key=lambda item: item[1], reverse=True)[:5]
+        if errors:
+            message += "**Errors:** " + ", ".join(f"`{owner}.{name}` ×{count}" for (_, owner, name), count in errors)
+        await ctx.send(message[:2000])
+    
+    @perf.command(name='guilds')
+    @is_bot_owner()
+    async def perf_guilds(self, ctx):
+        rows = self.metrics.top_guilds()
+        if not rows:
+            await ctx.send("No guild timings recorded yet")
+            return
+        
+        lines = []
+        for guild_id, seconds in rows:
+            guild = self.bot.get_guild(guild_id)
+            name = guild.name if guild else "unknown"
+            lines.append(f"`{guild_id}` {name}: **{seconds:.2f}s**")
+        
+        embed = discord.Embed(
+            title="Time Spent per Guild",
+            description="\n".join(lines),
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text="Commands and dispatched event handlers")
+        await ctx.send(embed=embed)
+    
+    @perf.command(name='loop')
+    @is_bot_owner()
+    async def perf_loop(self, ctx):
+        monitor = LoopMonitor()
+        stats = monitor.stats()
+        
+        embed = discord.Embed(title="Event Loop", color=discord.Color.blue())
+        embed.add_field(
+            name="Scheduling Lag (last 60s)",
+            value=f"**Now:** {stats['current'] * 1000:.1f}ms\n"
+                  f"**p50:** {stats['p50'] * 1000:.1f}ms\n"
+                  f"**p99:** {stats['p99'] * 1000:.1f}ms\n"
+                  f"**Max:** {stats['max'] * 1000:.1f}ms",
+            inline=True
+        )
+        
+        heartbeats = "\n".join(f"**Shard {shard_id}:** {latency * 1000:.0f}ms" for shard_id, latency in self.bot.latencies[:10])
+        embed.add_field(name="Gateway Heartbeat", value=heartbeats or "Not connected", inline=True)
+        
+        recent = []
+        for block in list(monitor.blocks)[-3:]:
+            at = datetime.utcfromtimestamp(block['at']).strftime('%H:%M:%S')
+            where = "no stack captured"
+            if block['stack']:
+                where = block['stack'][-1].strip().splitlines()[0]
+            recent.append(f"`{at}` **{block['blocked'] * 1000:.0f}ms** {where}"[:300])
+        embed.add_field(
+            name=f"Blocks over {config.LOOP_BLOCK_THRESHOLD_MS}ms ({stats['blocks']:,})",
+            value="\n".join(recent) or "None",
+            inline=False
+        )
+        embed.set_footer(text=f"Full stacks in {config.LOOP_LOG_FILE}")
+        await ctx.send(embed=embed)
+    
+    @perf.command(name='files')
+    @is_bot_owner()
+    async def perf_files(self, ctx):
+        storage = get_storage()
+        file_stats = getattr(storage, 'file_stats', {})
+        if not file_stats:
+            await ctx.send("No data files encoded or decoded yet")
+            return
+        
+        lines = [f"{'file':<22} {'size':>9} {'decode':>9} {'encode':>9}"]
+        for filepath, stats in sorted(file_stats.items(), key=lambda item: item[1]['bytes'], reverse=True):
+            lines.append(
+                f"{os.path.basename(filepath)[:22]:<22} {stats['bytes'] / 1024:>7.0f}KB "
+                f"{stats['decode'] * 1000:>7.1f}ms {stats['encode'] * 1000:>7.1f}ms"
+            )
+        await ctx.send(f"**Data files** (codec `{storage.codec}`, `{storage.executor}` executor)\n```\n" + "\n".join(lines) + "\n```")
+    
+    @perf.command(name='reset')
+    @is_bot_owner()
+    async def perf_reset(self, ctx):
+        await self.dump()
+        self.metrics.reset()
+        await ctx.send(f"✅ Timings dumped to `{config.PERF_DUMP_FILE}` and reset")
+
+
+async def setup(bot):
+    await bot.add_cog(Perf(bot))
@@ -3,6 +3,8 @@ from discord.ext import commands
 from utils.config_manager import ConfigManager
 from utils.checks import is_admin
 
+INTENTS = discord.Intents(guilds=True)
+
 class Roleplay(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -128,12 +130,7 @@ class Roleplay(commands.Cog):
             await ctx.send(f"❌ No GIF set for `.{command}`")
             return
         
-        async with self.config_manager._lock:
-            import config as cfg
-            data = await self.config_manager._read_json(cfg.ROLEPLAY_GIFS_FILE)
-            if str(ctx.guild.id) in data and command in data[str(ctx.guild.id)]:
-                del data[str(ctx.guild.id)][command]
-                await self.config_manager._write_json(cfg.ROLEPLAY_GIFS_FILE, data)
+        await self.config_manager.remove_roleplay_gif(ctx.guild.id, command)
         
         await ctx.send(f"✅ Removed GIF for `.{command}`")
     
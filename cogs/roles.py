@@ -1,21 +1,27 @@
 import discord
 from discord.ext import commands
 from utils.config_manager import ConfigManager
+from utils.dispatch import EventContext, EventDispatcher
 from utils.formatting import create_log_embed
+from utils.log_sink import LogSink
 from datetime import datetime
 import asyncio
 
+INTENTS = discord.Intents(guilds=True, members=True)
+
 class Roles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config_manager = ConfigManager()
+        self.log_sink = LogSink()
+        self.events = EventDispatcher()
+        self.events.register('guild_role_create', self.on_guild_role_create)
+    
+    def cog_unload(self):
+        self.events.unregister(self)
     
     async def log_role_action(self, guild: discord.Guild, action: str, member: discord.Member, role: discord.Role, actor: discord.Member):
-        channel_id = await self.config_manager.get_log_channel(guild.id, 'roles')
-        if not channel_id:
-            return
-        
-        log_channel = guild.get_channel(channel_id)
+        log_channel = await self.log_sink.resolve(guild, 'roles')
         if not log_channel:
             return
         
@@ -30,10 +36,7 @@ class Roles(commands.Cog):
             color
         )
         
-        try:
-            await log_channel.send(embed=embed)
-        except:
-            pass
+        self.log_sink.submit(log_channel, embed)
     
     @commands.command(name='r', aliases=['role'])
     async def assign_role(self, ctx, member: discord.Member = None, *, role: discord.Role = None):
@@ -93,32 +96,25 @@ class Roles(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Error: {e}")
     
-    @commands.Cog.listener()
-    async def on_guild_role_create(self, role):
+    async def on_guild_role_create(self, event: EventContext, role):
         try:
-            await asyncio.sleep(1)
-            async for entry in role.guild.audit_logs(limit=1, action=discord.AuditLogAction.role_create):
-                if entry.target.id == role.id:
-                    executor = entry.user
-                    
-                    channel_id = await self.config_manager.get_log_channel(role.guild.id, 'roles')
-                    if not channel_id:
-                        return
-                    
-                    log_channel = role.guild.get_channel(channel_id)
-                    if not log_channel:
-                        return
-                    
-                    embed = create_log_embed(
-                        "Role Created",
-                        f"**Creator:** {executor.mention} ({executor.name}#{executor.discriminator} - {executor.id})\n"
-                        f"**Role:** {role.mention}\n"
-                        f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
-                        discord.Color.blue()
-                    )
-                    
-                    await log_channel.send(embed=embed)
-                    break
+            entry = await event.audit_entry(discord.AuditLogAction.role_create, role.id)
+            if entry:
+                executor = entry.user
+                
+                log_channel = await event.log_destination('roles')
+                if not log_channel:
+                    return
+                
+                embed = create_log_embed(
+                    "Role Created",
+                    f"**Creator:** {executor.mention} ({executor.name}#{executor.discriminator} - {executor.id})\n"
+                    f"**Role:** {role.mention}\n"
+                    f"**Time:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S UTC')}",
+                    discord.Color.blue()
+                )
+                
+                self.log_sink.submit(log_channel, embed)
         except Exception as e:
             print(f"Error in on_guild_role_create: {e}")
 
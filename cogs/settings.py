@@ -3,6 +3,8 @@ from discord.ext import commands
 from utils.config_manager import ConfigManager
 from utils.checks import is_owner, is_admin
 
+INTENTS = discord.Intents(guilds=True)
+
 class Settings(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
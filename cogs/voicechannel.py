@@ -1,15 +1,24 @@
 import discord
 from discord.ext import commands
+from utils.dispatch import EventContext, EventDispatcher
 from utils.vc_manager import VCManager
 from utils.formatting import create_embed
 import asyncio
 
+INTENTS = discord.Intents(guilds=True, members=True, voice_states=True)
+
 class VoiceChannel(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.vc_manager = VCManager()
+        self.events = EventDispatcher()
+        self.events.register('voice_state_update', self.on_voice_state_update)
+        self.events.register('guild_channel_delete', self.on_guild_channel_delete)
         self.dashboards = {}
     
+    def cog_unload(self):
+        self.events.unregister(self)
+    
     async def create_dashboard(self, channel: discord.VoiceChannel, owner: discord.Member):
         vc_data = await self.vc_manager.get_vc_data(channel.id)
         if not vc_data:
@@ -84,8 +93,7 @@ class VoiceChannel(commands.Cog):
         owner_id = await self.get_vc_owner(channel_id)
         return owner_id == user_id if owner_id else False
     
-    @commands.Cog.listener()
-    async def on_voice_state_update(self, member, before, after):
+    async def on_voice_state_update(self, event: EventContext, member, before, after):
         if before.channel and before.channel != after.channel:
             vc_data = await self.vc_manager.get_vc_data(before.channel.id)
             if vc_data and vc_data['owner_id'] == member.id:
@@ -96,8 +104,7 @@ class VoiceChannel(commands.Cog):
             if vc_data and vc_data['owner_id'] == member.id:
                 self.vc_manager.clear_owner_left_time(after.channel.id)
     
-    @commands.Cog.listener()
-    async def on_guild_channel_delete(self, channel):
+    async def on_guild_channel_delete(self, event: EventContext, channel):
         if isinstance(channel, discord.VoiceChannel):
             await self.vc_manager.delete_vc(channel.id)
     
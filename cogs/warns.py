@@ -2,29 +2,26 @@ import discord
 from discord.ext import commands
 from utils.config_manager import ConfigManager
 from utils.formatting import create_log_embed, paginate_list
+from utils.log_sink import LogSink
 from utils.checks import is_admin, has_fake_permission
 import config
 from datetime import datetime
 import uuid
 
+INTENTS = discord.Intents(guilds=True, members=True)
+
 
 class Warns(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config_manager = ConfigManager()
+        self.log_sink = LogSink()
     
     async def get_warns_data(self, guild_id: int) -> dict:
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.WARNS_DATA_FILE)
-            if str(guild_id) not in data:
-                data[str(guild_id)] = {'users': {}, 'config': {}}
-            return data.get(str(guild_id), {'users': {}, 'config': {}})
+        return await self.config_manager.get_guild_data(config.WARNS_DATA_FILE, guild_id, {'users': {}, 'config': {}})
     
-    async def save_warns_data(self, guild_id: int, guild_data: dict):
-        async with self.config_manager._lock:
-            data = await self.config_manager._read_json(config.WARNS_DATA_FILE)
-            data[str(guild_id)] = guild_data
-            await self.config_manager._write_json(config.WARNS_DATA_FILE, data)
+    async def save_warns_data(self, guild_id: int, guild_data: dict, rows: list = None):
+        await self.config_manager.save_guild_data(config.WARNS_DATA_FILE, guild_id, guild_data, rows)
     
     async def get_warn_config(self, guild_id: int) -> dict:
         guild_data = await self.get_warns_data(guild_id)
@@ -39,7 +36,7 @@ class Warns(commands.Cog):
         if 'config' not in guild_data:
             guild_data['config'] = {}
         guild_data['config'][key] = value
-        await self.save_warns_data(guild_id, guild_data)
+        await self.save_warns_data(guild_id, guild_data, rows=[])
     
     async def get_user_warns(self, guild_id: int, user_id: int) -> list:
         guild_data = await self.get_warns_data(guild_id)
@@ -61,7 +58,7 @@ class Warns(commands.Cog):
         }
         
         guild_data['users'][str(user_id)].append(warn_data)
-        await self.save_warns_data(guild_id, guild_data)
+        await self.save_warns_data(guild_id, guild_data, [user_id])
         return warn_data
     
     async def remove_warn(self, guild_id: int, user_id: int, warn_id: str) -> bool:
@@ -74,7 +71,7 @@ class Warns(commands.Cog):
         for i, warn in enumerate(warns):
             if warn['id'] == warn_id:
                 warns.pop(i)
-                await self.save_warns_data(guild_id, guild_data)
+                await self.save_warns_data(guild_id, guild_data, [user_id])
                 return True
         
         return False
@@ -87,7 +84,7 @@ class Warns(commands.Cog):
         
         count = len(guild_data['users'][str(user_id)])
         guild_data['users'][str(user_id)] = []
-        await self.save_warns_data(guild_id, guild_data)
+        await self.save_warns_data(guild_id, guild_data, [user_id])
         return count
     
     async def execute_action(self, ctx, member: discord.Member, action: str, warn_count: int):
@@ -118,11 +115,7 @@ class Warns(commands.Cog):
             return f"❌ Error executing action: {e}"
     
     async def log_warn(self, ctx, member: discord.Member, warn_data: dict, action_msg: str = None):
-        channel_id = await self.config_manager.get_log_channel(ctx.guild.id, 'antinuke')
-        if not channel_id:
-            return
-        
-        log_channel = ctx.guild.get_channel(channel_id)
+        log_channel = await self.log_sink.resolve(ctx.guild, 'antinuke')
         if not log_channel:
             return
         
@@ -142,10 +135,7 @@ class Warns(commands.Cog):
             discord.Color.orange()
         )
         
-        try:
-            await log_channel.send(embed=embed)
-        except:
-            pass
+        self.log_sink.submit(log_channel, embed)
     
     @commands.group(name='warn', invoke_without_command=True)
     async def warn(self, ctx, member: discord.Member = None, *, reason: str = "No reason provided"):
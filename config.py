@@ -8,6 +8,44 @@ OWNER_ID = int(os.getenv('OWNER_ID', 0))
 
 COMMAND_PREFIX = '.'
 
+CONFIG_FLUSH_INTERVAL = float(os.getenv('CONFIG_FLUSH_INTERVAL', 5))
+XP_FLUSH_INTERVAL = float(os.getenv('XP_FLUSH_INTERVAL', 10))
+LEADERBOARD_SNAPSHOT_PAGES = 50
+VOICE_XP_INTERVAL = 60
+
+AUDIT_LOG_DELAY = 1.0
+AUDIT_LOG_FETCH_LIMIT = 10
+AUDIT_LOG_CACHE_TTL = 15
+AUDIT_LOG_WAIT = 3.0
+
+ACTION_TRACKER_MAX_KEYS = int(os.getenv('ACTION_TRACKER_MAX_KEYS', 100000))
+ACTION_TRACKER_SWEEP_INTERVAL = 300
+PUNISHMENT_CONCURRENCY = 4
+PUNISHMENT_RESERVED = 2
+ROLLBACK_CONCURRENCY = 5
+ROLLBACK_RETENTION = 3600
+ROLLBACK_MAX_OBJECTS = 1000
+DANGEROUS_PERMISSIONS = ['administrator', 'ban_members', 'kick_members', 'manage_channels', 'manage_roles']
+
+LOG_FLUSH_INTERVAL = 1.0
+LOG_QUEUE_MAX = 1000
+LOG_COLLAPSE_DEPTH = 100
+LOG_MAX_RETRIES = 3
+LOG_RETRY_BACKOFF = 1.0
+LOG_WEBHOOK_POOL_SIZE = 20
+LOG_IDLE_TIMEOUT = 300
+
+CACHE_PROFILE = os.getenv('CACHE_PROFILE', 'full')
+MAX_MESSAGES = int(os.getenv('MAX_MESSAGES', 1000))
+
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 0))
+CLUSTER_COUNT = int(os.getenv('CLUSTER_COUNT', 2))
+CLUSTER_ID = int(os.getenv('CLUSTER_ID', 0))
+CLUSTER_SHARD_IDS = [int(shard) for shard in os.getenv('CLUSTER_SHARD_IDS').split(',')] if os.getenv('CLUSTER_SHARD_IDS') else None
+CLUSTER_SOCKET = os.getenv('CLUSTER_SOCKET', 'data/cluster.sock')
+CLUSTER_IPC_TIMEOUT = 5.0
+CLUSTER_RESTART_DELAY = 5.0
+
 DATA_DIR = 'data'
 os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -22,3 +60,38 @@ ECONOMY_DATA_FILE = f'{DATA_DIR}/economy_data.json'
 WARNS_DATA_FILE = f'{DATA_DIR}/warns_data.json'
 MUTES_DATA_FILE = f'{DATA_DIR}/mutes_data.json'
 BOOSTERS_DATA_FILE = f'{DATA_DIR}/boosters_data.json'
+
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json')
+SQLITE_FILE = f'{DATA_DIR}/bot.db'
+
+JOURNAL_DIR = f'{DATA_DIR}/journal' if CLUSTER_SHARD_IDS is None else f'{DATA_DIR}/journal/cluster-{CLUSTER_ID}'
+JOURNAL_FSYNC = os.getenv('JOURNAL_FSYNC', 'false').lower() in ('1', 'true', 'yes')
+STORAGE_SYNC_INTERVAL = float(os.getenv('STORAGE_SYNC_INTERVAL', 1))
+JSON_CODEC = os.getenv('JSON_CODEC', 'json')
+SERIALIZE_EXECUTOR = os.getenv('SERIALIZE_EXECUTOR', 'thread')
+SERIALIZE_WORKERS = int(os.getenv('SERIALIZE_WORKERS', 2))
+SERIALIZE_PROCESS_BYTES = int(os.getenv('SERIALIZE_PROCESS_BYTES', 1_000_000))
+
+PERF_DUMP_INTERVAL = float(os.getenv('PERF_DUMP_INTERVAL', 300))
+PERF_DUMP_FILE = f'{DATA_DIR}/perf.json' if CLUSTER_SHARD_IDS is None else f'{DATA_DIR}/perf-{CLUSTER_ID}.json'
+
+LOOP_MONITOR_INTERVAL = 0.1
+LOOP_BLOCK_THRESHOLD_MS = int(os.getenv('LOOP_BLOCK_THRESHOLD_MS', 250))
+LOOP_BLOCK_HISTORY = 20
+LOOP_STACK_DEPTH = 15
+LOOP_LOG_FILE = f'{DATA_DIR}/loop.log' if CLUSTER_SHARD_IDS is None else f'{DATA_DIR}/loop-{CLUSTER_ID}.log'
+LOOP_LOG_MAX_BYTES = 1_000_000
+
+DATA_FILES = {
+    CONFIG_FILE: {"guilds": {}},
+    HARDBANS_FILE: {"hardbans": {}},
+    FAKE_PERMS_FILE: {"permissions": {}},
+    ROLEPLAY_GIFS_FILE: {"gifs": {}},
+    VC_DATA_FILE: {"voice_channels": {}},
+    ANTINUKE_DATA_FILE: {"whitelisted_users": [], "whitelisted_roles": [], "thresholds": {}, "warned_users": {}},
+    LEVELING_DATA_FILE: {},
+    ECONOMY_DATA_FILE: {},
+    WARNS_DATA_FILE: {},
+    MUTES_DATA_FILE: {},
+    BOOSTERS_DATA_FILE: {}
+}
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from typing import Dict, List
+import aiohttp
+import config
+from utils.cluster import encode
+
+GATEWAY_URL = 'https://discord.com/api/v10/gateway/bot'
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+
+class Hub:
+    # IPC hub the clusters connect to. A request from one cluster is sent to
+    # every connected cluster and the replies are returned to the requester
+    # once all have answered or the request's timeout has passed; clusters
+    # that did not answer in time are reported with an error reply.
+    def __init__(self):
+        self.clusters: Dict[int, asyncio.StreamWriter] = {}
+        self.requests: Dict[str, Dict] = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        cluster_id = None
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                if message['op'] == 'hello':
+                    cluster_id = message['cluster_id']
+                    self.clusters[cluster_id] = writer
+                    print(f"✅ Cluster {cluster_id} connected to IPC")
+                elif message['op'] == 'request':
+                    asyncio.create_task(self.fan_out(writer, message))
+                elif message['op'] == 'reply':
+                    request = self.requests.get(message['nonce'])
+                    if request is not None:
+                        request['replies'][cluster_id] = message['data']
+                        if len(request['replies']) >= request['expected']:
+                            request['done'].set()
+        except Exception as e:
+            print(f"Error in IPC connection for cluster {cluster_id}: {e}")
+        finally:
+            if cluster_id is not None and self.clusters.get(cluster_id) is writer:
+                del self.clusters[cluster_id]
+            writer.close()
+
+    async def fan_out(self, requester: asyncio.StreamWriter, message: Dict):
+        nonce = message['nonce']
+        targets = dict(self.clusters)
+        request = self.requests[nonce] = {'replies': {}, 'expected': len(targets), 'done': asyncio.Event()}
+
+        command = encode({'op': 'command', 'nonce': nonce, 'command': message['command'], 'args': message['args']})
+        for writer in targets.values():
+            writer.write(command)
+        try:
+            await asyncio.wait_for(request['done'].wait(), message['timeout'])
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self.requests[nonce]
+        for cluster_id in targets.keys() - request['replies'].keys():
+            request['replies'][cluster_id] = {'error': f"no reply within {message['timeout']}s"}
+
+        if not requester.is_closing():
+            requester.write(encode({'op': 'result', 'nonce': nonce, 'data': request['replies']}))
+
+
+async def recommended_shards() -> int:
+    headers = {'Authorization': f'Bot {config.DISCORD_TOKEN}'}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers=headers) as response:
+            response.raise_for_status()
+            return (await response.json())['shards']
+
+
+def split_shards(shard_count: int, cluster_count: int) -> List[List[int]]:
+    cluster_count = min(cluster_count, shard_count)
+    per_cluster, extra = divmod(shard_count, cluster_count)
+    clusters = []
+    start = 0
+    for cluster_id in range(cluster_count):
+        size = per_cluster + (1 if cluster_id < extra else 0)
+        clusters.append(list(range(start, start + size)))
+        start += size
+    return clusters
+
+
+async def run_cluster(cluster_id: int, shard_ids: List[int], shard_count: int, stopping: asyncio.Event):
+    env = dict(
+        os.environ,
+        CLUSTER_ID=str(cluster_id),
+        CLUSTER_SHARD_IDS=','.join(map(str, shard_ids)),
+        SHARD_COUNT=str(shard_count),
+        CLUSTER_SOCKET=config.CLUSTER_SOCKET
+    )
+    while not stopping.is_set():
+        print(f"🚀 Starting cluster {cluster_id} (shards {shard_ids[0]}-{shard_ids[-1]} of {shard_count})")
+        process = await asyncio.create_subprocess_exec(sys.executable, MAIN_SCRIPT, env=env)
+        stop = asyncio.create_task(stopping.wait())
+        exited = asyncio.create_task(process.wait())
+        await asyncio.wait({stop, exited}, return_when=asyncio.FIRST_COMPLETED)
+
+        if not exited.done():
+            process.terminate()
+            await exited
+            break
+        stop.cancel()
+        if stopping.is_set():
+            break
+        print(f"❌ Cluster {cluster_id} exited with code {process.returncode}, restarting in {config.CLUSTER_RESTART_DELAY}s")
+        try:
+            await asyncio.wait_for(stopping.wait(), config.CLUSTER_RESTART_DELAY)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def launch(cluster_count: int, shard_count: int):
+    if not shard_count:
+        shard_count = await recommended_shards()
+    clusters = split_shards(shard_count, cluster_count)
+
+    if os.path.exists(config.CLUSTER_SOCKET):
+        os.remove(config.CLUSTER_SOCKET)
+    hub = Hub()
+    server = await asyncio.start_unix_server(hub.handle, path=config.CLUSTER_SOCKET)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    print(f"✅ Launching {len(clusters)} cluster(s) for {shard_count} shard(s)")
+    try:
+        await asyncio.gather(*(
+            run_cluster(cluster_id, shard_ids, shard_count, stopping)
+            for cluster_id, shard_ids in enumerate(clusters)
+        ))
+    finally:
+        server.close()
+        await server.wait_closed()
+        if os.path.exists(config.CLUSTER_SOCKET):
+            os.remove(config.CLUSTER_SOCKET)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the bot as several processes, each owning a share of the gateway shards.")
+    parser.add_argument('--clusters', type=int, default=config.CLUSTER_COUNT, help="number of worker processes")
+    parser.add_argument('--shards', type=int, default=config.SHARD_COUNT, help="total shard count (0 = Discord's recommendation)")
+    args = parser.parse_args()
+
+    if not config.DISCORD_TOKEN:
+        print("❌ ERROR: Missing DISCORD_TOKEN in .env")
+        sys.exit(1)
+    if config.STORAGE_BACKEND != 'sqlite':
+        print("❌ ERROR: Cluster mode needs STORAGE_BACKEND=sqlite (run migrate_to_sqlite.py first)")
+        sys.exit(1)
+
+    asyncio.run(launch(args.clusters, args.shards))
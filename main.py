@@ -1,11 +1,81 @@
 import discord
 from discord.ext import commands
 import os
-import json
+import importlib
+import time
 from pathlib import Path
+import config
+from utils.audit_log import AuditLogService
+from utils.cluster import ClusterClient
+from utils.config_manager import ConfigManager
+from utils.log_sink import LogSink
+from utils.loop_monitor import LoopMonitor
+from utils.metrics import Metrics
 
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix=".", intents=intents, help_command=None)
+COGS = [
+    'cogs.dispatcher',
+    'cogs.logging',
+    'cogs.antinuke',
+    'cogs.moderation',
+    'cogs.roles',
+    'cogs.voicechannel',
+    'cogs.roleplay',
+    'cogs.settings',
+    'cogs.leveling',
+    'cogs.economy',
+    'cogs.warns',
+    'cogs.boosters',
+    'cogs.cluster',
+    'cogs.perf',
+]
+
+def required_intents() -> discord.Intents:
+    # Prefix commands and the audit-log push need these regardless of cogs;
+    # everything else is the union of what each cog module declares.
+    intents = discord.Intents(guilds=True, guild_messages=True, message_content=True, moderation=True)
+    for cog in COGS:
+        try:
+            intents |= importlib.import_module(cog).INTENTS
+        except Exception as e:
+            print(f'❌ Failed to read intents for {cog}: {e}')
+    return intents
+
+def bot_options() -> dict:
+    options = {'intents': required_intents(), 'max_messages': config.MAX_MESSAGES}
+    if config.CACHE_PROFILE == 'lean':
+        options['member_cache_flags'] = discord.MemberCacheFlags(voice=True, joined=True)
+        options['chunk_guilds_at_startup'] = False
+    if config.CLUSTER_SHARD_IDS is not None:
+        options['shard_ids'] = config.CLUSTER_SHARD_IDS
+        options['shard_count'] = config.SHARD_COUNT
+    elif config.SHARD_COUNT:
+        options['shard_count'] = config.SHARD_COUNT
+    return options
+
+class Bot(commands.AutoShardedBot):
+    # Every listener coroutine (cog listeners and @bot.event handlers) runs
+    # through _run_event and every command through invoke, so timing both
+    # covers all handlers without touching the cogs.
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            owner = getattr(coro, '__self__', None)
+            owner = owner.qualified_name if isinstance(owner, commands.Cog) else 'bot'
+            Metrics().record('listener', owner, coro.__name__, time.perf_counter() - started)
+    
+    async def invoke(self, ctx):
+        started = time.perf_counter()
+        try:
+            await super().invoke(ctx)
+        finally:
+            if ctx.command is not None:
+                owner = ctx.cog.qualified_name if ctx.cog else 'bot'
+                guild_id = ctx.guild.id if ctx.guild else None
+                Metrics().record('command', owner, ctx.command.qualified_name, time.perf_counter() - started, guild_id)
+
+bot = Bot(command_prefix=".", help_command=None, **bot_options())
 
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
@@ -17,41 +87,14 @@ if not DISCORD_TOKEN or not OWNER_ID:
     print("❌ ERROR: Missing DISCORD_TOKEN or OWNER_ID in .env")
     exit()
 
-def init_json_files():
-    files = {
-        "data/config.json": {"guilds": {}},
-        "data/hardbans.json": {"hardbans": {}},
-        "data/fake_perms.json": {"permissions": {}},
-        "data/roleplay_gifs.json": {"gifs": {}},
-        "data/vc_data.json": {"voice_channels": {}},
-        "data/antinuke_data.json": {"whitelisted_users": [], "whitelisted_roles": [], "thresholds": {}, "warned_users": {}},
-        "data/leveling_data.json": {},
-        "data/economy_data.json": {},
-        "data/warns_data.json": {},
-        "data/mutes_data.json": {},
-        "data/boosters_data.json": {}
-    }
-    for path, default in files.items():
-        if not os.path.exists(path):
-            with open(path, "w") as f:
-                json.dump(default, f, indent=4)
+async def init_data_files():
+    config_manager = ConfigManager()
+    await config_manager.storage.initialize(config.DATA_FILES)
+    await config_manager.recover()
+    config_manager.watch()
 
 async def load_cogs():
-    cogs = [
-        'cogs.logging',
-        'cogs.antinuke',
-        'cogs.moderation',
-        'cogs.roles',
-        'cogs.voicechannel',
-        'cogs.roleplay',
-        'cogs.settings',
-        'cogs.leveling',
-        'cogs.economy',
-        'cogs.warns',
-        'cogs.boosters',
-    ]
-    
-    for cog in cogs:
+    for cog in COGS:
         try:
             await bot.load_extension(cog)
             print(f'✅ Loaded {cog}')
@@ -61,9 +104,13 @@ async def load_cogs():
 @bot.event
 async def on_ready():
     print(f'✅ Bot is ready! Logged in as {bot.user.name} ({bot.user.id})')
-    print(f'✅ Connected to {len(bot.guilds)} guilds')
+    print(f'✅ Cluster {config.CLUSTER_ID}: shards {sorted(bot.shards)} of {bot.shard_count}, {len(bot.guilds)} guilds')
     await bot.change_presence(activity=discord.Activity(type=discord.ActivityType.watching, name=".ghelp"))
 
+@bot.event
+async def on_audit_log_entry_create(entry):
+    AuditLogService().push(entry)
+
 @bot.event
 async def on_command_error(ctx, error):
     if isinstance(error, commands.CommandNotFound):
@@ -77,13 +124,24 @@ async def on_command_error(ctx, error):
     elif isinstance(error, commands.CheckFailure):
         await ctx.send("❌ You don't have permission to use this command.")
     else:
+        Metrics().error('command', ctx.cog.qualified_name if ctx.cog else 'bot', str(ctx.command))
         print(f'Error in command {ctx.command}: {error}')
 
 async def main():
     async with bot:
-        init_json_files()
+        LoopMonitor().start()
+        await init_data_files()
         await load_cogs()
-        await bot.start(DISCORD_TOKEN)
+        await ClusterClient().connect()
+        try:
+            await bot.start(DISCORD_TOKEN)
+        finally:
+            await ClusterClient().close()
+            await LogSink().close()
+            for name in list(bot.cogs):
+                await bot.remove_cog(name)
+            await ConfigManager().close()
+            LoopMonitor().stop()
 
 if __name__ == '__main__':
     import asyncio
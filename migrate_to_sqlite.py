@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import os
+import sys
+import config
+from utils.storage import JSONStorage, SQLiteStorage
+
+
+async def migrate(force: bool):
+    if os.path.exists(config.SQLITE_FILE) and not force:
+        print(f"✗ {config.SQLITE_FILE} already exists. Re-run with --force to overwrite its contents.")
+        return False
+
+    source = JSONStorage()
+    target = SQLiteStorage(config.SQLITE_FILE)
+    await target.initialize(config.DATA_FILES)
+
+    try:
+        for filepath in config.DATA_FILES:
+            if not os.path.exists(filepath):
+                print(f"- {filepath} not found, skipping")
+                continue
+
+            data = await source.load(filepath)
+            await target.save(filepath, data)
+            print(f"✓ Imported {filepath} ({len(data)} entries)")
+    finally:
+        await target.close()
+
+    print(f"\n✅ Migration complete. Set STORAGE_BACKEND=sqlite in .env to use {config.SQLITE_FILE}.")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import the data/*.json files into the SQLite storage backend.")
+    parser.add_argument('--force', action='store_true', help="replace data already present in the database")
+    args = parser.parse_args()
+
+    if not asyncio.run(migrate(args.force)):
+        sys.exit(1)
@@ -18,6 +18,7 @@ except Exception as e:
 
 cogs_to_test = [
     'cogs.antinuke',
+    'cogs.dispatcher',
     'cogs.logging',
     'cogs.moderation',
     'cogs.roles',
@@ -27,7 +28,9 @@ cogs_to_test = [
     'cogs.leveling',
     'cogs.economy',
     'cogs.warns',
-    'cogs.boosters'
+    'cogs.boosters',
+    'cogs.cluster',
+    'cogs.perf'
 ]
 
 for cog in cogs_to_test:
@@ -39,9 +42,25 @@ for cog in cogs_to_test:
         sys.exit(1)
 
 utils_to_test = [
+    'utils.action_tracker',
+    'utils.audit_log',
     'utils.checks',
+    'utils.cluster',
     'utils.config_manager',
+    'utils.danger_index',
+    'utils.dispatch',
+    'utils.file_lock',
     'utils.formatting',
+    'utils.journal',
+    'utils.lock_manager',
+    'utils.log_sink',
+    'utils.loop_monitor',
+    'utils.members',
+    'utils.metrics',
+    'utils.punishment',
+    'utils.rank_index',
+    'utils.rollback',
+    'utils.storage',
     'utils.vc_manager'
 ]
 
@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Hashable
+
+
+class ActionTracker:
+    # Sliding-window counters keyed by (guild_id, user_id, action). Each key
+    # holds a deque of monotonic timestamps; expired ones are popped from the
+    # left as they fall out of the window, so every timestamp is touched once.
+    # Keys are kept in least-recently-hit order: sweep() drops keys idle for
+    # longer than the longest window seen, and past max_keys the least
+    # recently hit key is evicted.
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.longest_window = 0.0
+        self.evicted = 0
+        self.swept = 0
+        self._events: 'OrderedDict[Hashable, Deque[float]]' = OrderedDict()
+
+    def _expire(self, events: Deque[float], now: float, window: float):
+        cutoff = now - window
+        while events and events[0] <= cutoff:
+            events.popleft()
+
+    def _drop(self, key: Hashable):
+        del self._events[key]
+
+    def hit(self, key: Hashable, window: float) -> int:
+        now = time.monotonic()
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque()
+            if len(self._events) > self.max_keys:
+                self._drop(next(iter(self._events)))
+                self.evicted += 1
+        else:
+            self._events.move_to_end(key)
+            self._expire(events, now, window)
+
+        self.longest_window = max(self.longest_window, window)
+        events.append(now)
+        return len(events)
+
+    def sweep(self) -> int:
+        cutoff = time.monotonic() - self.longest_window
+        removed = 0
+        while self._events:
+            key, events = next(iter(self._events.items()))
+            if events and events[-1] > cutoff:
+                break
+            self._drop(key)
+            removed += 1
+        self.swept += removed
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            'keys': len(self._events),
+            'timestamps': sum(len(events) for events in self._events.values()),
+            'max_keys': self.max_keys,
+            'longest_window': self.longest_window,
+            'evicted': self.evicted,
+            'swept': self.swept
+        }
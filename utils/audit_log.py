@@ -0,0 +1,120 @@
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+import discord
+import config
+
+
+class AuditLogService:
+    # Correlates gateway events with their audit-log entries by target id.
+    # Entries pushed through on_audit_log_entry_create are cached and wake any
+    # listener waiting for that target for up to AUDIT_LOG_WAIT seconds. Guilds
+    # that have not delivered a push yet, and waits that time out, fall back to
+    # fetching so a dropped or late push never loses an event. Requests for
+    # one (guild, action) that arrive while a fetch is waiting share it.
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AuditLogService, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.fetch_delay = config.AUDIT_LOG_DELAY
+            self.fetch_limit = config.AUDIT_LOG_FETCH_LIMIT
+            self.cache_ttl = config.AUDIT_LOG_CACHE_TTL
+            self.wait_timeout = config.AUDIT_LOG_WAIT
+            self._pending: Dict[Tuple[int, discord.AuditLogAction], asyncio.Future] = {}
+            self._cache: Dict[Tuple[int, discord.AuditLogAction], Dict[int, discord.AuditLogEntry]] = {}
+            self._waiters: Dict[Tuple[int, discord.AuditLogAction, int], List[asyncio.Future]] = {}
+            self._push_guilds: Set[int] = set()
+            self.pushed = 0
+            self.push_misses = 0
+            self.requests = 0
+            self.api_calls = 0
+
+    def _is_fresh(self, entry: discord.AuditLogEntry) -> bool:
+        return (discord.utils.utcnow() - entry.created_at).total_seconds() <= self.cache_ttl
+
+    def _cached(self, guild_id: int, action: discord.AuditLogAction, target_ids) -> Optional[discord.AuditLogEntry]:
+        cache = self._cache.get((guild_id, action), {})
+        entries = [cache[t] for t in target_ids if t in cache and self._is_fresh(cache[t])]
+        return max(entries, key=lambda e: e.created_at, default=None)
+
+    def _store(self, key: Tuple[int, discord.AuditLogAction], entries: List[discord.AuditLogEntry]):
+        cache = {t: e for t, e in self._cache.get(key, {}).items() if self._is_fresh(e)}
+        for entry in reversed(entries):
+            target_id = getattr(entry.target, 'id', None)
+            if target_id is not None:
+                cache[target_id] = entry
+        self._cache[key] = cache
+
+    def push(self, entry: discord.AuditLogEntry):
+        self.pushed += 1
+        self._push_guilds.add(entry.guild.id)
+        key = (entry.guild.id, entry.action)
+        target_id = getattr(entry.target, 'id', None)
+        if target_id is None:
+            return
+
+        cache = self._cache.setdefault(key, {})
+        if len(cache) > 100:
+            cache = self._cache[key] = {t: e for t, e in cache.items() if self._is_fresh(e)}
+        cache[target_id] = entry
+
+        for future in self._waiters.pop(key + (target_id,), []):
+            if not future.done():
+                future.set_result(entry)
+
+    async def _wait(self, guild: discord.Guild, action: discord.AuditLogAction, target_ids) -> Optional[discord.AuditLogEntry]:
+        future = asyncio.get_running_loop().create_future()
+        keys = [(guild.id, action, target_id) for target_id in target_ids]
+        for key in keys:
+            self._waiters.setdefault(key, []).append(future)
+        try:
+            return await asyncio.wait_for(future, self.wait_timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            for key in keys:
+                waiters = self._waiters.get(key)
+                if waiters and future in waiters:
+                    waiters.remove(future)
+                    if not waiters:
+                        del self._waiters[key]
+
+    async def _fetch(self, guild: discord.Guild, action: discord.AuditLogAction) -> List[discord.AuditLogEntry]:
+        key = (guild.id, action)
+        try:
+            await asyncio.sleep(self.fetch_delay)
+        finally:
+            self._pending.pop(key, None)
+
+        self.api_calls += 1
+        entries = [entry async for entry in guild.audit_logs(limit=self.fetch_limit, action=action)]
+        self._store(key, entries)
+        return entries
+
+    async def fetch(self, guild: discord.Guild, action: discord.AuditLogAction) -> List[discord.AuditLogEntry]:
+        key = (guild.id, action)
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(guild, action))
+            self._pending[key] = future
+        return await asyncio.shield(future)
+
+    async def find(self, guild: discord.Guild, action: discord.AuditLogAction, *target_ids: int) -> Optional[discord.AuditLogEntry]:
+        self.requests += 1
+        entry = self._cached(guild.id, action, target_ids)
+        if entry is not None:
+            return entry
+
+        if guild.id in self._push_guilds:
+            entry = await self._wait(guild, action, target_ids)
+            if entry is not None:
+                return entry
+            self.push_misses += 1
+
+        await self.fetch(guild, action)
+        return self._cached(guild.id, action, target_ids)
@@ -8,6 +8,11 @@ def is_owner():
         return ctx.author.id == config.OWNER_ID or ctx.author.id == ctx.guild.owner_id
     return commands.check(predicate)
 
+def is_bot_owner():
+    async def predicate(ctx):
+        return ctx.author.id == config.OWNER_ID
+    return commands.check(predicate)
+
 def is_admin():
     async def predicate(ctx):
         if ctx.author.id == config.OWNER_ID or ctx.author.id == ctx.guild.owner_id:
@@ -0,0 +1,114 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+import config
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+def encode(message: Dict) -> bytes:
+    return json.dumps(message).encode() + b'\n'
+
+
+class ClusterClient:
+    # Connection from a cluster process to the launcher's IPC hub over a Unix
+    # socket, one JSON message per line. A request is fanned out by the hub to
+    # every connected cluster (this one included) and the replies come back
+    # keyed by cluster id. When the bot runs as a single process there is no
+    # hub and a request just runs the local handler, so callers need no
+    # special case.
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ClusterClient, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.cluster_id = config.CLUSTER_ID
+            self._handlers: Dict[str, Handler] = {}
+            self._pending: Dict[str, asyncio.Future] = {}
+            self._writer: Optional[asyncio.StreamWriter] = None
+            self._reader_task: Optional[asyncio.Task] = None
+            self._nonce = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    def register(self, command: str, handler: Handler):
+        self._handlers[command] = handler
+
+    def unregister(self, command: str):
+        self._handlers.pop(command, None)
+
+    async def connect(self):
+        if config.CLUSTER_SHARD_IDS is None or self.connected:
+            return
+        try:
+            reader, self._writer = await asyncio.open_unix_connection(config.CLUSTER_SOCKET)
+        except OSError as e:
+            print(f"Error connecting to cluster IPC at {config.CLUSTER_SOCKET}: {e}")
+            return
+        self._write({'op': 'hello', 'cluster_id': self.cluster_id})
+        self._reader_task = asyncio.create_task(self._read(reader))
+
+    async def _read(self, reader: asyncio.StreamReader):
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                if message['op'] == 'command':
+                    asyncio.create_task(self._answer(message))
+                elif message['op'] == 'result':
+                    future = self._pending.pop(message['nonce'], None)
+                    if future and not future.done():
+                        future.set_result({int(cluster_id): data for cluster_id, data in message['data'].items()})
+        except Exception as e:
+            print(f"Error reading from cluster IPC: {e}")
+        finally:
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("cluster IPC connection lost"))
+            self._pending.clear()
+
+    async def _run(self, command: str, args: Dict) -> Any:
+        handler = self._handlers.get(command)
+        if handler is None:
+            return {'error': f"unknown command {command}"}
+        try:
+            return await handler(**args)
+        except Exception as e:
+            return {'error': str(e)}
+
+    async def _answer(self, message: Dict):
+        data = await self._run(message['command'], message['args'])
+        if self.connected:
+            self._write({'op': 'reply', 'nonce': message['nonce'], 'data': data})
+
+    def _write(self, message: Dict):
+        self._writer.write(encode(message))
+
+    async def request(self, command: str, timeout: float = config.CLUSTER_IPC_TIMEOUT, **args) -> Dict[int, Any]:
+        if not self.connected:
+            return {self.cluster_id: await self._run(command, args)}
+
+        self._nonce += 1
+        nonce = f"{self.cluster_id}:{self._nonce}"
+        future = asyncio.get_running_loop().create_future()
+        self._pending[nonce] = future
+        self._write({'op': 'request', 'nonce': nonce, 'command': command, 'args': args, 'timeout': timeout})
+        try:
+            return await asyncio.wait_for(future, timeout + 1)
+        finally:
+            self._pending.pop(nonce, None)
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -1,12 +1,15 @@
-import json
-import aiofiles
 import asyncio
-from typing import Any, Dict, Optional
+import os
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 import config
+from utils.file_lock import file_lock
+from utils.lock_manager import LockManager
+from utils.metrics import Metrics
+from utils.journal import open_journal
+from utils.storage import ROW_COLLECTIONS, Changes, get_storage
 
 class ConfigManager:
     _instance = None
-    _lock = asyncio.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -16,55 +19,357 @@ class ConfigManager:
     def __init__(self):
         if not hasattr(self, 'initialized'):
             self.initialized = True
+            self.flush_interval = config.CONFIG_FLUSH_INTERVAL
+            self.storage = get_storage()
+            self.locks = LockManager()
+            self.journal = open_journal()
+            self._cache: Dict[str, Dict] = {}
+            self._dirty: Dict[str, Changes] = {}
+            self._flushing: Dict[str, Changes] = {}
+            self._flush_task: Optional[asyncio.Task] = None
+            self._flush_lock = asyncio.Lock()
+            self._whitelists: Dict[str, Tuple[FrozenSet[int], FrozenSet[int]]] = {}
+            self._stamps: Dict[str, Optional[int]] = {}
+            self._sync_task: Optional[asyncio.Task] = None
+            self.refreshes = 0
+            self.merges = 0
     
     async def _read_json(self, filepath: str) -> Dict:
-        try:
-            async with aiofiles.open(filepath, 'r') as f:
-                content = await f.read()
-                return json.loads(content)
-        except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError:
-            return {}
-    
-    async def _write_json(self, filepath: str, data: Dict):
-        async with aiofiles.open(filepath, 'w') as f:
-            await f.write(json.dumps(data, indent=4))
+        # Only cache misses touch storage, so only they are timed; writes are
+        # timed per flush as 'save', since every write goes through flush.
+        if filepath not in self._cache:
+            with Metrics().timer('storage', os.path.basename(filepath), 'read_json'):
+                stamp = file_lock(filepath).stamp()
+                data = await self.storage.load(filepath)
+            if filepath not in self._cache:
+                self._cache[filepath] = data
+                self._stamps[filepath] = stamp
+        return self._cache[filepath]
+    
+    def _mark_guilds(self, filepath: str, before: Dict, after: Dict, record: bool = True):
+        # Whole-file journal entries are marked per changed guild, so a flush
+        # that finds another process's write can still merge instead of
+        # overwriting the file.
+        changed = [g for g in set(before) | set(after) if g not in after or before.get(g) != after[g]]
+        for guild_id in changed:
+            self._mark_dirty(filepath, guild_id, record=record)
+    
+    def _mark_dirty(self, filepath: str, guild_id=None, rows: Optional[Iterable] = None, record: bool = True):
+        if rows is not None:
+            rows = [str(r) for r in rows]
+        if record:
+            self._record(filepath, guild_id, rows)
+        
+        if guild_id is None:
+            self._dirty[filepath] = None
+        elif filepath not in self._dirty or self._dirty[filepath] is not None:
+            changes = self._dirty.setdefault(filepath, {})
+            key = str(guild_id)
+            if rows is None:
+                changes[key] = None
+            elif changes.get(key, set()) is not None:
+                changes.setdefault(key, set()).update(rows)
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+    
+    def _row_source(self, filepath: str, guild: Dict) -> Dict:
+        collection = ROW_COLLECTIONS.get(filepath)
+        return guild if collection is None else guild.setdefault(collection, {})
+    
+    def _copy_document(self, filepath: str, target: Dict, source: Dict):
+        # Row-level changes also carry the guild's non-row keys (its config),
+        # which are small, so config-only saves can pass rows=[].
+        collection = ROW_COLLECTIONS.get(filepath)
+        if collection is None:
+            return
+        for key in [k for k in target if k != collection and k not in source]:
+            del target[key]
+        target.update((k, v) for k, v in source.items() if k != collection)
+    
+    def _record(self, filepath: str, guild_id, rows: Optional[list]):
+        data = self._cache.get(filepath, {})
+        if guild_id is None:
+            entry = {'f': filepath, 'g': None, 'v': data}
+        elif str(guild_id) not in data:
+            entry = {'f': filepath, 'g': str(guild_id), 'deleted': True}
+        elif rows is None or filepath not in ROW_COLLECTIONS:
+            entry = {'f': filepath, 'g': str(guild_id), 'v': data[str(guild_id)]}
+        else:
+            guild = data[str(guild_id)]
+            source = self._row_source(filepath, dict(guild))
+            document = {}
+            self._copy_document(filepath, document, guild)
+            entry = {
+                'f': filepath,
+                'g': str(guild_id),
+                'doc': document,
+                'r': {r: source[r] for r in rows if r in source},
+                'd': [r for r in rows if r not in source]
+            }
+        self.journal.record(entry)
+    
+    async def recover(self):
+        replayed = 0
+        for entry in self.journal.entries():
+            filepath, guild_id = entry['f'], entry['g']
+            data = await self._read_json(filepath)
+            
+            if guild_id is None:
+                previous = dict(data)
+                data.clear()
+                data.update(entry['v'])
+                self._mark_guilds(filepath, previous, data, record=False)
+            elif entry.get('deleted'):
+                data.pop(guild_id, None)
+                self._mark_dirty(filepath, guild_id, record=False)
+            elif 'r' in entry:
+                if 'doc' in entry:
+                    self._copy_document(filepath, data.setdefault(guild_id, {}), entry['doc'])
+                source = self._row_source(filepath, data.setdefault(guild_id, {}))
+                source.update(entry['r'])
+                for row in entry['d']:
+                    source.pop(row, None)
+                self._mark_dirty(filepath, guild_id, list(entry['r']) + entry['d'], record=False)
+            else:
+                data[guild_id] = entry['v']
+                self._mark_dirty(filepath, guild_id, record=False)
+            replayed += 1
+        
+        if replayed:
+            print(f"✅ Replayed {replayed} journal entries")
+            await self.flush()
+    
+    def _apply(self, filepath: str, fresh: Dict, cached: Dict, changes: Dict[str, Optional[Set[str]]]):
+        for guild_id, rows in changes.items():
+            if guild_id not in cached:
+                fresh.pop(guild_id, None)
+            elif rows is None or filepath not in ROW_COLLECTIONS:
+                fresh[guild_id] = cached[guild_id]
+            else:
+                self._copy_document(filepath, fresh.setdefault(guild_id, {}), cached[guild_id])
+                source = self._row_source(filepath, cached[guild_id])
+                target = self._row_source(filepath, fresh[guild_id])
+                for row in rows:
+                    if row in source:
+                        target[row] = source[row]
+                    else:
+                        target.pop(row, None)
+    
+    def _unflushed(self, filepath: str) -> Changes:
+        # Changes not on disk yet: the ones a running flush has taken and any
+        # made since.
+        combined = {}
+        for changes in (self._flushing.get(filepath, {}), self._dirty.get(filepath, {})):
+            if changes is None:
+                return None
+            for guild_id, rows in changes.items():
+                if rows is None or combined.get(guild_id, set()) is None:
+                    combined[guild_id] = None
+                else:
+                    combined.setdefault(guild_id, set()).update(rows)
+        return combined
+    
+    async def _reload(self, filepath: str) -> bool:
+        # Replaces the cached copy with what is on disk plus this process's
+        # unflushed changes. Guild data is partitioned by shard, so two
+        # processes rarely touch the same guild entry and merging per
+        # guild/row loses nothing.
+        lock = file_lock(filepath)
+        stamp = lock.stamp()
+        guilds = lock.changes_since(self._stamps.get(filepath))
+        if guilds is None:
+            fresh = await self.storage.load(filepath)
+        else:
+            fresh = await self.storage.load_guilds(filepath, guilds)
+        async with self.locks.write(filepath):
+            pending = self._unflushed(filepath)
+            if pending is None:
+                return False
+            cached = self._cache.get(filepath, {})
+            if guilds is not None:
+                pending = {g: rows for g, rows in pending.items() if g in guilds}
+            if pending:
+                self._apply(filepath, fresh, cached, pending)
+            if guilds is None:
+                self._cache[filepath] = fresh
+            else:
+                # Only the guilds other processes wrote are replaced.
+                for guild_id in guilds:
+                    if guild_id in fresh:
+                        cached[guild_id] = fresh[guild_id]
+                    else:
+                        cached.pop(guild_id, None)
+            self._stamps[filepath] = stamp
+            if filepath == config.ANTINUKE_DATA_FILE:
+                self._whitelists.clear()
+        return True
+    
+    def watch(self):
+        if config.STORAGE_SYNC_INTERVAL > 0 and (self._sync_task is None or self._sync_task.done()):
+            self._sync_task = asyncio.get_running_loop().create_task(self._watch())
+    
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(config.STORAGE_SYNC_INTERVAL)
+            for filepath in list(self._cache):
+                stamp = file_lock(filepath).stamp()
+                if stamp is None or stamp == self._stamps.get(filepath):
+                    continue
+                try:
+                    async with file_lock(filepath):
+                        if await self._reload(filepath):
+                            self.refreshes += 1
+                except Exception as e:
+                    print(f"Error refreshing {filepath}: {e}")
+    
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+    
+    async def flush(self):
+        async with self._flush_lock:
+            checkpoint = self.journal.rotate()
+            dirty, self._dirty = self._dirty, {}
+            self._flushing = dirty
+            failed = False
+            for filepath, changes in dirty.items():
+                try:
+                    lock = file_lock(filepath)
+                    async with lock:
+                        # A row-level backend only writes the changed
+                        # guilds/rows, so other processes' writes survive
+                        # without refreshing first; the cache stays behind
+                        # the file until the watcher picks them up.
+                        stale = lock.stamp() != self._stamps.get(filepath)
+                        partial = changes is not None and self.storage.partial_writes
+                        if stale and changes is not None and not partial:
+                            await self._reload(filepath)
+                            self.merges += 1
+                        with Metrics().timer('storage', os.path.basename(filepath), 'save'):
+                            await self.storage.save(filepath, self._cache[filepath], changes)
+                        stamp = lock.bump(None if changes is None else changes.keys())
+                        if not (stale and partial):
+                            self._stamps[filepath] = stamp
+                except Exception as e:
+                    print(f"Error flushing {filepath}: {e}")
+                    failed = True
+                    if changes is None:
+                        self._mark_dirty(filepath, record=False)
+                    else:
+                        for guild_id, rows in changes.items():
+                            self._mark_dirty(filepath, guild_id, rows, record=False)
+            
+            self._flushing = {}
+            if not failed:
+                self.journal.discard(checkpoint)
+    
+    async def close(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        await self.flush()
+        self.journal.close()
+        await self.storage.close()
+    
+    async def get_guild_data(self, filepath: str, guild_id: int, default: Dict) -> Dict:
+        async with self.locks.read(filepath, guild_id):
+            data = await self._read_json(filepath)
+            return data.get(str(guild_id), default)
+    
+    async def save_guild_data(self, filepath: str, guild_id: int, guild_data: Dict, rows: Optional[Iterable] = None):
+        async with self.locks.write(filepath, guild_id):
+            data = await self._read_json(filepath)
+            data[str(guild_id)] = guild_data
+            self._mark_dirty(filepath, guild_id, rows)
+    
+    def _mark_rows(self, filepath: str, keys: List[Tuple[str, str]]):
+        by_guild: Dict[str, List[str]] = {}
+        for guild_id, user_id in keys:
+            by_guild.setdefault(guild_id, []).append(user_id)
+        for guild_id, user_ids in by_guild.items():
+            self._mark_dirty(filepath, guild_id, user_ids)
+    
+    def _guild_rows(self, filepath: str, data: Dict):
+        collection = ROW_COLLECTIONS[filepath]
+        for guild_id, guild in data.items():
+            yield guild_id, guild if collection is None else guild.get(collection, {})
+    
+    async def update_rows(self, filepath: str, fn: Callable[[str, str, Any], bool]) -> List[Tuple[str, str]]:
+        # Calls fn(guild_id, user_id, row) on every row of a row-collection
+        # file; fn changes the row in place and returns True if it did.
+        changed = []
+        async with self.locks.write(filepath):
+            data = await self._read_json(filepath)
+            for guild_id, rows in self._guild_rows(filepath, data):
+                changed.extend((guild_id, user_id) for user_id, row in rows.items() if fn(guild_id, user_id, row))
+            self._mark_rows(filepath, changed)
+        return changed
+    
+    async def remove_rows(self, filepath: str, predicate: Callable[[str, str, Any], bool]) -> List[Tuple[str, str]]:
+        removed = []
+        async with self.locks.write(filepath):
+            data = await self._read_json(filepath)
+            for guild_id, rows in self._guild_rows(filepath, data):
+                for user_id in [u for u, row in rows.items() if predicate(guild_id, u, row)]:
+                    del rows[user_id]
+                    removed.append((guild_id, user_id))
+            self._mark_rows(filepath, removed)
+        return removed
+    
+    async def expire_mutes(self, now: float) -> List[Tuple[str, str]]:
+        return await self.remove_rows(
+            config.MUTES_DATA_FILE,
+            lambda guild_id, user_id, mute: bool(mute.get('expires')) and mute['expires'] <= now
+        )
     
     async def get_guild_config(self, guild_id: int) -> Dict:
-        async with self._lock:
+        async with self.locks.read(config.CONFIG_FILE, guild_id):
             data = await self._read_json(config.CONFIG_FILE)
             return data.get(str(guild_id), {})
     
     async def set_guild_config(self, guild_id: int, key: str, value: Any):
-        async with self._lock:
+        async with self.locks.write(config.CONFIG_FILE, guild_id):
             data = await self._read_json(config.CONFIG_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {}
             data[str(guild_id)][key] = value
-            await self._write_json(config.CONFIG_FILE, data)
+            self._mark_dirty(config.CONFIG_FILE, guild_id)
     
     async def get_log_channel(self, guild_id: int, log_type: str) -> Optional[int]:
         guild_config = await self.get_guild_config(guild_id)
         return guild_config.get('log_channels', {}).get(log_type)
     
     async def set_log_channel(self, guild_id: int, log_type: str, channel_id: int):
-        async with self._lock:
+        async with self.locks.write(config.CONFIG_FILE, guild_id):
             data = await self._read_json(config.CONFIG_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {}
             if 'log_channels' not in data[str(guild_id)]:
                 data[str(guild_id)]['log_channels'] = {}
             data[str(guild_id)]['log_channels'][log_type] = channel_id
-            await self._write_json(config.CONFIG_FILE, data)
+            self._mark_dirty(config.CONFIG_FILE, guild_id)
+    
+    async def set_log_webhook(self, guild_id: int, log_type: str, url: Optional[str]):
+        async with self.locks.write(config.CONFIG_FILE, guild_id):
+            data = await self._read_json(config.CONFIG_FILE)
+            if str(guild_id) not in data:
+                data[str(guild_id)] = {}
+            if 'log_webhooks' not in data[str(guild_id)]:
+                data[str(guild_id)]['log_webhooks'] = {}
+            if url:
+                data[str(guild_id)]['log_webhooks'][log_type] = url
+            else:
+                data[str(guild_id)]['log_webhooks'].pop(log_type, None)
+            self._mark_dirty(config.CONFIG_FILE, guild_id)
     
     async def get_hardbans(self, guild_id: int) -> Dict:
-        async with self._lock:
+        async with self.locks.read(config.HARDBANS_FILE, guild_id):
             data = await self._read_json(config.HARDBANS_FILE)
             return data.get(str(guild_id), {})
     
     async def add_hardban(self, guild_id: int, user_id: int, reason: str, banned_by: int):
-        async with self._lock:
+        async with self.locks.write(config.HARDBANS_FILE, guild_id):
             data = await self._read_json(config.HARDBANS_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {}
@@ -72,24 +377,24 @@ class ConfigManager:
                 'reason': reason,
                 'banned_by': banned_by
             }
-            await self._write_json(config.HARDBANS_FILE, data)
+            self._mark_dirty(config.HARDBANS_FILE, guild_id, [user_id])
     
     async def remove_hardban(self, guild_id: int, user_id: int) -> bool:
-        async with self._lock:
+        async with self.locks.write(config.HARDBANS_FILE, guild_id):
             data = await self._read_json(config.HARDBANS_FILE)
             if str(guild_id) in data and str(user_id) in data[str(guild_id)]:
                 del data[str(guild_id)][str(user_id)]
-                await self._write_json(config.HARDBANS_FILE, data)
+                self._mark_dirty(config.HARDBANS_FILE, guild_id, [user_id])
                 return True
             return False
     
     async def get_fake_perms(self, guild_id: int) -> Dict:
-        async with self._lock:
+        async with self.locks.read(config.FAKE_PERMS_FILE, guild_id):
             data = await self._read_json(config.FAKE_PERMS_FILE)
             return data.get(str(guild_id), {'users': {}, 'roles': {}})
     
     async def add_fake_perm(self, guild_id: int, target_id: int, target_type: str, perms: list):
-        async with self._lock:
+        async with self.locks.write(config.FAKE_PERMS_FILE, guild_id):
             data = await self._read_json(config.FAKE_PERMS_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {'users': {}, 'roles': {}}
@@ -103,39 +408,59 @@ class ConfigManager:
                 if perm not in data[str(guild_id)][target_type][str(target_id)]:
                     data[str(guild_id)][target_type][str(target_id)].append(perm)
             
-            await self._write_json(config.FAKE_PERMS_FILE, data)
+            self._mark_dirty(config.FAKE_PERMS_FILE, guild_id)
     
     async def remove_fake_perm(self, guild_id: int, target_id: int, target_type: str, perms: list):
-        async with self._lock:
+        async with self.locks.write(config.FAKE_PERMS_FILE, guild_id):
             data = await self._read_json(config.FAKE_PERMS_FILE)
             if str(guild_id) in data and target_type in data[str(guild_id)] and str(target_id) in data[str(guild_id)][target_type]:
                 for perm in perms:
                     if perm in data[str(guild_id)][target_type][str(target_id)]:
                         data[str(guild_id)][target_type][str(target_id)].remove(perm)
-                await self._write_json(config.FAKE_PERMS_FILE, data)
+                self._mark_dirty(config.FAKE_PERMS_FILE, guild_id)
     
     async def get_roleplay_gifs(self, guild_id: int) -> Dict:
-        async with self._lock:
+        async with self.locks.read(config.ROLEPLAY_GIFS_FILE, guild_id):
             data = await self._read_json(config.ROLEPLAY_GIFS_FILE)
             return data.get(str(guild_id), {})
     
     async def set_roleplay_gif(self, guild_id: int, command: str, url: str):
-        async with self._lock:
+        async with self.locks.write(config.ROLEPLAY_GIFS_FILE, guild_id):
             data = await self._read_json(config.ROLEPLAY_GIFS_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {}
             data[str(guild_id)][command] = url
-            await self._write_json(config.ROLEPLAY_GIFS_FILE, data)
+            self._mark_dirty(config.ROLEPLAY_GIFS_FILE, guild_id)
+    
+    async def remove_roleplay_gif(self, guild_id: int, command: str) -> bool:
+        async with self.locks.write(config.ROLEPLAY_GIFS_FILE, guild_id):
+            data = await self._read_json(config.ROLEPLAY_GIFS_FILE)
+            if str(guild_id) in data and command in data[str(guild_id)]:
+                del data[str(guild_id)][command]
+                self._mark_dirty(config.ROLEPLAY_GIFS_FILE, guild_id)
+                return True
+            return False
     
     async def get_antinuke_whitelist(self, guild_id: int) -> Dict:
-        async with self._lock:
+        async with self.locks.read(config.ANTINUKE_DATA_FILE, guild_id):
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
-            if str(guild_id) not in data:
-                data[str(guild_id)] = {'whitelist': {'users': [], 'roles': []}, 'thresholds': {}}
             return data.get(str(guild_id), {}).get('whitelist', {'users': [], 'roles': []})
     
+    async def get_compiled_whitelist(self, guild_id: int) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        compiled = self._whitelists.get(str(guild_id))
+        if compiled is not None:
+            return compiled
+        
+        async with self.locks.read(config.ANTINUKE_DATA_FILE, guild_id):
+            data = await self._read_json(config.ANTINUKE_DATA_FILE)
+            whitelist = data.get(str(guild_id), {}).get('whitelist', {})
+            compiled = (frozenset(whitelist.get('users', [])), frozenset(whitelist.get('roles', [])))
+            self._whitelists[str(guild_id)] = compiled
+            return compiled
+    
     async def add_antinuke_whitelist(self, guild_id: int, target_id: int, target_type: str):
-        async with self._lock:
+        async with self.locks.write(config.ANTINUKE_DATA_FILE, guild_id):
+            self._whitelists.pop(str(guild_id), None)
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {'whitelist': {'users': [], 'roles': []}, 'thresholds': {}}
@@ -145,25 +470,26 @@ class ConfigManager:
             if target_id not in data[str(guild_id)]['whitelist'][target_type]:
                 data[str(guild_id)]['whitelist'][target_type].append(target_id)
             
-            await self._write_json(config.ANTINUKE_DATA_FILE, data)
+            self._mark_dirty(config.ANTINUKE_DATA_FILE, guild_id)
     
     async def remove_antinuke_whitelist(self, guild_id: int, target_id: int, target_type: str):
-        async with self._lock:
+        async with self.locks.write(config.ANTINUKE_DATA_FILE, guild_id):
+            self._whitelists.pop(str(guild_id), None)
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
             if str(guild_id) in data and 'whitelist' in data[str(guild_id)]:
                 if target_id in data[str(guild_id)]['whitelist'][target_type]:
                     data[str(guild_id)]['whitelist'][target_type].remove(target_id)
-                await self._write_json(config.ANTINUKE_DATA_FILE, data)
+                self._mark_dirty(config.ANTINUKE_DATA_FILE, guild_id)
     
     async def get_antinuke_thresholds(self, guild_id: int) -> Dict:
-        async with self._lock:
+        async with self.locks.read(config.ANTINUKE_DATA_FILE, guild_id):
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
             if str(guild_id) not in data:
                 return {}
             return data[str(guild_id)].get('thresholds', {})
     
     async def set_antinuke_threshold(self, guild_id: int, action: str, count: int, hours: int):
-        async with self._lock:
+        async with self.locks.write(config.ANTINUKE_DATA_FILE, guild_id):
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {'whitelist': {'users': [], 'roles': []}, 'thresholds': {}}
@@ -171,14 +497,14 @@ class ConfigManager:
                 data[str(guild_id)]['thresholds'] = {}
             
             data[str(guild_id)]['thresholds'][action] = {'count': count, 'hours': hours}
-            await self._write_json(config.ANTINUKE_DATA_FILE, data)
+            self._mark_dirty(config.ANTINUKE_DATA_FILE, guild_id)
     
     async def get_hardban_perms(self, guild_id: int) -> Dict:
         guild_config = await self.get_guild_config(guild_id)
         return guild_config.get('hardban_perms', {'users': [], 'roles': []})
     
     async def add_hardban_perm(self, guild_id: int, target_id: int, target_type: str):
-        async with self._lock:
+        async with self.locks.write(config.CONFIG_FILE, guild_id):
             data = await self._read_json(config.CONFIG_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {}
@@ -188,33 +514,63 @@ class ConfigManager:
             if str(target_id) not in data[str(guild_id)]['hardban_perms'][target_type]:
                 data[str(guild_id)]['hardban_perms'][target_type].append(str(target_id))
             
-            await self._write_json(config.CONFIG_FILE, data)
+            self._mark_dirty(config.CONFIG_FILE, guild_id)
     
     async def remove_hardban_perm(self, guild_id: int, target_id: int, target_type: str):
-        async with self._lock:
+        async with self.locks.write(config.CONFIG_FILE, guild_id):
             data = await self._read_json(config.CONFIG_FILE)
             if str(guild_id) in data and 'hardban_perms' in data[str(guild_id)]:
                 if str(target_id) in data[str(guild_id)]['hardban_perms'][target_type]:
                     data[str(guild_id)]['hardban_perms'][target_type].remove(str(target_id))
-                await self._write_json(config.CONFIG_FILE, data)
+                self._mark_dirty(config.CONFIG_FILE, guild_id)
     
     async def get_antinuke_action(self, guild_id: int) -> str:
-        async with self._lock:
+        async with self.locks.read(config.ANTINUKE_DATA_FILE, guild_id):
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
             if str(guild_id) not in data:
                 return 'jail'
             return data[str(guild_id)].get('default_action', 'jail')
     
     async def set_antinuke_action(self, guild_id: int, action: str):
-        async with self._lock:
+        async with self.locks.write(config.ANTINUKE_DATA_FILE, guild_id):
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {'whitelist': {'users': [], 'roles': []}, 'thresholds': {}}
             data[str(guild_id)]['default_action'] = action
-            await self._write_json(config.ANTINUKE_DATA_FILE, data)
+            self._mark_dirty(config.ANTINUKE_DATA_FILE, guild_id)
+    
+    async def get_antinuke_preempt(self, guild_id: int) -> bool:
+        async with self.locks.read(config.ANTINUKE_DATA_FILE, guild_id):
+            data = await self._read_json(config.ANTINUKE_DATA_FILE)
+            if str(guild_id) not in data:
+                return False
+            return data[str(guild_id)].get('preempt', False)
+    
+    async def set_antinuke_preempt(self, guild_id: int, enabled: bool):
+        async with self.locks.write(config.ANTINUKE_DATA_FILE, guild_id):
+            data = await self._read_json(config.ANTINUKE_DATA_FILE)
+            if str(guild_id) not in data:
+                data[str(guild_id)] = {'whitelist': {'users': [], 'roles': []}, 'thresholds': {}}
+            data[str(guild_id)]['preempt'] = enabled
+            self._mark_dirty(config.ANTINUKE_DATA_FILE, guild_id)
+    
+    async def get_antinuke_rollback(self, guild_id: int) -> bool:
+        async with self.locks.read(config.ANTINUKE_DATA_FILE, guild_id):
+            data = await self._read_json(config.ANTINUKE_DATA_FILE)
+            if str(guild_id) not in data:
+                return True
+            return data[str(guild_id)].get('rollback', True)
+    
+    async def set_antinuke_rollback(self, guild_id: int, enabled: bool):
+        async with self.locks.write(config.ANTINUKE_DATA_FILE, guild_id):
+            data = await self._read_json(config.ANTINUKE_DATA_FILE)
+            if str(guild_id) not in data:
+                data[str(guild_id)] = {'whitelist': {'users': [], 'roles': []}, 'thresholds': {}}
+            data[str(guild_id)]['rollback'] = enabled
+            self._mark_dirty(config.ANTINUKE_DATA_FILE, guild_id)
     
     async def add_antinuke_history(self, guild_id: int, action_data: Dict):
-        async with self._lock:
+        async with self.locks.write(config.ANTINUKE_DATA_FILE, guild_id):
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
             if str(guild_id) not in data:
                 data[str(guild_id)] = {'whitelist': {'users': [], 'roles': []}, 'thresholds': {}, 'action_history': []}
@@ -226,10 +582,10 @@ class ConfigManager:
             if len(data[str(guild_id)]['action_history']) > 50:
                 data[str(guild_id)]['action_history'] = data[str(guild_id)]['action_history'][-50:]
             
-            await self._write_json(config.ANTINUKE_DATA_FILE, data)
+            self._mark_dirty(config.ANTINUKE_DATA_FILE, guild_id)
     
     async def get_antinuke_history(self, guild_id: int, limit: int = 10) -> list:
-        async with self._lock:
+        async with self.locks.read(config.ANTINUKE_DATA_FILE, guild_id):
             data = await self._read_json(config.ANTINUKE_DATA_FILE)
             if str(guild_id) not in data or 'action_history' not in data[str(guild_id)]:
                 return []
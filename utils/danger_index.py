@@ -0,0 +1,43 @@
+from typing import Dict, FrozenSet, Iterable, List
+import discord
+
+
+class DangerousRoleIndex:
+    # Per-guild set of role ids whose permissions include any of the given
+    # flags, built once from the role cache and kept current from role
+    # create/update/delete events, so containment only has to intersect a
+    # member's roles with it instead of inspecting every role's permissions.
+
+    def __init__(self, permissions: Iterable[str]):
+        self.mask = discord.Permissions(**{name: True for name in permissions}).value
+        self._roles: Dict[int, FrozenSet[int]] = {}
+
+    def grants(self, role: discord.Role) -> bool:
+        return bool(role.permissions.value & self.mask)
+
+    def _get(self, guild: discord.Guild) -> FrozenSet[int]:
+        roles = self._roles.get(guild.id)
+        if roles is None:
+            roles = self._roles[guild.id] = frozenset(role.id for role in guild.roles if self.grants(role))
+        return roles
+
+    def update(self, role: discord.Role):
+        roles = self._roles.get(role.guild.id)
+        if roles is None:
+            return
+        if self.grants(role):
+            self._roles[role.guild.id] = roles | {role.id}
+        elif role.id in roles:
+            self._roles[role.guild.id] = roles - {role.id}
+
+    def remove(self, role: discord.Role):
+        roles = self._roles.get(role.guild.id)
+        if roles is not None and role.id in roles:
+            self._roles[role.guild.id] = roles - {role.id}
+
+    def forget(self, guild_id: int):
+        self._roles.pop(guild_id, None)
+
+    def roles_for(self, member: discord.Member) -> List[discord.Role]:
+        roles = self._get(member.guild)
+        return [role for role in member.roles if role.id in roles]
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import discord
+from utils.audit_log import AuditLogService
+from utils.config_manager import ConfigManager
+from utils.log_sink import LogSink
+from utils.metrics import Metrics
+
+
+class EventContext:
+    # Shared per-event state handed to every registered handler. The guild
+    # config snapshot and each audit-log lookup are resolved at most once per
+    # event, however many handlers ask for them concurrently.
+
+    def __init__(self, guild: Optional[discord.Guild]):
+        self.guild = guild
+        self.config_reads = 0
+        self.audit_lookups = 0
+        self._pending: Dict[Any, asyncio.Future] = {}
+
+    def _once(self, key, factory: Callable[[], Awaitable]) -> Awaitable:
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = asyncio.ensure_future(factory())
+        return asyncio.shield(future)
+
+    async def _read_config(self) -> Dict:
+        self.config_reads += 1
+        return await ConfigManager().get_guild_config(self.guild.id)
+
+    async def _find(self, action: discord.AuditLogAction, target_id: int) -> Optional[discord.AuditLogEntry]:
+        self.audit_lookups += 1
+        return await AuditLogService().find(self.guild, action, target_id)
+
+    async def config(self) -> Dict:
+        return await self._once('config', self._read_config)
+
+    async def log_destination(self, log_type: str):
+        return LogSink().destination(self.guild, await self.config(), log_type)
+
+    async def audit_entry(self, action: discord.AuditLogAction, target_id: int) -> Optional[discord.AuditLogEntry]:
+        return await self._once((action, target_id), lambda: self._find(action, target_id))
+
+
+class EventDispatcher:
+    # Registry of per-event handlers. Cogs register bound methods on load and
+    # unregister on unload; the Dispatcher cog owns the gateway listeners and
+    # fans each event out here with one shared EventContext.
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(EventDispatcher, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self._handlers: Dict[str, List[Callable[..., Awaitable]]] = {}
+            self.stats: Dict[str, Dict[str, float]] = {}
+
+    def register(self, event: str, handler: Callable[..., Awaitable]):
+        self._handlers.setdefault(event, []).append(handler)
+
+    def unregister(self, owner):
+        for event, handlers in self._handlers.items():
+            handlers[:] = [h for h in handlers if getattr(h, '__self__', None) is not owner]
+
+    async def dispatch(self, event: str, guild: Optional[discord.Guild], *args):
+        handlers = list(self._handlers.get(event, ()))
+        if not handlers:
+            return
+
+        started = time.perf_counter()
+        context = EventContext(guild)
+        results = await asyncio.gather(*(self._run(handler, context, args) for handler in handlers), return_exceptions=True)
+        for handler, result in zip(handlers, results):
+            if isinstance(result, Exception):
+                Metrics().error('event', type(handler.__self__).__name__, handler.__name__)
+                print(f"Error in {event} handler {handler.__qualname__}: {result}")
+
+        stats = self.stats.setdefault(event, {'events': 0, 'seconds': 0.0, 'config_reads': 0, 'audit_lookups': 0})
+        stats['events'] += 1
+        stats['seconds'] += time.perf_counter() - started
+        stats['config_reads'] += context.config_reads
+        stats['audit_lookups'] += context.audit_lookups
+
+    async def _run(self, handler: Callable[..., Awaitable], context: EventContext, args: tuple):
+        guild_id = context.guild.id if context.guild else None
+        with Metrics().timer('event', type(handler.__self__).__name__, handler.__name__, guild_id):
+            return await handler(context, *args)
+
+    def handler_count(self, event: str) -> int:
+        return len(self._handlers.get(event, ()))
@@ -0,0 +1,116 @@
+import asyncio
+import fcntl
+import json
+import os
+from typing import Dict, Iterable, Optional, Set
+
+STAMP_WIDTH = 20
+RETRY_DELAY = 0.01
+CHANGE_LOG_SIZE = 64
+
+
+class FileLock:
+    # Exclusive fcntl lock on a `<file>.lock` sidecar, shared by every process
+    # using the data directory, with an asyncio.Lock in front so coroutines of
+    # one process queue up instead of polling. The sidecar also holds a change
+    # counter that writers bump after saving; a process whose cached copy was
+    # loaded at an older counter value knows another process has written since.
+    # A `<file>.changes` sidecar lists the guild keys written at each of the
+    # last CHANGE_LOG_SIZE counter values, so readers can reload just those.
+    def __init__(self, filepath: str):
+        self.path = f"{filepath}.lock"
+        self.changes_path = f"{filepath}.changes"
+        self._local = asyncio.Lock()
+        self._fd: Optional[int] = None
+
+    async def __aenter__(self):
+        await self._local.acquire()
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        await asyncio.sleep(RETRY_DELAY)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+        except BaseException:
+            self._local.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        fd, self._fd = self._fd, None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+            self._local.release()
+
+    def stamp(self) -> Optional[int]:
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read(STAMP_WIDTH)
+        except FileNotFoundError:
+            return 0
+        if not raw:
+            return 0
+        try:
+            return int(raw)
+        except ValueError:
+            return None
+
+    def _read_changes(self) -> Dict[str, Optional[list]]:
+        try:
+            with open(self.changes_path, 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def changes_since(self, stamp: Optional[int]) -> Optional[Set[str]]:
+        # Guild keys written after `stamp`, up to the current counter. None
+        # when the log no longer reaches back that far or a writer saved the
+        # whole file; the caller then has to reload everything.
+        current = self.stamp()
+        if stamp is None or current is None:
+            return None
+        log = self._read_changes()
+        guilds = set()
+        for number in range(stamp + 1, current + 1):
+            keys = log.get(str(number))
+            if keys is None:
+                return None
+            guilds.update(keys)
+        return guilds
+
+    def bump(self, guild_ids: Optional[Iterable[str]] = None) -> int:
+        stamp = (self.stamp() or 0) + 1
+        log = self._read_changes()
+        for number in [n for n in log if int(n) <= stamp - CHANGE_LOG_SIZE]:
+            del log[number]
+        if guild_ids is None:
+            log.pop(str(stamp), None)
+        else:
+            log[str(stamp)] = sorted(guild_ids)
+        # Written before the counter, and replaced atomically, so a reader
+        # that sees the new counter also sees its entry.
+        tmp_path = f"{self.changes_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(log, f)
+        os.replace(tmp_path, self.changes_path)
+        os.pwrite(self._fd, f"{stamp:0{STAMP_WIDTH}d}".encode(), 0)
+        return stamp
+
+
+_locks: Dict[str, FileLock] = {}
+
+
+def file_lock(filepath: str) -> FileLock:
+    lock = _locks.get(filepath)
+    if lock is None:
+        lock = _locks[filepath] = FileLock(filepath)
+    return lock
@@ -0,0 +1,67 @@
+import json
+import os
+from typing import Iterator, List
+import config
+
+
+class Journal:
+    # Append-only log of cache mutations that have not been flushed yet.
+    # Each flush starts a new segment; segments are deleted once the flush
+    # that covers them succeeds, and whatever is left is replayed on startup.
+
+    def __init__(self, directory: str, fsync: bool = False):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segments()
+        self._seq = int(segments[-1].split('.')[0]) + 1 if segments else 0
+        self._file = None
+
+    def _segments(self) -> List[str]:
+        return sorted(
+            (name for name in os.listdir(self.directory) if name.endswith('.log')),
+            key=lambda name: int(name.split('.')[0])
+        )
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def record(self, entry: dict):
+        if self._file is None:
+            self._file = open(self._path(f"{self._seq:08d}.log"), 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> int:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        checkpoint = self._seq
+        self._seq += 1
+        return checkpoint
+
+    def discard(self, checkpoint: int):
+        for name in self._segments():
+            if int(name.split('.')[0]) <= checkpoint:
+                os.remove(self._path(name))
+
+    def entries(self) -> Iterator[dict]:
+        for name in self._segments():
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"Skipping truncated journal entry in {name}")
+                        break
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_journal() -> Journal:
+    return Journal(config.JOURNAL_DIR, config.JOURNAL_FSYNC)
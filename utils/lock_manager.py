@@ -0,0 +1,96 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, Optional, Tuple
+from utils.metrics import Metrics
+
+
+class RWLock:
+    def __init__(self):
+        self._cond = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self.users = 0
+
+    async def acquire_read(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._writer and self._waiting_writers == 0)
+            self._readers += 1
+
+    async def release_read(self):
+        async with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    async def acquire_write(self):
+        async with self._cond:
+            self._waiting_writers += 1
+            try:
+                await self._cond.wait_for(lambda: not self._writer and self._readers == 0)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+
+    async def release_write(self):
+        async with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+# Guild-scoped holders take the file lock shared and the guild lock in the
+# requested mode; guild_id=None locks the whole file. Not reentrant.
+class LockManager:
+    def __init__(self):
+        self._locks: Dict[Tuple[str, Optional[str]], RWLock] = {}
+
+    def _get(self, key: Tuple[str, Optional[str]]) -> RWLock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = RWLock()
+        lock.users += 1
+        return lock
+
+    def _put(self, key: Tuple[str, Optional[str]], lock: RWLock):
+        lock.users -= 1
+        if lock.users == 0 and self._locks.get(key) is lock:
+            del self._locks[key]
+
+    @asynccontextmanager
+    async def _hold(self, key: Tuple[str, Optional[str]], write: bool):
+        lock = self._get(key)
+        try:
+            started = time.perf_counter()
+            if write:
+                await lock.acquire_write()
+            else:
+                await lock.acquire_read()
+            Metrics().record('lock', os.path.basename(key[0]), 'write' if write else 'read', time.perf_counter() - started)
+            try:
+                yield
+            finally:
+                if write:
+                    await lock.release_write()
+                else:
+                    await lock.release_read()
+        finally:
+            self._put(key, lock)
+
+    @asynccontextmanager
+    async def _acquire(self, filepath: str, guild_id: Optional[Hashable], write: bool):
+        if guild_id is None:
+            async with self._hold((filepath, None), write):
+                yield
+            return
+
+        async with self._hold((filepath, None), False):
+            async with self._hold((filepath, str(guild_id)), write):
+                yield
+
+    def read(self, filepath: str, guild_id: Optional[Hashable] = None):
+        return self._acquire(filepath, guild_id, False)
+
+    def write(self, filepath: str, guild_id: Optional[Hashable] = None):
+        return self._acquire(filepath, guild_id, True)
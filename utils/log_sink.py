@@ -0,0 +1,265 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import aiohttp
+import discord
+import config
+from utils.config_manager import ConfigManager
+
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+
+
+class _Destination:
+    __slots__ = ('target', 'items', 'wake', 'full', 'collapsed', 'worker')
+
+    def __init__(self, target):
+        self.target = target
+        self.items: Deque[Tuple[discord.Embed, float]] = deque()
+        self.wake = asyncio.Event()
+        self.full = asyncio.Event()
+        self.collapsed = 0
+        self.worker = None
+
+
+class LogSink:
+    # Per-destination log queues. Each worker waits until it has a full
+    # message worth of embeds or LOG_FLUSH_INTERVAL has passed, sends them as
+    # one message and retries 429/5xx with exponential backoff. Past
+    # LOG_COLLAPSE_DEPTH low-priority embeds are counted instead of queued and
+    # reported as one summary embed; past LOG_QUEUE_MAX everything is dropped.
+    # A destination is either a channel or, for log types with a provisioned
+    # webhook, a Webhook on a pooled session: webhook executions have their
+    # own per-webhook buckets (tracked by discord.py's webhook adapter), so log
+    # floods do not consume the bot's buckets used for command replies.
+    # When a webhook is gone (404) its pending embeds move to the log channel
+    # it was provisioned in; a worker drops its queue only when the channel
+    # itself is gone, and exits once idle for LOG_IDLE_TIMEOUT.
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LogSink, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.flush_interval = config.LOG_FLUSH_INTERVAL
+            self.max_depth = config.LOG_QUEUE_MAX
+            self.collapse_depth = config.LOG_COLLAPSE_DEPTH
+            self.max_retries = config.LOG_MAX_RETRIES
+            self.retry_backoff = config.LOG_RETRY_BACKOFF
+            self.idle_timeout = config.LOG_IDLE_TIMEOUT
+            self._destinations: Dict[int, _Destination] = {}
+            self.submitted = 0
+            self.sent_messages = 0
+            self.sent_embeds = 0
+            self.collapsed = 0
+            self.dropped = 0
+            self.failed = 0
+            self.retries = 0
+            self.latency_total = 0.0
+            self.latency_max = 0.0
+            self._sending = 0
+            self._session: Optional[aiohttp.ClientSession] = None
+            self._webhooks: Dict[str, discord.Webhook] = {}
+            self._dead_webhooks: Set[str] = set()
+            self._fallbacks: Dict[str, discord.abc.Messageable] = {}
+
+    def _webhook(self, url: str) -> discord.Webhook:
+        webhook = self._webhooks.get(url)
+        if webhook is None:
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=config.LOG_WEBHOOK_POOL_SIZE))
+            webhook = self._webhooks[url] = discord.Webhook.from_url(url, session=self._session)
+        return webhook
+
+    def destination(self, guild: discord.Guild, guild_config: Dict, log_type: str):
+        url = guild_config.get('log_webhooks', {}).get(log_type)
+        channel_id = guild_config.get('log_channels', {}).get(log_type)
+        channel = guild.get_channel(channel_id) if channel_id else None
+        if url and url not in self._dead_webhooks:
+            try:
+                webhook = self._webhook(url)
+            except ValueError:
+                self._dead_webhooks.add(url)
+            else:
+                if channel is not None:
+                    self._fallbacks[url] = channel
+                return webhook
+        return channel
+
+    async def resolve(self, guild: discord.Guild, log_type: str):
+        return self.destination(guild, await ConfigManager().get_guild_config(guild.id), log_type)
+
+    def _destination(self, target) -> _Destination:
+        dest = self._destinations.get(target.id)
+        if dest is None:
+            dest = self._destinations[target.id] = _Destination(target)
+            dest.worker = asyncio.create_task(self._work(dest))
+        dest.target = target
+        return dest
+
+    def submit(self, target, embed: discord.Embed, low_priority: bool = False):
+        dest = self._destination(target)
+
+        depth = len(dest.items)
+        if depth >= self.max_depth:
+            self.dropped += 1
+            return
+        if low_priority and depth >= self.collapse_depth:
+            dest.collapsed += 1
+            self.collapsed += 1
+            return
+
+        self.submitted += 1
+        dest.items.append((embed, time.monotonic()))
+        dest.wake.set()
+        if len(dest.items) >= MAX_EMBEDS:
+            dest.full.set()
+
+    def _take(self, dest: _Destination) -> Tuple[List[discord.Embed], List[float]]:
+        embeds = []
+        submitted = []
+        size = 0
+        if dest.collapsed:
+            summary = discord.Embed(
+                description=f"⚠️ {dest.collapsed} low-priority log event(s) were collapsed under load",
+                color=discord.Color.dark_grey()
+            )
+            embeds.append(summary)
+            size += len(summary)
+            dest.collapsed = 0
+
+        while dest.items and len(embeds) < MAX_EMBEDS:
+            embed, at = dest.items[0]
+            if embeds and size + len(embed) > MAX_EMBED_CHARS:
+                break
+            dest.items.popleft()
+            embeds.append(embed)
+            submitted.append(at)
+            size += len(embed)
+        return embeds, submitted
+
+    def _drop(self, dest: _Destination):
+        if self._destinations.get(dest.target.id) is dest:
+            del self._destinations[dest.target.id]
+        if isinstance(dest.target, discord.Webhook):
+            self._webhooks.pop(dest.target.url, None)
+            self._fallbacks.pop(dest.target.url, None)
+
+    def _reroute(self, dest: _Destination, embeds: List[discord.Embed], submitted: List[float]) -> bool:
+        # Moves a dead webhook's failed batch and queue to its log channel.
+        channel = self._fallbacks.get(dest.target.url)
+        if channel is None:
+            return False
+        fallback = self._destination(channel)
+        now = time.monotonic()
+        batch = zip(embeds, [now] * (len(embeds) - len(submitted)) + submitted)
+        fallback.items.extend(list(batch) + list(dest.items))
+        fallback.collapsed += dest.collapsed
+        dest.items.clear()
+        fallback.wake.set()
+        if len(fallback.items) >= MAX_EMBEDS:
+            fallback.full.set()
+        print(f"Log webhook {dest.target.id} is gone; sending its logs to channel {channel.id}")
+        return True
+
+    async def _work(self, dest: _Destination):
+        while True:
+            try:
+                await asyncio.wait_for(dest.wake.wait(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                self._drop(dest)
+                return
+            if len(dest.items) < MAX_EMBEDS:
+                try:
+                    await asyncio.wait_for(dest.full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            dest.full.clear()
+
+            embeds, submitted = self._take(dest)
+            if not dest.items:
+                dest.wake.clear()
+            elif len(dest.items) >= MAX_EMBEDS:
+                dest.full.set()
+            if embeds:
+                self._sending += 1
+                try:
+                    alive = await self._send(dest.target, embeds, submitted)
+                finally:
+                    self._sending -= 1
+                if not alive:
+                    if not (isinstance(dest.target, discord.Webhook) and self._reroute(dest, embeds, submitted)):
+                        self.failed += len(submitted) + len(dest.items)
+                        dest.items.clear()
+                    self._drop(dest)
+                    return
+
+    async def _send(self, target, embeds: List[discord.Embed], submitted: List[float]) -> bool:
+        # Returns False once the destination no longer exists.
+        for attempt in range(self.max_retries + 1):
+            try:
+                await target.send(embeds=embeds)
+                break
+            except discord.NotFound as e:
+                if isinstance(target, discord.Webhook):
+                    self._dead_webhooks.add(target.url)
+                print(f"Error delivering logs to {target.id}: {e}")
+                return False
+            except discord.HTTPException as e:
+                if (e.status != 429 and e.status < 500) or attempt == self.max_retries:
+                    self.failed += len(submitted)
+                    print(f"Error delivering logs to {target.id}: {e}")
+                    return True
+                self.retries += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+            except Exception as e:
+                self.failed += len(submitted)
+                print(f"Error delivering logs to {target.id}: {e}")
+                return True
+
+        now = time.monotonic()
+        self.sent_messages += 1
+        self.sent_embeds += len(submitted)
+        for at in submitted:
+            self.latency_total += now - at
+            self.latency_max = max(self.latency_max, now - at)
+        return True
+
+    def depth(self) -> int:
+        return sum(len(dest.items) for dest in self._destinations.values())
+
+    def stats(self) -> Dict:
+        return {
+            'destinations': len(self._destinations),
+            'webhooks': sum(isinstance(dest.target, discord.Webhook) for dest in self._destinations.values()),
+            'depth': self.depth(),
+            'max_depth': max((len(dest.items) for dest in self._destinations.values()), default=0),
+            'submitted': self.submitted,
+            'sent_messages': self.sent_messages,
+            'sent_embeds': self.sent_embeds,
+            'collapsed': self.collapsed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'retries': self.retries,
+            'avg_latency': self.latency_total / self.sent_embeds if self.sent_embeds else 0.0,
+            'max_latency': self.latency_max
+        }
+
+    async def close(self, timeout: float = 5.0):
+        for dest in self._destinations.values():
+            dest.full.set()
+        deadline = time.monotonic() + timeout
+        while (self.depth() or self._sending) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for dest in list(self._destinations.values()):
+            dest.worker.cancel()
+        self._destinations.clear()
+        self._webhooks.clear()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
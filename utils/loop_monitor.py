@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Deque, Dict, List, Optional
+import config
+from utils.metrics import Metrics
+
+
+class LoopMonitor:
+    # Measures event-loop scheduling delay with a task that sleeps for a fixed
+    # tick and records how late it wakes up. A watchdog thread watches the
+    # task's heartbeat; once the loop has not run it for LOOP_BLOCK_THRESHOLD_MS
+    # it captures the loop thread's stack, which at that moment is the code
+    # blocking the loop. Blocks are kept in memory and appended to a rotating
+    # log file.
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LoopMonitor, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.interval = config.LOOP_MONITOR_INTERVAL
+            self.threshold = config.LOOP_BLOCK_THRESHOLD_MS / 1000
+            self.current_lag = 0.0
+            self.recent: Deque[float] = deque(maxlen=int(60 / self.interval))
+            self.blocks: Deque[Dict] = deque(maxlen=config.LOOP_BLOCK_HISTORY)
+            self.block_count = 0
+            self._beat = time.monotonic()
+            self._stack: Optional[List[str]] = None
+            self._stack_beat: Optional[float] = None
+            self._loop_thread_id: Optional[int] = None
+            self._task: Optional[asyncio.Task] = None
+            self._thread: Optional[threading.Thread] = None
+            self._stopping = threading.Event()
+            self.log = self._open_log()
+
+    def _open_log(self) -> logging.Logger:
+        log = logging.getLogger('loop_monitor')
+        log.propagate = False
+        if not log.handlers:
+            handler = RotatingFileHandler(config.LOOP_LOG_FILE, maxBytes=config.LOOP_LOG_MAX_BYTES, backupCount=3, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            log.addHandler(handler)
+            log.setLevel(logging.INFO)
+        return log
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    async def _measure(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            previous, self._beat = self._beat, now
+            self.current_lag = lag
+            self.recent.append(lag)
+            Metrics().record('loop', 'asyncio', 'lag', lag)
+            if lag >= self.threshold:
+                self._report(lag, previous)
+
+    def _watch(self):
+        while not self._stopping.wait(self.threshold / 4):
+            beat = self._beat
+            if beat == self._stack_beat or time.monotonic() - beat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._stack = traceback.format_stack(frame)[-config.LOOP_STACK_DEPTH:]
+                self._stack_beat = beat
+
+    def _report(self, lag: float, beat: float):
+        stack = self._stack if self._stack_beat == beat else None
+        self.blocks.append({'at': time.time(), 'blocked': lag, 'stack': stack})
+        self.block_count += 1
+        Metrics().record('loop', 'asyncio', 'block', lag)
+        if stack:
+            self.log.warning(f"Event loop blocked for {lag * 1000:.0f}ms in:\n{''.join(stack).rstrip()}")
+        else:
+            self.log.warning(f"Event loop blocked for {lag * 1000:.0f}ms (no stack captured)")
+
+    def stats(self) -> Dict:
+        recent = sorted(self.recent)
+        return {
+            'current': self.current_lag,
+            'p50': recent[len(recent) // 2] if recent else 0.0,
+            'p99': recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0,
+            'max': recent[-1] if recent else 0.0,
+            'blocks': self.block_count
+        }
+
+    def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,12 @@
+from typing import Optional
+import discord
+
+
+async def get_or_fetch_member(guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    member = guild.get_member(user_id)
+    if member is not None or guild.chunked:
+        return member
+    try:
+        return await guild.fetch_member(user_id)
+    except discord.HTTPException:
+        return None
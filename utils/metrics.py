@@ -0,0 +1,154 @@
+import json
+import math
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+SUB_BUCKETS = 16
+SUB_BUCKET_BITS = 4
+
+Key = Tuple[str, str, str]
+
+
+class Histogram:
+    # Log-linear latency histogram in microseconds, HDR-style: every power of
+    # two is split into SUB_BUCKETS linear buckets, so percentiles are within
+    # ~1/SUB_BUCKETS of the true value and memory stays bounded by the range
+    # of values seen rather than the number recorded.
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def _index(micros: int) -> int:
+        shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            return micros
+        return shift * SUB_BUCKETS + (micros >> shift)
+
+    @staticmethod
+    def _value(index: int) -> float:
+        if index < 2 * SUB_BUCKETS:
+            return float(index)
+        shift = index // SUB_BUCKETS - 1
+        return ((index - shift * SUB_BUCKETS) << shift) + (1 << shift) / 2
+
+    def record(self, seconds: float):
+        index = self._index(int(seconds * 1_000_000))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                return min(self._value(index) / 1_000_000, self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+
+class Metrics:
+    # Process-wide latency histograms keyed by (category, owner, name), e.g.
+    # ('command', 'Leveling', 'leaderboard') or ('lock', 'config.json', 'write'),
+    # plus time spent per guild so stalls can be traced back to the guilds
+    # causing them.
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Metrics, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            self.reset()
+
+    def reset(self):
+        self.histograms: Dict[Key, Histogram] = {}
+        self.errors: Dict[Key, int] = {}
+        self.guild_time: Dict[int, float] = {}
+        self.since = time.time()
+
+    def record(self, category: str, owner: str, name: str, seconds: float, guild_id: Optional[int] = None):
+        key = (category, owner, name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.record(seconds)
+        if guild_id is not None:
+            self.guild_time[guild_id] = self.guild_time.get(guild_id, 0.0) + seconds
+
+    def error(self, category: str, owner: str, name: str):
+        key = (category, owner, name)
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    @contextmanager
+    def timer(self, category: str, owner: str, name: str, guild_id: Optional[int] = None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(category, owner, name, time.perf_counter() - started, guild_id)
+
+    def top(self, category: Optional[str] = None, limit: int = 10, by: str = 'p99') -> List[Tuple[Key, Dict]]:
+        rows = [
+            (key, histogram.summary())
+            for key, histogram in self.histograms.items()
+            if category is None or key[0] == category
+        ]
+        rows.sort(key=lambda row: row[1][by], reverse=True)
+        return rows[:limit]
+
+    def top_guilds(self, limit: int = 10) -> List[Tuple[int, float]]:
+        return sorted(self.guild_time.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def snapshot(self) -> Dict:
+        return {
+            'since': self.since,
+            'at': time.time(),
+            'histograms': [
+                {'category': key[0], 'owner': key[1], 'name': key[2], **histogram.summary()}
+                for key, histogram in self.histograms.items()
+            ],
+            'errors': [
+                {'category': key[0], 'owner': key[1], 'name': key[2], 'count': count}
+                for key, count in self.errors.items()
+            ],
+            'guilds': {str(guild_id): seconds for guild_id, seconds in self.top_guilds(50)}
+        }
+
+    def dump(self, path: str, snapshot: Dict):
+        directory = os.path.dirname(path) or '.'
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,86 @@
+import asyncio
+import heapq
+import itertools
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+PRIORITY_PUNISH = 0
+PRIORITY_ROLLBACK = 1
+PRIORITY_RECORD = 2
+
+Job = Tuple[int, int, Callable[[], Awaitable]]
+
+
+class _GuildQueue:
+    __slots__ = ('jobs', 'running', 'background', 'tasks')
+
+    def __init__(self):
+        self.jobs: List[Job] = []
+        self.running = 0
+        self.background = 0
+        self.tasks: Set[asyncio.Task] = set()
+
+
+class PunishmentExecutor:
+    # One priority queue per guild with at most `concurrency` jobs running, so
+    # punishments for several attackers run concurrently and always start
+    # before queued rollback and history/log jobs. Rollback and record jobs
+    # may only use `concurrency - reserved` slots: a rollback re-creating
+    # hundreds of channels can take minutes, and the reserved slots keep a new
+    # attacker's punishment from waiting behind it. A task is started per job
+    # and a guild's queue is dropped once nothing is running or queued.
+
+    def __init__(self, concurrency: int, reserved: int):
+        self.concurrency = concurrency
+        self.background_limit = max(1, concurrency - reserved)
+        self.completed = 0
+        self.failed = 0
+        self._order = itertools.count()
+        self._guilds: Dict[int, _GuildQueue] = {}
+
+    def submit(self, guild_id: int, priority: int, job: Callable[[], Awaitable]):
+        state = self._guilds.get(guild_id)
+        if state is None:
+            state = self._guilds[guild_id] = _GuildQueue()
+        heapq.heappush(state.jobs, (priority, next(self._order), job))
+        self._pump(guild_id, state)
+
+    def _pump(self, guild_id: int, state: _GuildQueue):
+        while state.jobs and state.running < self.concurrency:
+            priority = state.jobs[0][0]
+            background = priority != PRIORITY_PUNISH
+            if background and state.background >= self.background_limit:
+                break
+            _, _, job = heapq.heappop(state.jobs)
+            state.running += 1
+            state.background += background
+            task = asyncio.create_task(self._run(guild_id, state, job, background))
+            state.tasks.add(task)
+
+        if not state.jobs and not state.running and self._guilds.get(guild_id) is state:
+            del self._guilds[guild_id]
+
+    async def _run(self, guild_id: int, state: _GuildQueue, job: Callable[[], Awaitable], background: bool):
+        try:
+            await job()
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Error in punishment job: {e}")
+        finally:
+            state.running -= 1
+            state.background -= background
+            state.tasks.discard(asyncio.current_task())
+            self._pump(guild_id, state)
+
+    def pending(self) -> int:
+        return sum(len(state.jobs) for state in self._guilds.values())
+
+    def running(self) -> int:
+        return sum(state.running for state in self._guilds.values())
+
+    def close(self):
+        for state in self._guilds.values():
+            state.jobs.clear()
+            for task in state.tasks:
+                task.cancel()
+        self._guilds.clear()
@@ -0,0 +1,190 @@
+import random
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MAX_LEVEL = 24
+
+
+class _Node:
+    __slots__ = ('key', 'present', 'next', 'width', 'present_width')
+
+    def __init__(self, key, level: int, present: bool = True):
+        self.key = key
+        self.present = present
+        self.next: List[Optional['_Node']] = [None] * level
+        self.width: List[int] = [1] * level
+        self.present_width: List[int] = [0] * level
+
+
+def _random_level() -> int:
+    level = 1
+    while level < MAX_LEVEL and random.random() < 0.5:
+        level += 1
+    return level
+
+
+class RankIndex:
+    # Indexable skip list ordered by (level, xp) descending. width[i] is the
+    # number of bottom-level steps a level-i link skips and present_width[i]
+    # how many of those nodes are current guild members, so positions among
+    # all users or among present members are found in O(log n).
+
+    def __init__(self, users: Iterable[Tuple[str, int, int]] = (), present: Optional[Set[str]] = None):
+        self._head = _Node(None, MAX_LEVEL)
+        self._keys: Dict[str, tuple] = {}
+        self.present_count = 0
+        for user_id, level, xp in users:
+            self._keys[user_id] = (-level, -xp, user_id)
+        self._build(sorted(self._keys.values()), present)
+
+    def _build(self, keys: List[tuple], present: Optional[Set[str]]):
+        # Bulk loads get the deterministic "perfect" tower heights (one level
+        # per trailing zero bit of the position); later inserts are random.
+        last = [self._head] * MAX_LEVEL
+        last_pos = [0] * MAX_LEVEL
+        last_present = [0] * MAX_LEVEL
+        present_pos = 0
+        for pos, key in enumerate(keys, 1):
+            level = min((pos & -pos).bit_length(), MAX_LEVEL)
+            is_present = present is None or key[2] in present
+            present_pos += is_present
+            node = _Node(key, level, is_present)
+            for i in range(level):
+                prev = last[i]
+                prev.next[i] = node
+                prev.width[i] = pos - last_pos[i]
+                prev.present_width[i] = present_pos - last_present[i]
+                last[i] = node
+                last_pos[i] = pos
+                last_present[i] = present_pos
+        for i in range(MAX_LEVEL):
+            last[i].width[i] = len(keys) + 1 - last_pos[i]
+            last[i].present_width[i] = present_pos - last_present[i]
+        self.present_count = present_pos
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._keys
+
+    def _find(self, key) -> Tuple[List[_Node], List[int], List[int]]:
+        update = [self._head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        present_positions = [0] * MAX_LEVEL
+        node = self._head
+        pos = 0
+        present_pos = 0
+        for i in reversed(range(MAX_LEVEL)):
+            while node.next[i] is not None and node.next[i].key < key:
+                pos += node.width[i]
+                present_pos += node.present_width[i]
+                node = node.next[i]
+            update[i] = node
+            positions[i] = pos
+            present_positions[i] = present_pos
+        return update, positions, present_positions
+
+    def _insert(self, key, present: bool):
+        update, positions, present_positions = self._find(key)
+        pos = positions[0]
+        present_pos = present_positions[0]
+        level = _random_level()
+        node = _Node(key, level, present)
+        for i in range(MAX_LEVEL):
+            prev = update[i]
+            if i < level:
+                node.next[i] = prev.next[i]
+                prev.next[i] = node
+                node.width[i] = prev.width[i] - (pos - positions[i])
+                prev.width[i] = pos - positions[i] + 1
+                node.present_width[i] = prev.present_width[i] - (present_pos - present_positions[i])
+                prev.present_width[i] = present_pos - present_positions[i] + present
+            else:
+                prev.width[i] += 1
+                prev.present_width[i] += present
+        self.present_count += present
+
+    def _remove(self, key) -> bool:
+        update, _, _ = self._find(key)
+        node = update[0].next[0]
+        for i in range(MAX_LEVEL):
+            prev = update[i]
+            if prev.next[i] is node:
+                prev.width[i] += node.width[i] - 1
+                prev.present_width[i] += node.present_width[i] - node.present
+                prev.next[i] = node.next[i]
+            else:
+                prev.width[i] -= 1
+                prev.present_width[i] -= node.present
+        self.present_count -= node.present
+        return node.present
+
+    def update(self, user_id: str, level: int, xp: int, present: bool = True):
+        key = (-level, -xp, user_id)
+        old = self._keys.get(user_id)
+        if old == key:
+            return
+        if old is not None:
+            present = self._remove(old)
+        self._insert(key, present)
+        self._keys[user_id] = key
+
+    def remove(self, user_id: str):
+        old = self._keys.pop(user_id, None)
+        if old is not None:
+            self._remove(old)
+
+    def set_present(self, user_id: str, present: bool):
+        key = self._keys.get(user_id)
+        if key is None:
+            return
+        update, _, _ = self._find(key)
+        node = update[0].next[0]
+        if node.present == present:
+            return
+        node.present = present
+        delta = 1 if present else -1
+        for i in range(MAX_LEVEL):
+            update[i].present_width[i] += delta
+        self.present_count += delta
+
+    def rank(self, user_id: str) -> Optional[int]:
+        key = self._keys.get(user_id)
+        if key is None:
+            return None
+        _, positions, _ = self._find(key)
+        return positions[0] + 1
+
+    def page(self, offset: int, count: int) -> List[Tuple[int, str, int, int]]:
+        node = self._head
+        remaining = offset
+        for i in reversed(range(MAX_LEVEL)):
+            while node.next[i] is not None and node.width[i] <= remaining:
+                remaining -= node.width[i]
+                node = node.next[i]
+
+        entries = []
+        node = node.next[0]
+        while node is not None and len(entries) < count:
+            level, xp, user_id = node.key
+            entries.append((offset + len(entries) + 1, user_id, -level, -xp))
+            node = node.next[0]
+        return entries
+
+    def present_page(self, offset: int, count: int) -> List[Tuple[int, str, int, int]]:
+        # Each entry is selected by its rank among present members, so departed
+        # users between them are skipped rather than walked.
+        entries = []
+        for target in range(offset + 1, min(offset + count, self.present_count) + 1):
+            node = self._head
+            pos = 0
+            remaining = target
+            for i in reversed(range(MAX_LEVEL)):
+                while node.next[i] is not None and node.present_width[i] < remaining:
+                    remaining -= node.present_width[i]
+                    pos += node.width[i]
+                    node = node.next[i]
+            node = node.next[0]
+            level, xp, user_id = node.key
+            entries.append((pos + 1, user_id, -level, -xp))
+        return entries
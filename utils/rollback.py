@@ -0,0 +1,248 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+import discord
+
+CHANNEL_CREATORS = {
+    discord.ChannelType.category: 'create_category',
+    discord.ChannelType.text: 'create_text_channel',
+    discord.ChannelType.news: 'create_text_channel',
+    discord.ChannelType.voice: 'create_voice_channel',
+    discord.ChannelType.stage_voice: 'create_stage_channel',
+    discord.ChannelType.forum: 'create_forum'
+}
+
+
+class _Deleted:
+    __slots__ = ('kind', 'spec', 'deleted_at', 'executor_id')
+
+    def __init__(self, kind: str, spec: dict):
+        self.kind = kind
+        self.spec = spec
+        self.deleted_at = time.monotonic()
+        self.executor_id: Optional[int] = None
+
+
+def _overwrite(allow: int, deny: int) -> discord.PermissionOverwrite:
+    return discord.PermissionOverwrite.from_pair(discord.Permissions(allow), discord.Permissions(deny))
+
+
+class RollbackEngine:
+    # discord.py's guild cache is already the live, event-fed model of
+    # channels, roles, overwrites and emojis. Deleted objects are serialised
+    # here from that model (webhooks, which are not cached, from the audit-log
+    # push) and kept for `retention` seconds so the deletions attributed to an
+    # executor can be recreated. Restores run in dependency phases (roles,
+    # categories, channels, webhooks; emojis alongside) with up to
+    # `concurrency` requests in flight; discord.py queues requests that share
+    # a rate-limit bucket and honours Retry-After on 429s.
+
+    def __init__(self, concurrency: int, retention: float, max_objects: int):
+        self.concurrency = concurrency
+        self.retention = retention
+        self.max_objects = max_objects
+        self.restored = 0
+        self.failed = 0
+        self._deleted: Dict[int, "OrderedDict[int, _Deleted]"] = {}
+
+    def _store(self, guild_id: int, object_id: int, kind: str, spec: dict) -> _Deleted:
+        deleted = self._deleted.setdefault(guild_id, OrderedDict())
+        cutoff = time.monotonic() - self.retention
+        while deleted:
+            oldest = next(iter(deleted.values()))
+            if oldest.deleted_at >= cutoff and len(deleted) < self.max_objects:
+                break
+            deleted.popitem(last=False)
+        item = deleted[object_id] = _Deleted(kind, spec)
+        return item
+
+    def capture_role(self, role: discord.Role):
+        overwrites = []
+        for channel in role.guild.channels:
+            overwrite = channel.overwrites_for(role)
+            if not overwrite.is_empty():
+                allow, deny = overwrite.pair()
+                overwrites.append((channel.id, allow.value, deny.value))
+        self._store(role.guild.id, role.id, 'role', {
+            'name': role.name,
+            'permissions': role.permissions.value,
+            'colour': role.colour.value,
+            'hoist': role.hoist,
+            'mentionable': role.mentionable,
+            'position': role.position,
+            'overwrites': overwrites
+        })
+
+    def capture_channel(self, channel: discord.abc.GuildChannel):
+        if channel.type not in CHANNEL_CREATORS:
+            return
+        options = {'position': channel.position}
+        if channel.type == discord.ChannelType.news:
+            options['news'] = True
+        for attr in ('topic', 'nsfw', 'slowmode_delay', 'bitrate', 'user_limit'):
+            value = getattr(channel, attr, None)
+            if value is not None:
+                options[attr] = value
+        self._store(channel.guild.id, channel.id, 'channel', {
+            'name': channel.name,
+            'type': channel.type,
+            'category_id': channel.category_id,
+            'options': options,
+            'overwrites': [
+                (target.id, isinstance(target, discord.Role) or getattr(target, 'type', None) is discord.Role,
+                 *(p.value for p in overwrite.pair()))
+                for target, overwrite in channel.overwrites.items()
+            ]
+        })
+
+    def capture_emoji(self, emoji: discord.Emoji):
+        self._store(emoji.guild_id, emoji.id, 'emoji', {
+            'name': emoji.name,
+            'source': emoji,
+            'roles': [role.id for role in emoji.roles]
+        })
+
+    def capture_webhook(self, entry: discord.AuditLogEntry):
+        channel = getattr(entry.before, 'channel', None)
+        if channel is None or entry.target is None:
+            return
+        item = self._store(entry.guild.id, entry.target.id, 'webhook', {
+            'name': getattr(entry.before, 'name', None) or 'Webhook',
+            'channel_id': channel.id,
+            'avatar': getattr(entry.before, 'avatar', None)
+        })
+        item.executor_id = entry.user_id
+
+    def attribute(self, guild_id: int, object_id: int, executor_id: int):
+        item = self._deleted.get(guild_id, {}).get(object_id)
+        if item is not None:
+            item.executor_id = executor_id
+
+    def pending(self) -> int:
+        return sum(len(deleted) for deleted in self._deleted.values())
+
+    async def _run(self, semaphore: asyncio.Semaphore, jobs: List[Callable[[], Awaitable]]):
+        async def run(job):
+            async with semaphore:
+                try:
+                    await job()
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Error restoring deleted object: {e}")
+        await asyncio.gather(*(run(job) for job in jobs))
+
+    async def restore(self, guild: discord.Guild, executor_id: int, reason: str) -> Dict[str, int]:
+        deleted = self._deleted.get(guild.id, OrderedDict())
+        taken = [(object_id, item) for object_id, item in deleted.items() if item.executor_id == executor_id]
+        for object_id, _ in taken:
+            del deleted[object_id]
+
+        by_kind: Dict[str, list] = {'role': [], 'channel': [], 'emoji': [], 'webhook': []}
+        for object_id, item in taken:
+            by_kind[item.kind].append((object_id, item.spec))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        ids: Dict[int, int] = {}
+        counts = {kind: 0 for kind in by_kind}
+
+        def restore_role(old_id, spec):
+            async def job():
+                role = await guild.create_role(
+                    name=spec['name'],
+                    permissions=discord.Permissions(spec['permissions']),
+                    colour=discord.Colour(spec['colour']),
+                    hoist=spec['hoist'],
+                    mentionable=spec['mentionable'],
+                    reason=reason
+                )
+                ids[old_id] = role.id
+                counts['role'] += 1
+            return job
+
+        def restore_role_overwrite(role, channel, allow, deny):
+            async def job():
+                await channel.set_permissions(role, overwrite=_overwrite(allow, deny), reason=reason)
+            return job
+
+        def restore_channel(old_id, spec):
+            async def job():
+                overwrites = {}
+                for target_id, is_role, allow, deny in spec['overwrites']:
+                    if is_role:
+                        target = guild.get_role(ids.get(target_id, target_id))
+                    else:
+                        target = guild.get_member(target_id) or discord.Object(target_id)
+                    if target is not None:
+                        overwrites[target] = _overwrite(allow, deny)
+
+                options = dict(spec['options'])
+                if 'bitrate' in options:
+                    options['bitrate'] = min(options['bitrate'], int(guild.bitrate_limit))
+                creator = CHANNEL_CREATORS[spec['type']]
+                if creator != 'create_category':
+                    category_id = ids.get(spec['category_id'], spec['category_id'])
+                    options['category'] = guild.get_channel(category_id) if category_id else None
+                if creator not in ('create_text_channel', 'create_forum'):
+                    options.pop('topic', None)
+                    options.pop('nsfw', None)
+                    options.pop('slowmode_delay', None)
+                if creator not in ('create_voice_channel', 'create_stage_channel'):
+                    options.pop('bitrate', None)
+                    options.pop('user_limit', None)
+
+                channel = await getattr(guild, creator)(spec['name'], overwrites=overwrites, reason=reason, **options)
+                ids[old_id] = channel.id
+                counts['channel'] += 1
+            return job
+
+        def restore_emoji(old_id, spec):
+            async def job():
+                image = await spec['source'].read()
+                roles = [role for role in (guild.get_role(ids.get(r, r)) for r in spec['roles']) if role]
+                await guild.create_custom_emoji(name=spec['name'], image=image, roles=roles, reason=reason)
+                counts['emoji'] += 1
+            return job
+
+        def restore_webhook(old_id, spec):
+            async def job():
+                channel = guild.get_channel(ids.get(spec['channel_id'], spec['channel_id']))
+                if channel is None or not hasattr(channel, 'create_webhook'):
+                    return
+                avatar = await spec['avatar'].read() if spec['avatar'] else None
+                await channel.create_webhook(name=spec['name'], avatar=avatar, reason=reason)
+                counts['webhook'] += 1
+            return job
+
+        async def restore_structure():
+            await self._run(semaphore, [restore_role(*args) for args in by_kind['role']])
+
+            positions = {}
+            role_overwrites = []
+            for old_id, spec in by_kind['role']:
+                role = guild.get_role(ids.get(old_id, 0))
+                if role is None:
+                    continue
+                positions[role] = spec['position']
+                for channel_id, allow, deny in spec['overwrites']:
+                    channel = guild.get_channel(channel_id)
+                    if channel is not None:
+                        role_overwrites.append(restore_role_overwrite(role, channel, allow, deny))
+            if positions:
+                try:
+                    await guild.edit_role_positions(positions, reason=reason)
+                except Exception as e:
+                    print(f"Error restoring role positions: {e}")
+
+            categories = [args for args in by_kind['channel'] if args[1]['type'] == discord.ChannelType.category]
+            channels = [args for args in by_kind['channel'] if args[1]['type'] != discord.ChannelType.category]
+            await self._run(semaphore, [restore_channel(*args) for args in categories])
+            await self._run(semaphore, [restore_channel(*args) for args in channels] + role_overwrites)
+            await self._run(semaphore, [restore_webhook(*args) for args in by_kind['webhook']])
+
+        await asyncio.gather(
+            restore_structure(),
+            self._run(semaphore, [restore_emoji(*args) for args in by_kind['emoji']])
+        )
+        self.restored += sum(counts.values())
+        return counts
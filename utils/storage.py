@@ -0,0 +1,423 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import config
+from utils.metrics import Metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Maps a data file to the key inside each guild entry that holds per-user rows.
+# None means the guild entry itself is the row collection (hardbans).
+ROW_COLLECTIONS = {
+    config.LEVELING_DATA_FILE: 'users',
+    config.ECONOMY_DATA_FILE: 'users',
+    config.WARNS_DATA_FILE: 'users',
+    config.MUTES_DATA_FILE: 'mutes',
+    config.HARDBANS_FILE: None,
+}
+
+# changes: None for the whole file, otherwise guild key -> changed row keys
+# (None for the whole guild entry).
+Changes = Optional[Dict[str, Optional[Set[str]]]]
+
+
+class Storage:
+    # True when save() with `changes` writes only those guilds/rows, so writes
+    # other processes made to the rest of the file survive without a merge.
+    partial_writes = False
+
+    async def initialize(self, defaults: Dict[str, Dict]):
+        pass
+
+    async def load(self, filepath: str) -> Dict:
+        raise NotImplementedError
+
+    async def load_guilds(self, filepath: str, guild_ids: Iterable[str]) -> Dict:
+        data = await self.load(filepath)
+        return {guild_id: data[guild_id] for guild_id in guild_ids if guild_id in data}
+
+    async def save(self, filepath: str, data: Dict, changes: Changes = None):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+def _json_dumps(data) -> bytes:
+    return json.dumps(data, indent=4).encode()
+
+
+def _compact_dumps(data) -> bytes:
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def _orjson_dumps(data) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+
+# codec name -> (loads, dumps); every codec reads what the others write.
+CODECS = {
+    'json': (json.loads, _json_dumps),
+    'compact': (json.loads, _compact_dumps),
+}
+if orjson is not None:
+    CODECS['orjson'] = (orjson.loads, _orjson_dumps)
+
+
+def write_atomic(filepath: str, content: bytes):
+    directory = os.path.dirname(filepath) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filepath)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+# Executor entry points; module-level so a process pool can pickle them.
+def _read_file(codec: str, filepath: str) -> Tuple[Optional[Dict], int, float, Optional[str]]:
+    with open(filepath, 'rb') as f:
+        raw = f.read()
+    started = time.perf_counter()
+    try:
+        data = CODECS[codec][0](raw)
+    except ValueError as e:
+        return None, len(raw), 0.0, str(e)
+    return data, len(raw), time.perf_counter() - started, None
+
+
+def _write_file(codec: str, filepath: str, snapshot: bytes) -> Tuple[int, float]:
+    started = time.perf_counter()
+    content = CODECS[codec][1](pickle.loads(snapshot))
+    seconds = time.perf_counter() - started
+    write_atomic(filepath, content)
+    return len(content), seconds
+
+
+class JSONStorage(Storage):
+    # Decoding and encoding run in the serialization executor together with
+    # the file I/O. Cogs mutate cached dicts without holding locks, so saves
+    # first take a pickle snapshot on the loop (C speed, several times cheaper
+    # than the indented encode) and the worker encodes that. The C codecs
+    # hold the GIL while they run, so only a process pool keeps them from
+    # stalling the loop; the 'auto' executor sends files of at least
+    # SERIALIZE_PROCESS_BYTES there and keeps small files on threads, where
+    # the pipe round trip to a worker process would cost more than the encode.
+    # Threads are the default: spawned workers re-import the main script.
+    def __init__(self, codec: str = config.JSON_CODEC, executor: str = config.SERIALIZE_EXECUTOR):
+        if codec not in CODECS:
+            print(f"❌ JSON codec '{codec}' is not available (is orjson installed?); using json")
+            codec = 'json'
+        self.codec = codec
+        self.executor = executor
+        self.process_bytes = config.SERIALIZE_PROCESS_BYTES
+        self._threads: Optional[Executor] = None
+        self._processes: Optional[Executor] = None
+        self.file_stats: Dict[str, Dict] = {}
+
+    def _in_process(self, filepath: str) -> bool:
+        if self.executor != 'auto':
+            return self.executor == 'process'
+        size = self.file_stats.get(filepath, {}).get('bytes')
+        if size is None:
+            try:
+                size = os.path.getsize(filepath)
+            except OSError:
+                size = 0
+        return size >= self.process_bytes
+
+    def _pool(self, filepath: str) -> Executor:
+        if self._in_process(filepath):
+            if self._processes is None:
+                context = multiprocessing.get_context('spawn')
+                self._processes = ProcessPoolExecutor(max_workers=config.SERIALIZE_WORKERS, mp_context=context)
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=config.SERIALIZE_WORKERS, thread_name_prefix='json')
+        return self._threads
+
+    async def _run(self, filepath: str, fn, *args):
+        pool = self._pool(filepath)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenExecutor:
+            if pool is self._processes:
+                self._processes = None
+            raise
+
+    def _track(self, filepath: str, size: int, step: str, seconds: float):
+        stats = self.file_stats.setdefault(filepath, {'bytes': 0, 'decode': 0.0, 'encode': 0.0})
+        stats['bytes'] = size
+        stats[step] = seconds
+        Metrics().record('storage', os.path.basename(filepath), step, seconds)
+
+    async def initialize(self, defaults: Dict[str, Dict]):
+        for filepath, default in defaults.items():
+            if not os.path.exists(filepath):
+                await self.save(filepath, default)
+
+    async def load(self, filepath: str) -> Dict:
+        try:
+            data, size, seconds, error = await self._run(filepath, _read_file, self.codec, filepath)
+        except FileNotFoundError:
+            return {}
+
+        if error is not None:
+            corrupt_path = f"{filepath}.corrupt-{int(time.time())}"
+            os.replace(filepath, corrupt_path)
+            print(f"❌ {filepath} is corrupt ({error}); moved it to {corrupt_path} and starting empty")
+            return {}
+        self._track(filepath, size, 'decode', seconds)
+        return data
+
+    async def save(self, filepath: str, data: Dict, changes: Changes = None):
+        started = time.perf_counter()
+        snapshot = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        Metrics().record('storage', os.path.basename(filepath), 'snapshot', time.perf_counter() - started)
+        size, seconds = await self._run(filepath, _write_file, self.codec, filepath, snapshot)
+        self._track(filepath, size, 'encode', seconds)
+
+    async def close(self):
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=False)
+        self._threads = None
+        self._processes = None
+
+
+class Table:
+    # Columnar tables keep any keys outside `columns` as a JSON object in the
+    # `extra` column, so new fields on a row survive a save/load round trip.
+    def __init__(self, name: str, columns: Optional[Tuple[str, ...]] = None, many: bool = False, indexes: Tuple[str, ...] = ()):
+        self.name = name
+        self.columns = columns
+        self.many = many
+        self.indexes = indexes
+
+    @property
+    def value_columns(self) -> Tuple[str, ...]:
+        return self.columns + ('extra',) if self.columns else ('data',)
+
+    def schema(self) -> List[str]:
+        cols = ', '.join(self.value_columns)
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS {self.name} ("
+            f"guild_id TEXT NOT NULL, user_id TEXT NOT NULL, position INTEGER NOT NULL DEFAULT 0, {cols}, "
+            f"PRIMARY KEY (guild_id, user_id, position))"
+        ]
+        for i, index in enumerate(self.indexes):
+            statements.append(f"CREATE INDEX IF NOT EXISTS {self.name}_idx{i} ON {self.name} ({index})")
+        return statements
+
+    def migrate(self, conn: sqlite3.Connection):
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.name})")}
+        for column in self.value_columns:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {self.name} ADD COLUMN {column}")
+
+    def encode(self, guild_id: str, user_id: str, value) -> List[tuple]:
+        items = value if self.many else [value]
+        rows = []
+        for position, item in enumerate(items):
+            if self.columns:
+                extra = {k: v for k, v in item.items() if k not in self.columns}
+                values = tuple(item.get(c) for c in self.columns) + (json.dumps(extra) if extra else None,)
+            else:
+                values = (json.dumps(item),)
+            rows.append((guild_id, user_id, position) + values)
+        return rows
+
+    def decode(self, values: tuple):
+        if self.columns:
+            value = dict(zip(self.columns, values))
+            if values[-1]:
+                value.update(json.loads(values[-1]))
+            return value
+        return json.loads(values[0])
+
+
+TABLES = {
+    config.LEVELING_DATA_FILE: Table('levels', ('xp', 'level'), indexes=('guild_id, level DESC, xp DESC',)),
+    config.ECONOMY_DATA_FILE: Table('economy'),
+    config.WARNS_DATA_FILE: Table('warns', ('id', 'reason', 'warned_by', 'timestamp'), many=True),
+    config.MUTES_DATA_FILE: Table('mutes', ('muted_by', 'reason', 'muted_at', 'expires'), indexes=('expires',)),
+    config.HARDBANS_FILE: Table('hardbans', ('reason', 'banned_by')),
+}
+
+
+class SQLiteStorage(Storage):
+    partial_writes = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        self._conn: Optional[sqlite3.Connection] = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS documents (file TEXT NOT NULL, guild_id TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (file, guild_id))")
+            for table in TABLES.values():
+                for statement in table.schema():
+                    conn.execute(statement)
+                table.migrate(conn)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    async def initialize(self, defaults: Dict[str, Dict]):
+        await self._run(self._connect)
+
+    def _document(self, filepath: str, guild) -> str:
+        if filepath not in TABLES or not isinstance(guild, dict):
+            return json.dumps(guild)
+        collection = ROW_COLLECTIONS[filepath]
+        if collection is None:
+            return json.dumps({})
+        return json.dumps({k: v for k, v in guild.items() if k != collection})
+
+    def _rows(self, filepath: str, guild_id: str, guild, user_ids: Optional[Iterable[str]] = None) -> Dict[str, List[tuple]]:
+        table = TABLES[filepath]
+        collection = ROW_COLLECTIONS[filepath]
+        source = guild if collection is None else guild.get(collection, {})
+        if user_ids is None:
+            user_ids = source.keys()
+        return {
+            user_id: table.encode(guild_id, user_id, source[user_id]) if user_id in source else []
+            for user_id in user_ids
+        }
+
+    async def load(self, filepath: str) -> Dict:
+        return await self._run(self._load, filepath)
+
+    async def load_guilds(self, filepath: str, guild_ids: Iterable[str]) -> Dict:
+        return await self._run(self._load, filepath, list(guild_ids))
+
+    def _load(self, filepath: str, guild_ids: Optional[List[str]] = None) -> Dict:
+        conn = self._connect()
+        where, params = "", ()
+        if guild_ids is not None:
+            where, params = " AND guild_id IN (SELECT value FROM json_each(?))", (json.dumps(guild_ids),)
+
+        data = {}
+        for guild_id, raw in conn.execute(f"SELECT guild_id, data FROM documents WHERE file = ?{where}", (filepath,) + params):
+            data[guild_id] = json.loads(raw)
+
+        table = TABLES.get(filepath)
+        if table is None:
+            return data
+
+        collection = ROW_COLLECTIONS[filepath]
+        if collection is not None:
+            # An empty collection isn't stored anywhere; cogs expect the key.
+            for guild in data.values():
+                if isinstance(guild, dict):
+                    guild.setdefault(collection, {})
+        cols = ', '.join(table.value_columns)
+        query = f"SELECT guild_id, user_id, {cols} FROM {table.name} WHERE 1{where} ORDER BY guild_id, user_id, position"
+        for row in conn.execute(query, params):
+            guild_id, user_id, values = row[0], row[1], row[2:]
+            guild = data.setdefault(guild_id, {})
+            rows = guild if collection is None else guild.setdefault(collection, {})
+            value = table.decode(values)
+            if table.many:
+                rows.setdefault(user_id, []).append(value)
+            else:
+                rows[user_id] = value
+        return data
+
+    async def save(self, filepath: str, data: Dict, changes: Changes = None):
+        # Rows are encoded on the event loop so the worker thread never walks
+        # dicts that the bot is still mutating.
+        has_rows = filepath in TABLES
+        ops = []
+        keys = data.keys() if changes is None else changes.keys()
+        for guild_id in list(keys):
+            if guild_id not in data:
+                ops.append((guild_id, None, True, {}))
+                continue
+            guild = data[guild_id]
+            user_ids = None if changes is None else changes[guild_id]
+            rows = {}
+            if has_rows and isinstance(guild, dict):
+                rows = self._rows(filepath, guild_id, guild, user_ids)
+            ops.append((guild_id, self._document(filepath, guild), user_ids is None, rows))
+        await self._run(self._save, filepath, ops, changes is None)
+
+    def _save(self, filepath: str, ops: list, replace_all: bool):
+        conn = self._connect()
+        table = TABLES.get(filepath)
+        with conn:
+            if replace_all:
+                conn.execute("DELETE FROM documents WHERE file = ?", (filepath,))
+                if table:
+                    conn.execute(f"DELETE FROM {table.name}")
+
+            for guild_id, document, whole_guild, rows in ops:
+                if document is None:
+                    conn.execute("DELETE FROM documents WHERE file = ? AND guild_id = ?", (filepath, guild_id))
+                else:
+                    conn.execute("INSERT OR REPLACE INTO documents (file, guild_id, data) VALUES (?, ?, ?)", (filepath, guild_id, document))
+
+                if table is None:
+                    continue
+
+                if whole_guild and not replace_all:
+                    conn.execute(f"DELETE FROM {table.name} WHERE guild_id = ?", (guild_id,))
+                for user_id, user_rows in rows.items():
+                    if not whole_guild:
+                        conn.execute(f"DELETE FROM {table.name} WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+                    if user_rows:
+                        self._insert(conn, table, user_rows)
+
+    def _insert(self, conn: sqlite3.Connection, table: Table, rows: Iterable[tuple]):
+        cols = ', '.join(('guild_id', 'user_id', 'position') + table.value_columns)
+        marks = ', '.join('?' for _ in range(3 + len(table.value_columns)))
+        conn.executemany(f"INSERT INTO {table.name} ({cols}) VALUES ({marks})", rows)
+
+    async def close(self):
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    global _storage
+    if _storage is None:
+        if config.STORAGE_BACKEND == 'sqlite':
+            _storage = SQLiteStorage(config.SQLITE_FILE)
+        else:
+            _storage = JSONStorage()
+    return _storage
@@ -1,14 +1,13 @@
 import discord
-import asyncio
-import json
-import aiofiles
 from typing import Dict, Optional
 import config
+from utils.file_lock import file_lock
+from utils.storage import get_storage
 from datetime import datetime, timedelta
 
 class VCManager:
     _instance = None
-    _lock = asyncio.Lock()
+    _lock = file_lock(config.VC_DATA_FILE)
     
     def __new__(cls):
         if cls._instance is None:
@@ -22,18 +21,10 @@ class VCManager:
             self.owner_left_times = {}
     
     async def _read_data(self) -> Dict:
-        try:
-            async with aiofiles.open(config.VC_DATA_FILE, 'r') as f:
-                content = await f.read()
-                return json.loads(content)
-        except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError:
-            return {}
+        return await get_storage().load(config.VC_DATA_FILE)
     
     async def _write_data(self, data: Dict):
-        async with aiofiles.open(config.VC_DATA_FILE, 'w') as f:
-            await f.write(json.dumps(data, indent=4))
+        await get_storage().save(config.VC_DATA_FILE, data)
     
     async def create_vc(self, channel_id: int, owner_id: int):
         async with self._lock: